@@ -0,0 +1,52 @@
+"""user parameter station
+
+Revision ID: 7e3c5a91d2f6
+Revises: d41a7c5e83b0
+Create Date: 2026-10-19 11:41:08.302117
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = "7e3c5a91d2f6"
+down_revision = "d41a7c5e83b0"
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic import context
+
+
+def upgrade():
+    schema_upgrades()
+    if context.get_x_argument(as_dictionary=True).get("data", None):
+        data_upgrades()
+
+
+def downgrade():
+    if context.get_x_argument(as_dictionary=True).get("data", None):
+        data_downgrades()
+    schema_downgrades()
+
+
+def schema_upgrades():
+    """schema upgrade migrations go here."""
+    op.add_column(
+        "user_parameters",
+        sa.Column("station_id", sa.String(length=16), nullable=True),
+    )
+
+
+def schema_downgrades():
+    """schema downgrade migrations go here."""
+    op.drop_column("user_parameters", "station_id")
+
+
+def data_upgrades():
+    """Add any optional data upgrade migrations here!"""
+    # Existing rows are mapped with `python -m app.services.stations`.
+    pass
+
+
+def data_downgrades():
+    """Add any optional data downgrade migrations here!"""
+    pass
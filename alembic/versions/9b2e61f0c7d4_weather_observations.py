@@ -0,0 +1,119 @@
+"""weather observations
+
+Revision ID: 9b2e61f0c7d4
+Revises: 4c9f38940d78
+Create Date: 2026-10-19 09:12:44.210583
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = "9b2e61f0c7d4"
+down_revision = "4c9f38940d78"
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import context
+
+from app.config import settings
+
+# Days of partitions created ahead of today; matches PARTITION_DAYS_AHEAD in
+# app.services.observation_service, which keeps the window current after this.
+PARTITION_DAYS_AHEAD = 2
+
+
+def upgrade():
+    schema_upgrades()
+    if context.get_x_argument(as_dictionary=True).get("data", None):
+        data_upgrades()
+
+
+def downgrade():
+    if context.get_x_argument(as_dictionary=True).get("data", None):
+        data_downgrades()
+    schema_downgrades()
+
+
+def schema_upgrades():
+    """schema upgrade migrations go here."""
+    # Daily partitions are created and dropped by run_partition_maintenance,
+    # which the app schedules; the migration creates the initial window.
+    op.create_table(
+        "weather_observations",
+        sa.Column("cell_id", sa.BigInteger(), nullable=False),
+        sa.Column("observed_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column(
+            "fetched_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("temperature", sa.REAL(), nullable=False),
+        sa.Column("wind_speed", sa.REAL(), nullable=False),
+        sa.Column("uv_index", sa.REAL(), nullable=False),
+        sa.Column("rain_chance", sa.REAL(), nullable=False),
+        sa.Column("aqi", sa.REAL(), nullable=False),
+        sa.Column("pm10", sa.REAL(), nullable=False),
+        sa.Column("pm2_5", sa.REAL(), nullable=False),
+        sa.Column("allergens", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        postgresql_partition_by="RANGE (observed_at)",
+    )
+    op.create_index(
+        "ix_weather_observations_observed_at",
+        "weather_observations",
+        ["observed_at"],
+        postgresql_using="brin",
+    )
+    op.create_index(
+        "ix_weather_observations_cell_id",
+        "weather_observations",
+        ["cell_id"],
+        postgresql_using="brin",
+        postgresql_with={"pages_per_range": 16},
+    )
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            day date;
+        BEGIN
+            FOR day IN SELECT generate_series(
+                (now() AT TIME ZONE 'utc')::date
+                    - {settings.OBSERVATION_RETENTION_DAYS:d},
+                (now() AT TIME ZONE 'utc')::date + {PARTITION_DAYS_AHEAD:d},
+                interval '1 day'
+            )::date LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF weather_observations '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'weather_observations_' || to_char(day, 'YYYYMMDD'),
+                    day,
+                    day + 1
+                );
+            END LOOP;
+        END $$
+        """
+    )
+
+
+def schema_downgrades():
+    """schema downgrade migrations go here."""
+    # Dropping the parent drops its attached partitions too.
+    op.drop_index(
+        "ix_weather_observations_cell_id", table_name="weather_observations"
+    )
+    op.drop_index(
+        "ix_weather_observations_observed_at", table_name="weather_observations"
+    )
+    op.drop_table("weather_observations")
+
+
+def data_upgrades():
+    """Add any optional data upgrade migrations here!"""
+    pass
+
+
+def data_downgrades():
+    """Add any optional data downgrade migrations here!"""
+    pass
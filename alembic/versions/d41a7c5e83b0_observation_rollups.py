@@ -0,0 +1,95 @@
+"""observation rollups
+
+Revision ID: d41a7c5e83b0
+Revises: 9b2e61f0c7d4
+Create Date: 2026-10-19 11:03:27.548913
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = "d41a7c5e83b0"
+down_revision = "9b2e61f0c7d4"
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import context
+
+METRICS = (
+    "temperature",
+    "wind_speed",
+    "uv_index",
+    "rain_chance",
+    "aqi",
+    "pm10",
+    "pm2_5",
+)
+TABLES = (
+    "weather_observation_rollups_daily",
+    "weather_observation_rollups_weekly",
+)
+
+
+def upgrade():
+    schema_upgrades()
+    if context.get_x_argument(as_dictionary=True).get("data", None):
+        data_upgrades()
+
+
+def downgrade():
+    if context.get_x_argument(as_dictionary=True).get("data", None):
+        data_downgrades()
+    schema_downgrades()
+
+
+def schema_upgrades():
+    """schema upgrade migrations go here."""
+    for table in TABLES:
+        op.create_table(
+            table,
+            sa.Column("cell_id", sa.BigInteger(), nullable=False),
+            sa.Column("bucket_start", sa.Date(), nullable=False),
+            sa.Column("observations", sa.Integer(), nullable=False),
+            *(
+                sa.Column(f"{metric}_{stat}", sa.REAL(), nullable=False)
+                for metric in METRICS
+                for stat in ("min", "max")
+            ),
+            *(
+                sa.Column(
+                    f"{metric}_sum", postgresql.DOUBLE_PRECISION(), nullable=False
+                )
+                for metric in METRICS
+            ),
+            sa.PrimaryKeyConstraint("cell_id", "bucket_start"),
+        )
+
+
+def schema_downgrades():
+    """schema downgrade migrations go here."""
+    for table in reversed(TABLES):
+        op.drop_table(table)
+
+
+def data_upgrades():
+    """Backfill the rollups from the observations still retained."""
+    for table, bucket in zip(
+        TABLES,
+        (
+            "observed_at AT TIME ZONE 'UTC'",
+            "date_trunc('week', observed_at AT TIME ZONE 'UTC')",
+        ),
+    ):
+        stats = ", ".join(f"min({m}), max({m}), sum({m})" for m in METRICS)
+        columns = ", ".join(f"{m}_min, {m}_max, {m}_sum" for m in METRICS)
+        op.execute(
+            f"INSERT INTO {table} (cell_id, bucket_start, observations, {columns}) "
+            f"SELECT cell_id, CAST({bucket} AS date), count(*), {stats} "
+            f"FROM weather_observations GROUP BY 1, 2"
+        )
+
+
+def data_downgrades():
+    """Add any optional data downgrade migrations here!"""
+    pass
@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def make_strong_etag(body: bytes) -> str:
+    """Build a strong ETag from the exact bytes of a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def if_none_match_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check an If-None-Match header against the current ETag.
+
+    If-None-Match uses the weak comparison function (RFC 9110 13.1.2), so
+    W/"..." and "..." match each other on either side.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = _opaque_tag(etag)
+    return any(
+        _opaque_tag(candidate.strip()) == etag for candidate in if_none_match.split(",")
+    )
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def if_modified_since_matches(
+    if_modified_since: str | None, last_modified: datetime
+) -> bool:
+    """
+    Check whether a resource is unchanged since the If-Modified-Since date.
+
+    HTTP dates only carry whole seconds, so sub-second precision is dropped
+    before comparing.
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def is_not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified: datetime,
+) -> bool:
+    """Evaluate conditional GET headers; If-None-Match takes precedence."""
+    if if_none_match is not None:
+        return if_none_match_matches(if_none_match, etag)
+    return if_modified_since_matches(if_modified_since, last_modified)
@@ -0,0 +1,181 @@
+"""
+Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+Each worker keeps its caches in process memory, so a write handled by one
+worker leaves the others serving the old value. Writers call
+InvalidationBus.publish inside their transaction; Postgres delivers the
+notification to every listener only if and when that transaction commits.
+Every worker holds one dedicated asyncpg connection LISTENing on the channel
+and evicts the named key from the caches registered for its namespace.
+
+Notifications sent while a listener is disconnected are lost, so after
+reconnecting the bus flushes every registered cache instead.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, Callable, Protocol
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.observability.metrics import CACHE_INVALIDATION_FLUSHES
+
+logger = logging.getLogger(__name__)
+
+USER_PARAMETERS = "user_parameters"
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+# Listener failures that mean "reconnect", as opposed to bugs.
+_CONNECTION_ERRORS = (
+    OSError,
+    TimeoutError,
+    asyncpg.PostgresError,
+    asyncpg.InterfaceError,
+)
+
+
+class Invalidatable(Protocol):
+    def invalidate(self, key: Any) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class InvalidationBus:
+    """
+    Payloads are "<origin>:<namespace>:<key>". The origin identifies the
+    publishing process so its own listener can skip notifications for writes
+    it has already applied to its caches.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        ping_interval: float = 10.0,
+        max_backoff: float = 30.0,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+        self.origin = f"{os.getpid():x}{uuid.uuid4().hex[:8]}"
+        self._targets: dict[str, list[tuple[Invalidatable, Callable[[str], Any]]]] = {}
+        self._connection: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self.connected: asyncio.Event | None = None
+
+    def register(
+        self,
+        namespace: str,
+        target: Invalidatable,
+        key: Callable[[str], Any] = uuid.UUID,
+    ) -> None:
+        """Evict from target when namespace keys are published; key parses them."""
+        targets = self._targets.setdefault(namespace, [])
+        if (target, key) not in targets:
+            targets.append((target, key))
+
+    async def publish(self, session: AsyncSession, namespace: str, key: Any) -> None:
+        """Queue an invalidation that is delivered when session's transaction commits."""
+        key = key.hex if isinstance(key, uuid.UUID) else str(key)
+        await session.execute(
+            _NOTIFY,
+            {"channel": self.channel, "payload": f"{self.origin}:{namespace}:{key}"},
+        )
+
+    def dispatch(self, payload: str) -> None:
+        try:
+            origin, namespace, key = payload.split(":", 2)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation %r", payload)
+            return
+        if origin == self.origin:
+            return
+        for target, parse in self._targets.get(namespace, ()):
+            try:
+                target.invalidate(parse(key))
+            except ValueError:
+                logger.warning("Ignoring malformed invalidation %r", payload)
+                return
+
+    def flush_all(self) -> None:
+        for targets in self._targets.values():
+            for target, _ in targets:
+                target.clear()
+        CACHE_INVALIDATION_FLUSHES.inc()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        self.dispatch(payload)
+
+    async def start(self) -> None:
+        if self._task is None:
+            # Created here so the event belongs to the running loop.
+            self.connected = asyncio.Event()
+            self._task = asyncio.create_task(self._listen(), name="invalidation-bus")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        backoff = 0.5
+        has_connected = False
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+            except _CONNECTION_ERRORS as exc:
+                logger.warning(
+                    "Invalidation listener cannot connect, retrying in %.1fs: %r",
+                    backoff,
+                    exc,
+                )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = 0.5
+            try:
+                await self._hold(self._connection, flush=has_connected)
+            except _CONNECTION_ERRORS as exc:
+                logger.warning("Invalidation listener lost its connection: %r", exc)
+            finally:
+                self.connected.clear()
+                self._connection.terminate()
+                self._connection = None
+            has_connected = True
+
+    async def _hold(self, connection: asyncpg.Connection, flush: bool) -> None:
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        await connection.add_listener(self.channel, self._on_notification)
+        if flush:
+            # Anything published while we were disconnected was missed.
+            self.flush_all()
+        self.connected.set()
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), self.ping_interval)
+            except TimeoutError:
+                # A silently dropped TCP connection only shows up when used.
+                await connection.fetchval("SELECT 1", timeout=self.ping_interval)
+        logger.warning("Invalidation listener connection was terminated")
+
+
+invalidation_bus = InvalidationBus(
+    str(settings.ASYNCPG_DATABASE_URI), settings.CACHE_INVALIDATION_CHANNEL
+)
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """Dependency provider for the process-wide InvalidationBus."""
+    return invalidation_bus
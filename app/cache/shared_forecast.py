@@ -0,0 +1,193 @@
+"""
+Node-local forecast cache shared by every worker process through one
+memory-mapped file (put it on tmpfs, e.g. /dev/shm).
+
+The file is a fixed header followed by slot_count fixed-width slots:
+
+    slot: seq u64 | key u64 | length u64 | payload[record_size] | padding
+
+Slots are addressed by open addressing (linear probing) on the grid cell id
+and are never freed, so a cell keeps its slot for the life of the file. The
+key is stored as cell_id + 1 so that zero marks an empty slot.
+
+Each slot is a seqlock. A writer takes an exclusive flock on the file (writers
+are rare: one per cell per refresh), makes seq odd, writes the record, and
+makes seq even again. Readers never lock: they read seq, decode the payload
+straight out of the mapping, and retry if seq was odd or changed meanwhile,
+up to a bound. A writer that dies mid-put leaves seq odd and releases the
+flock; readers treat the slot as missing until the next put, which finds seq
+odd under the lock and writes over the torn record.
+The even seq doubles as the record's version. The slot header words are
+written as single aligned 8-byte stores through a memoryview cast (not
+struct.pack_into, which zero-fills its target first), and x86-64 keeps the
+seq/payload/seq store order visible to other processes.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+MAGIC = b"WXFCSHM\x00"
+LAYOUT_VERSION = 1
+
+_HEADER = struct.Struct("<8sIII")  # magic, layout version, slot count, record size
+_HEADER_SIZE = 64
+# Slot header fields, as indexes into the mapping viewed as u64 words.
+_SEQ, _KEY, _LENGTH = 0, 1, 2
+_SLOT_HEADER_SIZE = 24
+_ALIGNMENT = 64
+# Readers spinning on an odd seq yield to the writer after this many tries.
+_SPINS_BEFORE_YIELD = 100
+# Tries before a reader gives up on a slot. A live writer finishes within a
+# few; a slot still odd after this many is left by a writer that died.
+_MAX_READ_TRIES = 10_000
+
+
+def _slot_stride(record_size: int) -> int:
+    size = _SLOT_HEADER_SIZE + record_size
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedForecastCache:
+    def __init__(self, path: str, slot_count: int, record_size: int):
+        if slot_count <= 0 or record_size <= 0:
+            raise ValueError("slot_count and record_size must be positive")
+        self.path = path
+        self.slot_count = slot_count
+        self.record_size = record_size
+        self._stride = _slot_stride(record_size)
+        size = _HEADER_SIZE + slot_count * self._stride
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._writer_lock():
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, size)
+                    os.pwrite(
+                        self._fd,
+                        _HEADER.pack(MAGIC, LAYOUT_VERSION, slot_count, record_size),
+                        0,
+                    )
+                header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            if header != (MAGIC, LAYOUT_VERSION, slot_count, record_size):
+                raise ValueError(
+                    f"{path} holds a different cache layout {header[1:]}; "
+                    "remove it or change the path"
+                )
+            self._mmap = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._view = memoryview(self._mmap)
+        self._words = self._view.cast("Q")
+
+    def close(self) -> None:
+        self._words.release()
+        self._view.release()
+        self._mmap.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _writer_lock(self) -> Iterator[None]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self._stride
+
+    def _word(self, slot: int) -> int:
+        """Index of the slot's first header word in the u64 view."""
+        return self._offset(slot) // 8
+
+    def _find(self, cell_id: int, claim: bool = False) -> int | None:
+        """Probe for cell_id's slot; with claim, return the first empty one instead."""
+        stored_key = cell_id + 1
+        # Fibonacci hashing spreads the row-major cell ids of a metro area.
+        start = (cell_id * 0x9E3779B97F4A7C15 >> 16) % self.slot_count
+        for probe in range(self.slot_count):
+            slot = (start + probe) % self.slot_count
+            key = self._words[self._word(slot) + _KEY]
+            if key == stored_key:
+                return slot
+            if key == 0:
+                return slot if claim else None
+        if claim:
+            raise ValueError("shared forecast cache is full")
+        return None
+
+    def put(self, cell_id: int, payload: bytes) -> int:
+        """Store a cell's record and return its new version."""
+        if len(payload) > self.record_size:
+            raise ValueError(
+                f"record of {len(payload)} bytes exceeds slot size {self.record_size}"
+            )
+        words = self._words
+        with self._writer_lock():
+            slot = self._find(cell_id, claim=True)
+            word = self._word(slot)
+            seq = words[word + _SEQ]
+            # Odd under the lock: the last writer died mid-put. Carry on from
+            # the even seq after it so readers see a new version.
+            seq += seq & 1
+            words[word + _SEQ] = seq + 1
+            words[word + _KEY] = cell_id + 1
+            words[word + _LENGTH] = len(payload)
+            start = self._offset(slot) + _SLOT_HEADER_SIZE
+            self._mmap[start : start + len(payload)] = payload
+            words[word + _SEQ] = seq + 2
+        return seq + 2
+
+    def read(
+        self, cell_id: int, decode: Callable[[memoryview], T]
+    ) -> tuple[int, T] | None:
+        """
+        Decode a cell's record in place and return (version, decoded).
+
+        decode gets a view into the shared mapping; anything it returns must
+        not keep referencing that view, since a writer may reuse it. Returns
+        None, as for a missing cell, if no stable record could be read.
+        """
+        slot = self._find(cell_id)
+        if slot is None:
+            return None
+        words = self._words
+        word = self._word(slot)
+        start = self._offset(slot) + _SLOT_HEADER_SIZE
+        for tries in range(1, _MAX_READ_TRIES + 1):
+            before = words[word + _SEQ]
+            if before & 1:
+                if tries % _SPINS_BEFORE_YIELD == 0:
+                    time.sleep(0)
+                continue
+            length = min(words[word + _LENGTH], self.record_size)
+            try:
+                value = decode(self._view[start : start + length])
+            except Exception:
+                # A torn record can fail to decode; only a stable one is an error.
+                if words[word + _SEQ] != before:
+                    continue
+                raise
+            if words[word + _SEQ] == before:
+                return before, value
+        return None
+
+    def get(self, cell_id: int) -> tuple[int, bytes] | None:
+        return self.read(cell_id, bytes)
+
+    def version(self, cell_id: int) -> int | None:
+        slot = self._find(cell_id)
+        if slot is None:
+            return None
+        seq = self._words[self._word(slot) + _SEQ]
+        # Mid-write, report the version being written: callers comparing it to
+        # an older one re-read, which waits for the write to finish.
+        return seq + (seq & 1)
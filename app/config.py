@@ -26,6 +26,93 @@ class Settings(BaseSettings):
     PASSWORD_HASHING_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Server settings, used by `python -m app.serve`
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    # Worker processes; 0 starts one per CPU.
+    WEB_CONCURRENCY: int = 0
+    # Seconds a worker waits for in-flight requests to finish after SIGTERM.
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30
+
+    # Connection pool settings, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Connections each worker opens during warm-up, capped at DB_POOL_SIZE.
+    DB_POOL_MIN_SIZE: int = 2
+    # Prepared statements kept per pooled connection by the asyncpg dialect;
+    # 0 prepares every statement afresh.
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Set when connecting through PgBouncer in transaction mode: statement
+    # names are then made unique and asyncpg's own statement cache is off.
+    DB_BEHIND_PGBOUNCER: bool = False
+
+    # Serve parameter cache misses from a raw asyncpg read instead of the ORM.
+    USER_PARAMETER_RAW_READS: bool = False
+    # Coalesce concurrent user lookups into one query per batch.
+    USER_LOADER_ENABLED: bool = False
+    # How long a batch collects keys; 0 dispatches on the next loop iteration.
+    USER_LOADER_WINDOW_MS: float = 0.0
+
+    # Warm-up run by each worker before it accepts traffic
+    WARMUP_ENABLED: bool = True
+    # Most recently updated parameter rows loaded into the parameter cache.
+    WARMUP_USER_PARAMETERS: int = 1000
+
+    # Cache settings
+    FORECAST_RESULT_CACHE_SIZE: int = 100_000
+    USER_PARAMETER_CACHE_SIZE: int = 100_000
+    # Forecast cache shared by all workers on a node, as a file on tmpfs
+    # (e.g. /dev/shm/weatheriam-forecasts). Empty keeps one store per worker.
+    SHARED_FORECAST_CACHE_PATH: str = ""
+    # Grid cells the shared cache can hold; cells are never evicted.
+    SHARED_FORECAST_SLOTS: int = 32_768
+    # Gridded allergen field written by `python -m app.services.allergen_grid`.
+    ALLERGEN_GRID_PATH: str = ""
+    # station_id,name,lat,lon CSV of reporting stations; empty uses the bundled one.
+    STATION_CATALOGUE_PATH: str = ""
+    # Place-name index built by `python -m app.services.gazetteer`; empty
+    # indexes the bundled places.csv into the temp directory on first use.
+    GAZETTEER_INDEX_PATH: str = ""
+    # Days of weather_observations history kept; older daily partitions are dropped.
+    OBSERVATION_RETENTION_DAYS: int = 30
+    # Create upcoming and drop expired observation partitions this often.
+    OBSERVATION_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+    # Run partition maintenance in the background; one process does it at a time.
+    OBSERVATION_MAINTENANCE_ENABLED: bool = True
+
+    # Postgres NOTIFY channel workers use to evict each other's cache entries.
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+    # Listen for invalidations; disable only when running a single process.
+    CACHE_INVALIDATION_ENABLED: bool = True
+
+    # Daily digests, due at this many minutes after local midnight.
+    DIGEST_LOCAL_MINUTE: int = 7 * 60
+    # Spread each zone's digests over this many minutes from then, by user.
+    DIGEST_SPREAD_MINUTES: int = 30
+    # Compete for running the digest scheduler; one process wins at a time.
+    DIGEST_SCHEDULER_ENABLED: bool = True
+
+    # Observability settings
+    # Hosts besides loopback that may scrape /metrics (e.g. a sidecar).
+    METRICS_ALLOWED_HOSTS: list[str] = []
+    # Log every statement; expensive, for local debugging only.
+    SQL_ECHO: bool = False
+    # Requests issuing more statements than this are logged as over budget.
+    SQL_QUERY_BUDGET: int = 8
+    # Statements slower than this are logged, with parameters redacted.
+    SQL_SLOW_QUERY_MS: float = 200.0
+
+    # Request profiling; the middleware is not installed unless enabled.
+    PROFILING_ENABLED: bool = False
+    # Profile 1 in N requests; 0 profiles only requests with the debug header.
+    PROFILING_SAMPLE_RATE: int = 0
+    # Value of the X-Debug-Profile header that forces a profile; empty disables it.
+    PROFILING_TOKEN: str = ""
+    # Only profile paths starting with one of these, e.g. ["/v1/auth/token"].
+    PROFILING_ROUTES: list[str] = []
+    PROFILING_DIR: str = "/tmp/weatheriam-profiles"
+    PROFILING_MAX_BYTES: int = 50 * 1024 * 1024
+
     # Determine which .env file to load
     # This is the key change: we check an environment variable.
     if os.getenv("TESTING"):
@@ -60,6 +147,19 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field
+    @property
+    def ASYNCPG_DATABASE_URI(self) -> PostgresDsn:
+        """DSN for opening asyncpg connections directly, outside SQLAlchemy."""
+        return MultiHostUrl.build(
+            scheme="postgresql",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
 
 # Create a single, reusable instance of the settings
 settings = Settings()
@@ -1,4 +1,5 @@
-from typing import AsyncGenerator
+import uuid
+from typing import TYPE_CHECKING, Any, AsyncGenerator
 from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.orm import (
@@ -9,6 +10,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 
+if TYPE_CHECKING:
+    import asyncpg
+
 # create session factory to generate new database sessions
 # SessionFactory = sessionmaker(
 #     bind=create_engine(str(settings.ASYNC_SQL_DATABASE_URI)),
@@ -18,6 +22,25 @@ from ..config import settings
 # )
 
 
+def asyncpg_connect_args() -> dict[str, Any]:
+    """
+    connect_args for engines on the asyncpg dialect.
+
+    The dialect prepares every statement under a name and keeps the prepared
+    statements per pooled connection. That is safe on a direct connection,
+    where the server session lives as long as the pooled one. Behind a
+    transaction-pooling proxy consecutive transactions can land on different
+    server sessions, so names must not collide and nothing may be reused.
+    """
+    if settings.DB_BEHIND_PGBOUNCER:
+        return {
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            "statement_cache_size": 0,
+        }
+    return {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+
+
 async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency for getting a PostgreSQL session.
@@ -33,3 +56,22 @@ async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_asyncpg_connection(
+    session: AsyncSession, begin: bool = True
+) -> "asyncpg.Connection":
+    """
+    Return the asyncpg connection underneath a session, for COPY and other
+    driver-level calls. It shares the session's transaction, so its work
+    commits or rolls back with the session. Pass begin=False for a single
+    read that needs no transaction of its own.
+    """
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    # The dialect sends BEGIN lazily, before its own first statement; a COPY
+    # issued first through the driver would otherwise commit on its own.
+    adapted = raw.dbapi_connection
+    if begin and adapted._transaction is None:
+        await adapted._start_transaction()
+    return raw.driver_connection
@@ -1,11 +1,12 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import create_async_engine
 
-from app.routers import love_yourself, user_route
-
-from .routers import user_auth_route, user_parameters_route
 from .config import settings
+from .observability.middleware import MetricsMiddleware, QueryAccountingMiddleware
+
+# Routers and services are imported inside create_app and the lifespan, not
+# here: they pull in numpy and most of the models, and `import app.main`
+# should stay cheap. `app` itself is built on first access (see __getattr__).
 
 
 @asynccontextmanager
@@ -13,28 +14,127 @@ async def lifespan(app: FastAPI):
     """
     Handles startup and shutdown events for the application.
     """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from .cache.invalidation import USER_PARAMETERS, invalidation_bus
+    from .database.session import asyncpg_connect_args
+    from .observability.sql import instrument_engine
+    from .services.digest_scheduler import digest_scheduler
+    from .services.forecast_service import (
+        ForecastStore,
+        forecast_service,
+        open_shared_forecasts,
+    )
+    from .services.observation_service import partition_maintainer
+    from .services.user_loader import UserLoader
+    from .services.user_parameter_service import user_parameter_cache
+    from .warmup import warm_up
+
     # === STARTUP ===
     print("🚀 Application starting up...")
 
     # Create the PostgreSQL connection pool (engine)
     app.state.db_engine = create_async_engine(
-        str(settings.ASYNC_SQL_DATABASE_URI), echo=True, future=True
+        str(settings.ASYNC_SQL_DATABASE_URI),
+        echo=settings.SQL_ECHO,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        connect_args=asyncpg_connect_args(),
     )
+    instrument_engine(app.state.db_engine.sync_engine)
     print("PostgreSQL connection pool created.")
 
+    # Share forecasts with the other workers on this node when configured.
+    app.state.shared_forecasts = open_shared_forecasts()
+
+    # Coalesce concurrent user lookups into batched queries on this pool.
+    if settings.USER_LOADER_ENABLED:
+        app.state.user_loader = UserLoader(
+            app.state.db_engine, window=settings.USER_LOADER_WINDOW_MS / 1000
+        )
+
+    # Evict entries other workers invalidate. Started before warm-up so the
+    # listener is usually up by the time the caches are primed.
+    if settings.CACHE_INVALIDATION_ENABLED:
+        invalidation_bus.register(USER_PARAMETERS, user_parameter_cache)
+        # Rendered forecasts were evaluated against the old thresholds.
+        invalidation_bus.register(USER_PARAMETERS, forecast_service.results)
+        # Locations changed elsewhere are re-read by the digest scheduler.
+        invalidation_bus.register(USER_PARAMETERS, digest_scheduler)
+        await invalidation_bus.start()
+
+    # Pay cold-path costs before uvicorn starts handing us connections
+    if settings.WARMUP_ENABLED:
+        await warm_up(app.state.db_engine)
+
+    if settings.DIGEST_SCHEDULER_ENABLED:
+        await digest_scheduler.start(app.state.db_engine)
+
+    # Keep observation partitions ready ahead of ingest and drop expired ones.
+    if settings.OBSERVATION_MAINTENANCE_ENABLED:
+        await partition_maintainer.start(app.state.db_engine)
+
     yield  # The application is now running
 
     # === SHUTDOWN ===
     print("👋 Application shutting down...")
 
+    await partition_maintainer.stop()
+    await digest_scheduler.stop()
+    await invalidation_bus.stop()
+
+    if app.state.shared_forecasts is not None:
+        forecast_service.store = ForecastStore()
+        app.state.shared_forecasts.close()
+
     # Dispose of the PostgreSQL engine
     await app.state.db_engine.dispose()
     print("PostgreSQL connection pool closed.")
 
 
-app = FastAPI(lifespan=lifespan)
+def create_app() -> FastAPI:
+    """Build the application with its middleware and routers."""
+    from .routers import (
+        forecast_route,
+        location_route,
+        love_yourself,
+        metrics_route,
+        user_auth_route,
+        user_parameters_route,
+        user_route,
+    )
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(QueryAccountingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    if settings.PROFILING_ENABLED:
+        from .observability.profiling import ProfilingMiddleware
+
+        app.add_middleware(
+            ProfilingMiddleware,
+            output_dir=settings.PROFILING_DIR,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            token=settings.PROFILING_TOKEN,
+            routes=settings.PROFILING_ROUTES,
+            max_bytes=settings.PROFILING_MAX_BYTES,
+        )
+
+    app.include_router(love_yourself.router, prefix="")
+    app.include_router(user_auth_route.router, prefix="/v1/auth")
+    app.include_router(user_parameters_route.router, prefix="/v1/user_parameters")
+    app.include_router(user_route.router, prefix="/v1/users")
+    app.include_router(forecast_route.router, prefix="/v1/forecast")
+    app.include_router(location_route.router, prefix="/v1/locations")
+    app.include_router(metrics_route.router)
+    return app
+
 
-app.include_router(love_yourself.router, prefix="")
-app.include_router(user_auth_route.router, prefix="/v1/auth")
-app.include_router(user_parameters_route.router, prefix="/v1/user_parameters")
-app.include_router(user_route.router, prefix="/v1/users")
+def __getattr__(name: str):
+    # `from app.main import app` and uvicorn's "app.main:app" build the
+    # application once, on first access.
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,2 +1,7 @@
 from .user_model import Users
 from .user_parameter_model import UserParameter
+from .observation_model import (
+    observation_rollups_daily,
+    observation_rollups_weekly,
+    weather_observations,
+)
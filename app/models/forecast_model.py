@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class HourlyConditions(BaseModel):
+    """Forecast conditions for a single hour in a grid cell."""
+
+    time: datetime = Field(description="Start of the forecast hour (UTC).")
+    temperature: float = Field(description="Air temperature (°C).")
+    wind_speed: float = Field(description="Wind speed (m/s).")
+    uv_index: float = Field(description="UV index.")
+    rain_chance: float = Field(description="Chance of rain (0-1).")
+    aqi: float = Field(description="Air Quality Index (AQI).")
+    pm10: float = Field(description="PM10 concentration (μg/m³).")
+    pm2_5: float = Field(description="PM2.5 concentration (μg/m³).")
+    allergens: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Allergen concentrations keyed by allergen name.",
+    )
+
+
+class CellForecast(BaseModel):
+    """The hourly forecast for one grid cell, as held in the forecast cache."""
+
+    cell_id: int = Field(description="The grid cell the forecast applies to.")
+    issued_at: datetime = Field(description="When the forecast was fetched.")
+    hours: List[HourlyConditions]
+
+
+class ThresholdAlert(BaseModel):
+    """A user parameter threshold that is crossed in a forecast hour."""
+
+    parameter_name: str
+    importance: int
+    threshold: Optional[float] = None
+    value: float
+    allergen: Optional[str] = None
+
+
+class AnnotatedHour(HourlyConditions):
+    """Forecast conditions annotated with the user's crossed thresholds."""
+
+    alerts: List[ThresholdAlert] = Field(default_factory=list)
+
+
+class UserForecast(BaseModel):
+    """The personalized forecast returned by GET /v1/forecast/{user_id}."""
+
+    user_id: uuid.UUID
+    cell_id: int
+    issued_at: datetime
+    hours: List[AnnotatedHour]
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class Location(BaseModel):
+    """A named place, as suggested by GET /v1/locations."""
+
+    name: str
+    country: str = Field(description="ISO 3166-1 alpha-2 country code.")
+    lat: float
+    lon: float
+    population: int
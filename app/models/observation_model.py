@@ -0,0 +1,114 @@
+from datetime import date
+from typing import Dict
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    Index,
+    Integer,
+    Table,
+    REAL,
+    TIMESTAMP,
+    func,
+)
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, JSONB
+from pydantic import BaseModel, Field
+from sqlmodel import SQLModel
+
+from app.models.forecast_model import HourlyConditions
+
+# Numeric conditions stored per observation and summarized by the rollups.
+OBSERVATION_METRICS = (
+    "temperature",
+    "wind_speed",
+    "uv_index",
+    "rain_chance",
+    "aqi",
+    "pm10",
+    "pm2_5",
+)
+
+# History of the conditions fetched per grid cell, range-partitioned by day on
+# observed_at. The table is append-only and has no primary key: a unique index
+# would have to include observed_at and would be a B-tree growing with every
+# row. BRIN indexes stay a few pages per partition because rows arrive in time
+# order, and each COPY batch is sorted by cell so cell ranges stay narrow too.
+weather_observations = Table(
+    "weather_observations",
+    SQLModel.metadata,
+    Column("cell_id", BigInteger, nullable=False),
+    Column("observed_at", TIMESTAMP(timezone=True), nullable=False),
+    Column(
+        "fetched_at",
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    *(Column(metric, REAL, nullable=False) for metric in OBSERVATION_METRICS),
+    Column("allergens", JSONB, nullable=True),
+    Index(
+        "ix_weather_observations_observed_at",
+        "observed_at",
+        postgresql_using="brin",
+    ),
+    Index(
+        "ix_weather_observations_cell_id",
+        "cell_id",
+        postgresql_using="brin",
+        postgresql_with={"pages_per_range": 16},
+    ),
+    postgresql_partition_by="RANGE (observed_at)",
+)
+
+
+def _rollup_table(name: str) -> Table:
+    """
+    Per-cell aggregates of weather_observations over fixed calendar buckets.
+
+    Rows are upserted as observation batches land, merging min/max and adding
+    sums and counts, so a bucket's mean is sum / observations.
+    """
+    return Table(
+        name,
+        SQLModel.metadata,
+        Column("cell_id", BigInteger, primary_key=True),
+        Column("bucket_start", Date, primary_key=True),
+        Column("observations", Integer, nullable=False),
+        *(
+            Column(f"{metric}_{stat}", REAL, nullable=False)
+            for metric in OBSERVATION_METRICS
+            for stat in ("min", "max")
+        ),
+        *(
+            Column(f"{metric}_sum", DOUBLE_PRECISION, nullable=False)
+            for metric in OBSERVATION_METRICS
+        ),
+    )
+
+
+# UTC days, and ISO weeks starting on Monday.
+observation_rollups_daily = _rollup_table("weather_observation_rollups_daily")
+observation_rollups_weekly = _rollup_table("weather_observation_rollups_weekly")
+
+
+class WeatherObservation(HourlyConditions):
+    """The conditions recorded for one grid cell and hour."""
+
+    cell_id: int = Field(description="The grid cell the conditions were fetched for.")
+
+
+class MetricSummary(BaseModel):
+    min: float
+    max: float
+    mean: float
+
+
+class ObservationSummary(BaseModel):
+    """Aggregated conditions for one cell over [bucket_start, bucket_end)."""
+
+    cell_id: int
+    bucket_start: date
+    bucket_end: date
+    observations: int = Field(description="Hourly observations aggregated.")
+    metrics: Dict[str, MetricSummary]
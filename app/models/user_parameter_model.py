@@ -2,7 +2,7 @@ import uuid
 from pydantic import BaseModel, ConfigDict
 from sqlmodel import Field, SQLModel, Column, TIMESTAMP
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional, Tuple
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -10,7 +10,9 @@ from sqlalchemy.dialects.postgresql import JSONB
 class UserIndividualParameter(BaseModel):
     """A flexible model for a single user parameter, including its importance."""
 
+    # Frozen, so the DEFAULT_PARAMETERS instances can be shared by every row.
     model_config = ConfigDict(
+        frozen=True,
         json_schema_extra={
             "examples": [
                 {
@@ -20,7 +22,7 @@ class UserIndividualParameter(BaseModel):
                     "parameter_array_value": None,
                 }
             ]
-        }
+        },
     )
     importance: int = Field(
         default=1,
@@ -32,11 +34,42 @@ class UserIndividualParameter(BaseModel):
     parameter_value: Optional[float] = Field(
         default=None, description="The numeric value for the parameter threshold."
     )
-    parameter_array_value: Optional[List[str]] = Field(
+    # A tuple, so a shared default cannot be mutated in place.
+    parameter_array_value: Optional[Tuple[str, ...]] = Field(
         default=None, description="The array of values for the parameter."
     )
 
 
+# Each parameter's default, validated once at import and shared by every
+# UserParameterBase built without one.
+DEFAULT_PARAMETERS: dict[str, UserIndividualParameter] = {
+    parameter.parameter_name: parameter
+    for parameter in (
+        UserIndividualParameter(
+            importance=5, parameter_name="uv_index_threshold", parameter_value=6.0
+        ),
+        UserIndividualParameter(
+            importance=5, parameter_name="aqi_threshold", parameter_value=100.0
+        ),
+        UserIndividualParameter(
+            importance=3, parameter_name="wind_speed_threshold", parameter_value=10.0
+        ),
+        UserIndividualParameter(
+            importance=7, parameter_name="rain_chance_threshold", parameter_value=0.5
+        ),
+        UserIndividualParameter(
+            importance=4, parameter_name="pm10_threshold", parameter_value=50.0
+        ),
+        UserIndividualParameter(
+            importance=4, parameter_name="pm2_5_threshold", parameter_value=35.0
+        ),
+        UserIndividualParameter(
+            importance=5, parameter_name="allergens", parameter_array_value=()
+        ),
+    )
+}
+
+
 class UserParameterBase(SQLModel):
     """Base model for user-specific weather and air quality preferences."""
 
@@ -47,53 +80,37 @@ class UserParameterBase(SQLModel):
         description="Preferred longitude for weather forecasts."
     )
     uv_index_threshold: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=5, parameter_name="uv_index_threshold", parameter_value=6.0
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["uv_index_threshold"],
         sa_column=Column(JSONB),
         description="UV index level that triggers a notification.",
     )
     aqi_threshold: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=5, parameter_name="aqi_threshold", parameter_value=100.0
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["aqi_threshold"],
         sa_column=Column(JSONB),
         description="Air Quality Index (AQI) level that triggers a notification.",
     )
     wind_speed_threshold: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=3, parameter_name="wind_speed_threshold", parameter_value=10.0
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["wind_speed_threshold"],
         sa_column=Column(JSONB),
         description="Wind speed (m/s) that triggers a notification.",
     )
     rain_chance_threshold: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=7, parameter_name="rain_chance_threshold", parameter_value=0.5
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["rain_chance_threshold"],
         sa_column=Column(JSONB),
         description="Chance of rain percentage (0-1) that triggers a notification.",
     )
     pm10_threshold: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=4, parameter_name="pm10_threshold", parameter_value=50.0
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["pm10_threshold"],
         sa_column=Column(JSONB),
         description="PM10 concentration (μg/m³) that triggers a notification.",
     )
     pm2_5_threshold: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=4, parameter_name="pm2_5_threshold", parameter_value=35.0
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["pm2_5_threshold"],
         sa_column=Column(JSONB),
         description="PM2.5 concentration (μg/m³) that triggers a notification.",
     )
     allergens: UserIndividualParameter = Field(
-        default_factory=lambda: UserIndividualParameter(
-            importance=5,
-            parameter_name="allergens",
-            parameter_array_value=[],
-        ),
+        default_factory=lambda: DEFAULT_PARAMETERS["allergens"],
         sa_column=Column(JSONB),
         description="List of allergens to be notified about.",
     )
@@ -109,6 +126,11 @@ class UserParameter(UserParameterBase, table=True):
         default_factory=uuid.uuid4, primary_key=True, index=True, unique=True
     )
     user_id: uuid.UUID = Field(foreign_key="users.id", unique=True, index=True)
+    station_id: Optional[str] = Field(
+        default=None,
+        max_length=16,
+        description="Nearest reporting station to the preferred location.",
+    )
 
     time_created: datetime = Field(
         default_factory=datetime.utcnow,
@@ -0,0 +1,210 @@
+"""
+Process-local request and dependency metrics in Prometheus text format.
+
+Metrics are updated from the event loop thread (SQLAlchemy's sync event hooks
+run there too, inside its greenlets), so counters are plain dict and list
+increments with no locks on the hot path. Each worker exposes its own values;
+Prometheus aggregates across workers at query time.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator
+
+# Request latency buckets in seconds, tuned for an API whose slowest path is a
+# single Argon2 verification.
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Dependency buckets go lower: a JWT decode or cached query is well under 1ms.
+DEPENDENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        values = self._values
+        values[label_values] = values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        name = f"{self.name}_total"
+        lines = [
+            f"# HELP {name} {self.documentation}",
+            f"# TYPE {name} counter",
+        ]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = REQUEST_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._series: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(bound)
+                labels = _format_labels(self.labels, label_values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests",
+    "HTTP requests handled, by route template, method and status code.",
+    labels=("route", "method", "status"),
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last body chunk.",
+    labels=("route", "method"),
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements on the database.",
+    buckets=DEPENDENCY_BUCKETS,
+)
+ARGON2_DURATION = registry.histogram(
+    "argon2_duration_seconds",
+    "Time spent hashing or verifying passwords with Argon2.",
+    labels=("operation",),
+    buckets=DEPENDENCY_BUCKETS,
+)
+JWT_DECODE_DURATION = registry.histogram(
+    "jwt_decode_duration_seconds",
+    "Time spent decoding and verifying JWTs.",
+    buckets=DEPENDENCY_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "db_queries_per_request",
+    "Number of SQL statements issued while handling a request.",
+    labels=("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+SQL_COMPILE_CACHE = registry.counter(
+    "sql_compile_cache",
+    "Statements executed, by registered statement name (or other) and by "
+    "whether SQLAlchemy's compiled cache had them.",
+    labels=("statement", "outcome"),
+)
+QUERY_BUDGET_EXCEEDED = registry.counter(
+    "db_query_budget_exceeded",
+    "Requests that issued more SQL statements than SQL_QUERY_BUDGET.",
+    labels=("route",),
+)
+CACHE_INVALIDATION_FLUSHES = registry.counter(
+    "cache_invalidation_flushes",
+    "Full cache flushes after the invalidation listener reconnected.",
+)
+FORECAST_PUBLISHES = registry.counter(
+    "forecast_publishes",
+    "Cell forecasts published, by whether the fingerprint changed.",
+    labels=("outcome",),
+)
+DIGESTS_DUE = registry.counter(
+    "digests_due",
+    "Users whose daily digest came due on the scheduler's timing wheel.",
+)
+USER_LOADER_BATCH_SIZE = registry.histogram(
+    "user_loader_batch_size",
+    "Distinct keys fetched per batched user lookup.",
+    labels=("key",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1000),
+)
@@ -0,0 +1,97 @@
+import logging
+import time
+
+from app.config import settings
+from app.observability.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    QUERY_BUDGET_EXCEEDED,
+)
+from app.observability.sql import QueryStats, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: dict) -> str:
+    """
+    Return the route template for a handled request, e.g. /v1/users/{user_id}.
+
+    Labelling by template rather than raw path keeps metric cardinality bounded.
+    The matched route's path may be relative to its router's prefix, so the
+    prefix is taken from the request path's leading segments, which hold no
+    parameter values.
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    segments = scope["path"].split("/")
+    prefix = segments[: max(len(segments) - route.path.count("/"), 0)]
+    return "/".join(prefix) + route.path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts and latency."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, route, method)
+            HTTP_REQUESTS.inc(route, method, str(status_code))
+
+
+class QueryAccountingMiddleware:
+    """
+    ASGI middleware counting SQL statements and DB time per request.
+
+    Requests issuing more statements than SQL_QUERY_BUDGET are logged, which
+    is how N+1 patterns show up before they show up in latency.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_query_stats.reset(token)
+            route = route_template(scope)
+            DB_QUERIES_PER_REQUEST.observe(stats.count, route)
+            if stats.count > settings.SQL_QUERY_BUDGET:
+                QUERY_BUDGET_EXCEEDED.inc(route)
+                logger.warning(
+                    "%s %s issued %d queries (budget %d) taking %.1f ms",
+                    scope["method"],
+                    route,
+                    stats.count,
+                    settings.SQL_QUERY_BUDGET,
+                    stats.seconds * 1000,
+                )
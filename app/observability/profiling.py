@@ -0,0 +1,156 @@
+"""
+On-demand request profiling.
+
+ProfilingMiddleware runs cProfile around 1-in-N requests, or around any
+request carrying the debug header with the configured token, and writes the
+result to PROFILING_DIR as a .pstats file plus a .folded file (one
+"frame;frame;frame microseconds" line per stack) that flamegraph.pl and
+speedscope read directly.
+
+The middleware is only added to the app when PROFILING_ENABLED is set, so a
+disabled profiler costs nothing per request. cProfile traces the whole event
+loop thread while enabled, so other requests interleaving with a profiled one
+show up in its output; only one request is profiled at a time.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import re
+import time
+from pathlib import Path
+
+PROFILE_HEADER = b"x-debug-profile"
+# Edges carrying less than this share of the request's time are left out of
+# the folded output; they would be invisible in a flamegraph anyway.
+MIN_FOLDED_FRACTION = 0.001
+
+
+def _frame_name(func: tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins are reported as ('~', 0, "<built-in method ...>").
+        return name.strip("<>")
+    return f"{Path(filename).name}:{name}:{line}"
+
+
+def folded_stacks(stats: pstats.Stats) -> list[str]:
+    """
+    Convert cProfile stats into folded stacks.
+
+    cProfile only records caller/callee pairs, not whole stacks, so each
+    function's time is split across its call paths in proportion to the time
+    each caller spent in it.
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    callees: dict[tuple, dict[tuple, float]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, caller_ct) in callers.items():
+            callees.setdefault(caller, {})[func] = caller_ct
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    total = sum(raw[func][3] for func in roots) or 1.0
+    totals: dict[str, float] = {}
+
+    def walk(func: tuple, inflow: float, path: tuple[str, ...], seen: frozenset):
+        _, _, tt, ct, _ = raw[func]
+        share = inflow / ct if ct else 0.0
+        frames = (*path, _frame_name(func))
+        key = ";".join(frames)
+        totals[key] = totals.get(key, 0.0) + tt * share
+        for callee, edge_ct in callees.get(func, {}).items():
+            flow = edge_ct * share
+            if callee in seen or flow / total < MIN_FOLDED_FRACTION:
+                continue
+            walk(callee, flow, frames, seen | {callee})
+
+    for root in roots:
+        walk(root, raw[root][3], (), frozenset({root}))
+
+    folded = []
+    for stack, seconds in sorted(totals.items()):
+        microseconds = round(seconds * 1_000_000)
+        if microseconds > 0:
+            folded.append(f"{stack} {microseconds}")
+    return folded
+
+
+def rotate(directory: Path, max_bytes: int) -> None:
+    """Delete the oldest profiles until the directory fits in max_bytes."""
+    files = sorted(
+        (entry for entry in directory.iterdir() if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    size = sum(entry.stat().st_size for entry in files)
+    for entry in files:
+        if size <= max_bytes:
+            break
+        size -= entry.stat().st_size
+        entry.unlink(missing_ok=True)
+
+
+def matches_route(path: str, route: str) -> bool:
+    """Whether path is route or lies below it, compared whole segments."""
+    return not route or path == route or path.startswith(route + "/")
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        output_dir: str,
+        sample_rate: int = 0,
+        token: str = "",
+        routes: list[str] | None = None,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.token = token.encode()
+        self.routes = tuple(route.rstrip("/") for route in routes or ())
+        self.max_bytes = max_bytes
+        self._requests = itertools.count(1)
+        self._active = False
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def _should_profile(self, scope) -> bool:
+        if self._active:
+            return False
+        if self.routes and not any(
+            matches_route(scope["path"], route) for route in self.routes
+        ):
+            return False
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return bool(self.sample_rate) and next(self._requests) % self.sample_rate == 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            self._active = False
+            # Dumping and rotating touch the disk; keep that off the event loop.
+            await asyncio.to_thread(self._write, scope, profiler)
+
+    def _write(self, scope, profiler: cProfile.Profile) -> None:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        stem = f"{time.time_ns()}-{os.getpid()}-{scope['method']}-{slug}"
+        base = self.output_dir / stem
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(f"{base}.pstats")
+        Path(f"{base}.folded").write_text("\n".join(folded_stacks(stats)) + "\n")
+        rotate(self.output_dir, self.max_bytes)
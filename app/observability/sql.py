@@ -0,0 +1,91 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+
+from app.config import settings
+from app.observability.metrics import DB_QUERY_DURATION, SQL_COMPILE_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """SQL statements issued while handling one request."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Set by QueryAccountingMiddleware for the duration of each request; SQLAlchemy
+# copies the context into its greenlets, so the cursor hooks below see it.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+_CACHE_OUTCOMES = {CacheStats.CACHE_HIT: "hit", CacheStats.CACHE_MISS: "miss"}
+
+
+# Start times are keyed by execution context, which handle_error also sees: a
+# failed statement never reaches after_cursor_execute, and handle_error also
+# fires for errors raised after it, e.g. while fetching rows.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", {})[id(context)] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop(id(context))
+    if context is not None:
+        # Statements from app.database.statements carry their name.
+        SQL_COMPILE_CACHE.inc(
+            context.execution_options.get("statement_name", "other"),
+            _CACHE_OUTCOMES.get(context.cache_hit, "uncached"),
+        )
+    record_query(statement, parameters, elapsed, executemany)
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None:
+        started = conn.info.get("query_started", {})
+        started.pop(id(getattr(exception_context, "execution_context", None)), None)
+
+
+def record_query(
+    statement: str, parameters, elapsed: float, executemany: bool = False
+) -> None:
+    """
+    Account for one statement. Called by the engine hooks, and directly by
+    code that runs statements on the driver connection, bypassing them.
+    """
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        # Parameter values may hold emails or password hashes, so only their
+        # shape is logged.
+        if executemany:
+            redacted = f"{len(parameters)} parameter sets"
+        else:
+            redacted = f"{len(parameters or ())} parameters"
+        logger.warning(
+            "Slow query (%.1f ms, %s redacted): %s",
+            elapsed * 1000,
+            redacted,
+            " ".join(statement.split()),
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement executed through the engine (pass engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,55 @@
+import uuid
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.etag import if_none_match_matches
+from app.database.session import get_db_session
+from app.models.forecast_model import UserForecast
+from app.serialization import JSONBytesResponse
+from app.services.forecast_service import ForecastService, get_forecast_service
+from app.services.user_parameter_service import (
+    UserParameterDatamanager,
+    UserParameterService,
+)
+
+router = APIRouter(tags=["Forecast"])
+
+
+@router.get("/{user_id}", response_model=UserForecast)
+async def get_user_forecast(
+    *,
+    session: AsyncSession = Depends(get_db_session),
+    forecast_service: ForecastService = Depends(get_forecast_service),
+    user_id: uuid.UUID = Path(..., description="The ID of the user to forecast for."),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Retrieve the user's upcoming conditions annotated against their thresholds.
+
+    Results are rendered once per forecast refresh and served from cache after
+    that. Clients should send the ETag back in If-None-Match to get a 304.
+    Answers 503 until a forecast has been published for the user's grid cell;
+    no producer ships with the app yet (see the README).
+    """
+    rendered = forecast_service.get_cached(user_id)
+    if rendered is None:
+        service = UserParameterService(UserParameterDatamanager(session))
+        user_params = await service.get_user_params_by_user_id(user_id)
+        if not user_params:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User parameters not found for user_id: {user_id}",
+            )
+        rendered = forecast_service.render_for(user_params)
+        if rendered is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Forecast not available for this location yet",
+                headers={"Retry-After": "60"},
+            )
+
+    headers = {"ETag": rendered.etag, "Cache-Control": "no-cache"}
+    if if_none_match_matches(if_none_match, rendered.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONBytesResponse(content=rendered.body, headers=headers)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.models.location_model import Location
+from app.serialization import JSONBytesResponse, dump_as
+from app.services.gazetteer import TOP_K, Gazetteer, get_gazetteer
+
+router = APIRouter(tags=["Locations"])
+
+
+@router.get("", response_model=list[Location])
+async def search_locations(
+    *,
+    gazetteer: Gazetteer = Depends(get_gazetteer),
+    q: str = Query(..., min_length=1, max_length=100, description="Name prefix."),
+    limit: int = Query(default=5, ge=1, le=TOP_K),
+):
+    """
+    Suggest places whose name has a word starting with q, most populous first.
+
+    Served from a local index, so it is cheap enough to call per keystroke.
+    Pass the chosen place's lat/lon as preferred_lat/preferred_lon.
+    """
+    places = gazetteer.complete(q, limit)
+    return JSONBytesResponse(
+        content=dump_as(list[Location], places),
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
@@ -0,0 +1,35 @@
+import ipaddress
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.config import settings
+from app.observability.metrics import registry
+
+router = APIRouter(include_in_schema=False)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _is_allowed_client(host: str | None) -> bool:
+    if host is None:
+        return False
+    if host in settings.METRICS_ALLOWED_HOSTS:
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+@router.get("/metrics")
+async def metrics(request: Request) -> Response:
+    """
+    Expose this worker's metrics in Prometheus text format.
+
+    Internal only: requests from anything but loopback or an allowed scraper
+    host get a 404, so the route is invisible from outside.
+    """
+    client_host = request.client.host if request.client else None
+    if not _is_allowed_client(client_host):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
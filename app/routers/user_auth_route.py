@@ -12,7 +12,8 @@ from ..services.auth_service import (
     decode_user_jwt,
 )
 
-from ..services.user_service import UserDataManager, UserService
+from ..services.user_loader import get_user_lookup
+from ..services.user_service import IUserLookup
 
 
 router = APIRouter(dependencies=[Depends(get_db_session)])
@@ -22,13 +23,13 @@ router = APIRouter(dependencies=[Depends(get_db_session)])
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db_session: Session = Depends(get_db_session),
+    users: IUserLookup = Depends(get_user_lookup),
 ) -> Token:
     """
     Authenticate user and return an access token if credentials are valid.
     """
     # We don't need the full user service with all its dependencies here
-    user_data_manager = UserDataManager(db_session)
-    retrieved_user = await user_data_manager.get_user_by_user_name(form_data.username)
+    retrieved_user = await users.get_user_by_user_name(form_data.username)
 
     if not retrieved_user:
         raise HTTPException(
@@ -1,17 +1,39 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Body, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Body,
+    Response,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
+from app.cache.etag import is_not_modified
+from app.cache.invalidation import (
+    USER_PARAMETERS,
+    InvalidationBus,
+    get_invalidation_bus,
+)
+from app.config import settings
 from app.database.session import get_db_session
 from app.models.user_parameter_model import (
     UserParameter,
     UserParameterUpdate,
 )
+from app.serialization import JSONBytesResponse
+from app.services.digest_scheduler import DigestScheduler, get_digest_scheduler
+from app.services.stations import StationIndex, get_station_index
+from app.services.forecast_service import ForecastService, get_forecast_service
 from app.services.user_parameter_service import (
+    UserParameterCache,
     UserParameterDatamanager,
     UserParameterService,
+    get_user_parameter_cache,
 )
 
 router = APIRouter(tags=["User Parameters"])
@@ -21,19 +43,54 @@ router = APIRouter(tags=["User Parameters"])
 async def get_user_params_by_user_id(
     *,
     session: AsyncSession = Depends(get_db_session),
+    cache: UserParameterCache = Depends(get_user_parameter_cache),
     user_id: uuid.UUID = Path(..., description="The ID of the user to retrieve."),
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
 ):
     """
     Retrieve the notification parameters for a specific user.
+
+    Served from the parameter cache when possible. Responses carry an ETag and
+    Last-Modified derived from time_updated for conditional requests.
     """
-    service = UserParameterService(UserParameterDatamanager(session))
-    return await service.get_user_params_by_user_id(user_id)
+    cached = cache.get(user_id)
+    if cached is None and settings.USER_PARAMETER_RAW_READS:
+        raw = await UserParameterDatamanager(session).get_user_params_json(user_id)
+        if raw is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User parameters not found for user_id: {user_id}",
+            )
+        cached = cache.put_serialized(user_id, *raw)
+    elif cached is None:
+        service = UserParameterService(UserParameterDatamanager(session))
+        user_params = await service.get_user_params_by_user_id(user_id)
+        if not user_params:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User parameters not found for user_id: {user_id}",
+            )
+        cached = cache.put(user_params)
+
+    if is_not_modified(
+        if_none_match, if_modified_since, cached.etag, cached.last_modified
+    ):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=cached.headers
+        )
+    return JSONBytesResponse(content=cached.body, headers=cached.headers)
 
 
 @router.patch("/{user_id}", response_model=UserParameter)
 async def update_user_params(
     *,
     session: AsyncSession = Depends(get_db_session),
+    cache: UserParameterCache = Depends(get_user_parameter_cache),
+    forecast_service: ForecastService = Depends(get_forecast_service),
+    invalidation_bus: InvalidationBus = Depends(get_invalidation_bus),
+    digest_scheduler: DigestScheduler = Depends(get_digest_scheduler),
+    station_index: StationIndex = Depends(get_station_index),
     user_id: uuid.UUID = Path(..., description="The ID of the user to update."),
     patch_params: UserParameterUpdate = Body(
         ..., description="The parameter fields to update."
@@ -59,8 +116,25 @@ async def update_user_params(
     patch_data = patch_params.model_dump(exclude_unset=True)
     for key, value in patch_data.items():
         setattr(db_user_params, key, value)
+    moved = bool(patch_data.keys() & {"preferred_lat", "preferred_lon"})
+    if moved:
+        db_user_params.station_id = station_index.station_for(
+            db_user_params.preferred_lat, db_user_params.preferred_lon
+        )
 
     session.add(db_user_params)
+    # Other workers evict their copies once this transaction commits.
+    await invalidation_bus.publish(session, USER_PARAMETERS, user_id)
     await session.commit()
     await session.refresh(db_user_params)
-    return db_user_params
+    # Write the committed row through so the next GET skips the database. It
+    # is authoritative, so drop the old entry rather than compare timestamps.
+    cache.invalidate(user_id)
+    cached = cache.put(db_user_params)
+    # The user's rendered forecast was evaluated against the old thresholds.
+    forecast_service.invalidate_user(user_id)
+    if moved:
+        digest_scheduler.move(
+            user_id, db_user_params.preferred_lat, db_user_params.preferred_lon
+        )
+    return JSONBytesResponse(content=cached.body, headers=cached.headers)
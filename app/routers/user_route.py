@@ -1,6 +1,12 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache.invalidation import (
+    USER_PARAMETERS,
+    InvalidationBus,
+    get_invalidation_bus,
+)
 from app.database.session import get_db_session
+from app.services.digest_scheduler import DigestScheduler, get_digest_scheduler
 from app.services.user_service import IUserService, get_user_service
 from app.models.user_model import UserCreate
 
@@ -12,11 +18,20 @@ async def create_user(
     user_data: UserCreate,
     user_service: IUserService = Depends(get_user_service),
     db_session: AsyncSession = Depends(get_db_session),
+    invalidation_bus: InvalidationBus = Depends(get_invalidation_bus),
+    digest_scheduler: DigestScheduler = Depends(get_digest_scheduler),
 ) -> None:
     """
     Create a new user and their default parameters.
     """
-    await user_service.add_user(user_data.username, user_data.email, user_data.password)
+    user = await user_service.add_user(
+        user_data.username, user_data.email, user_data.password
+    )
+    # Read before the commit expires the instance; a lazy load would fail.
+    user_id = user.id
+    # Lets the digest scheduler, wherever it runs, pick up the new user.
+    await invalidation_bus.publish(db_session, USER_PARAMETERS, user_id)
     # Commit the transaction after all operations are added to the session
     await db_session.commit()
+    digest_scheduler.invalidate(user_id)
     return None
@@ -7,6 +7,8 @@ import uuid
 from datetime import datetime, timedelta
 
 from app.models.user_model import Users
+from app.services.user_loader import get_user_lookup
+from app.services.user_service import IUserLookup
 
 # --- Configuration (keep these in a .env file) ---
 SECRET_KEY = "your-super-secret-key"
@@ -40,6 +42,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 # --- THE CORE DEPENDENCY ---
 async def get_current_user(
     token_wrapper: HTTPBearer = Depends(oauth2_scheme),
+    users: IUserLookup = Depends(get_user_lookup),
 ) -> Users | None:
     if token_wrapper is None:
         # No 'Authorization' header was provided at all
@@ -61,7 +64,7 @@ async def get_current_user(
         raise credentials_exception
 
     # Fetch the user from the database
-    user = await Users.get(uuid.UUID(token_data.sub))
+    user = await users.get_user_by_id(uuid.UUID(token_data.sub))
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,68 @@
+"""
+Fast response serialization.
+
+FastAPI's response_model path validates the returned object against the model
+and then serializes it generically. For rows we loaded ourselves that work is
+wasted, so hot routes serialize with the model's precompiled serializer
+straight to bytes and return a JSONBytesResponse instead.
+"""
+
+from functools import cache
+from typing import Any, Iterable
+
+import pydantic_core
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class JSONBytesResponse(Response):
+    """A JSON response whose body has already been encoded."""
+
+    media_type = "application/json"
+
+
+class RawJSON:
+    """A pre-encoded JSON fragment, e.g. a JSONB column read as text."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes | str):
+        self.data = data.encode() if isinstance(data, str) else data
+
+
+@cache
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    """Return a TypeAdapter for tp, building its serializer only once."""
+    return TypeAdapter(tp)
+
+
+def dump_model(model: BaseModel) -> bytes:
+    """
+    Serialize a model instance to JSON bytes without validating it first.
+
+    JSONB columns on table models hold plain dicts rather than nested models,
+    so serializer type warnings are disabled; the output is the same JSON.
+    """
+    return type(model).__pydantic_serializer__.to_json(model, warnings=False)
+
+
+def dump_as(tp: Any, value: Any) -> bytes:
+    """Serialize a value of type tp (e.g. list[UserParameter]) to JSON bytes."""
+    return get_type_adapter(tp).dump_json(value, warnings=False)
+
+
+def encode_object(fields: Iterable[tuple[str, Any]]) -> bytes:
+    """
+    Encode a JSON object from (name, value) pairs in order.
+
+    RawJSON values are spliced in as-is; everything else goes through
+    pydantic_core, so uuids and datetimes encode the same way models do.
+    """
+    parts = []
+    for name, value in fields:
+        if isinstance(value, RawJSON):
+            encoded = value.data
+        else:
+            encoded = pydantic_core.to_json(value)
+        parts.append(pydantic_core.to_json(name) + b":" + encoded)
+    return b"{" + b",".join(parts) + b"}"
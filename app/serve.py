@@ -0,0 +1,65 @@
+"""
+Production entry point.
+
+    python -m app.serve --workers 4
+
+Starts uvicorn with WEB_CONCURRENCY worker processes, using uvloop and
+httptools when they are installed (uvicorn[standard]) and the pure-Python
+asyncio loop and h11 parser otherwise. Each worker runs the app lifespan,
+including warm-up, before it starts accepting connections.
+
+On SIGTERM the supervisor forwards the signal to every worker; each stops
+accepting new connections, lets in-flight requests finish for up to
+GRACEFUL_SHUTDOWN_SECONDS, then runs lifespan shutdown and closes its pool.
+"""
+
+import argparse
+import importlib.util
+import os
+from typing import Any
+
+from app.config import settings
+
+APP = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def default_workers() -> int:
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def uvicorn_options(
+    workers: int | None = None, host: str | None = None, port: int | None = None
+) -> dict[str, Any]:
+    """Keyword arguments for uvicorn.run."""
+    return {
+        "host": host or settings.WEB_HOST,
+        "port": port or settings.WEB_PORT,
+        "workers": workers or default_workers(),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        # Startup must succeed: a worker only accepts traffic once warmed up.
+        "lifespan": "on",
+        "timeout_graceful_shutdown": settings.GRACEFUL_SHUTDOWN_SECONDS,
+        # Request counts and latencies are exported on /metrics instead.
+        "access_log": False,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with uvicorn.")
+    parser.add_argument("--workers", type=int, help="Default: WEB_CONCURRENCY.")
+    parser.add_argument("--host", help="Default: WEB_HOST.")
+    parser.add_argument("--port", type=int, help="Default: WEB_PORT.")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(APP, **uvicorn_options(args.workers, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Gridded allergen concentrations, memory-mapped from local disk.
+
+A grid file is a 64-byte header followed by one float32 field per allergen
+on a regular lat/lon grid:
+
+    header     magic, format version, allergen count, rows, columns,
+               first latitude, first longitude, latitude step, longitude
+               step (degrees), valid_at (unix µs)
+    float32    [len(ALLERGEN_NAMES), rows, columns]  grains/m³, NaN if unknown
+
+Row i is latitude lat0 + i * dlat and column j longitude lon0 + j * dlon.
+Readers map the file read-only, so sampling touches only the pages around
+the points asked for and every worker shares the page cache. Writers build a
+new file next to the old one and os.replace it in: readers holding the old
+mapping keep reading the old field, and AllergenGridStore moves to the new
+one on its next check.
+
+Ingest a dataset converted to .npz (1-D "lat" and "lon" axes plus one 2-D
+array per allergen name) with:
+
+    python -m app.services.allergen_grid field.npz --valid-at 2025-06-01T12:00Z
+"""
+
+import argparse
+import math
+import os
+import struct
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Mapping
+
+import numpy as np
+
+from app.config import settings
+from app.services.forecast_record import ALLERGEN_NAMES
+from app.services.grid import cell_centers
+
+MAGIC = b"WXAG"
+FORMAT_VERSION = 1
+
+# Padded to 64 bytes so the fields start cache-line aligned.
+_HEADER = struct.Struct("<4sHHIIddddq8x")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class GridSpec:
+    rows: int
+    columns: int
+    lat0: float
+    lon0: float
+    dlat: float
+    dlon: float
+
+    @property
+    def wraps(self) -> bool:
+        """Whether the columns go all the way round the globe."""
+        return abs(self.columns * self.dlon - 360.0) < 1e-6
+
+
+def write_allergen_grid(
+    path: str,
+    fields: Mapping[str, np.ndarray],
+    spec: GridSpec,
+    valid_at: datetime,
+) -> None:
+    """
+    Atomically replace the grid file at path.
+
+    fields maps allergen names to [rows, columns] arrays; allergens missing
+    from it are stored as NaN and unknown names are rejected.
+    """
+    unknown = set(fields) - set(ALLERGEN_NAMES)
+    if unknown:
+        raise ValueError(f"unknown allergens: {sorted(unknown)}")
+    data = np.full((len(ALLERGEN_NAMES), spec.rows, spec.columns), np.nan, "<f4")
+    for index, name in enumerate(ALLERGEN_NAMES):
+        if name in fields:
+            data[index] = fields[name]
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(ALLERGEN_NAMES),
+        spec.rows,
+        spec.columns,
+        spec.lat0,
+        spec.lon0,
+        spec.dlat,
+        spec.dlon,
+        (valid_at - _EPOCH) // timedelta(microseconds=1),
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".allergen-grid-")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            output.write(header)
+            output.write(data.tobytes())
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class AllergenGrid:
+    """A read-only mapping of one grid file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as source:
+            header = source.read(_HEADER.size)
+            stat = os.fstat(source.fileno())
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not an allergen grid")
+        magic, version, allergens, rows, columns, *geometry, valid_us = (
+            _HEADER.unpack(header)
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} allergen grid")
+        if allergens != len(ALLERGEN_NAMES):
+            raise ValueError(
+                f"{path} holds {allergens} allergens, expected {len(ALLERGEN_NAMES)}"
+            )
+        self.spec = GridSpec(rows, columns, *geometry)
+        self.valid_at = _EPOCH + timedelta(microseconds=valid_us)
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.fields = np.memmap(
+            path,
+            dtype="<f4",
+            mode="r",
+            offset=_HEADER.size,
+            shape=(allergens, rows, columns),
+        )
+
+    def sample(self, lats, lons) -> np.ndarray:
+        """
+        Bilinearly interpolate every allergen at every point in one pass.
+
+        Returns float32 [allergen, point]; NaN for points outside the grid.
+        """
+        spec = self.spec
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+
+        y = (lats - spec.lat0) / spec.dlat
+        x = (lons - spec.lon0) / spec.dlon
+        if spec.wraps:
+            x %= spec.columns
+            inside = (y >= 0) & (y <= spec.rows - 1)
+        else:
+            inside = (
+                (y >= 0) & (y <= spec.rows - 1) & (x >= 0) & (x <= spec.columns - 1)
+            )
+        # Points outside are sampled at the origin and masked afterwards.
+        y = np.where(inside, y, 0.0)
+        x = np.where(inside, x, 0.0)
+        # Clamp so the upper neighbour exists; the last row or column then
+        # interpolates with weight 1 on it.
+        y0 = np.clip(np.floor(y), 0, max(spec.rows - 2, 0)).astype(np.intp)
+        y1 = np.minimum(y0 + 1, spec.rows - 1)
+        if spec.wraps:
+            x0 = np.floor(x).astype(np.intp)
+            x1 = (x0 + 1) % spec.columns
+        else:
+            x0 = np.clip(np.floor(x), 0, max(spec.columns - 2, 0)).astype(np.intp)
+            x1 = np.minimum(x0 + 1, spec.columns - 1)
+        fy = (y - y0).astype(np.float32)
+        fx = (x - x0).astype(np.float32)
+
+        fields = self.fields
+        top = fields[:, y0, x0] * (1 - fx) + fields[:, y0, x1] * fx
+        bottom = fields[:, y1, x0] * (1 - fx) + fields[:, y1, x1] * fx
+        values = top * (1 - fy) + bottom * fy
+        values[:, ~inside] = np.nan
+        return values
+
+    def sample_cells(self, cell_ids) -> np.ndarray:
+        """Sample at the centers of forecast grid cells."""
+        return self.sample(*cell_centers(cell_ids))
+
+    def levels(self, lats, lons) -> list[dict[str, float]]:
+        """Per point, the allergens known there, as HourlyConditions.allergens."""
+        values = self.sample(lats, lons)
+        return [
+            {
+                name: round(float(value), 1)
+                for name, value in zip(ALLERGEN_NAMES, column)
+                if not math.isnan(value)
+            }
+            for column in values.T.tolist()
+        ]
+
+
+class AllergenGridStore:
+    """
+    The grid at a path, reopened when a writer swaps in a new file.
+
+    The path is stat'ed at most once per check_interval seconds, so current()
+    is cheap enough to call per request.
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._grid: AllergenGrid | None = None
+        self._checked_at = float("-inf")
+
+    def current(self) -> AllergenGrid | None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._grid
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._grid
+        if self._grid is None or self._grid.identity != (stat.st_dev, stat.st_ino):
+            self._grid = AllergenGrid(self.path)
+        return self._grid
+
+
+allergen_grids = AllergenGridStore(settings.ALLERGEN_GRID_PATH)
+
+
+def get_allergen_grids() -> AllergenGridStore:
+    """Dependency provider for the process-wide AllergenGridStore."""
+    return allergen_grids
+
+
+def ingest_npz(source: str, path: str, valid_at: datetime) -> GridSpec:
+    """Write the allergen fields of an .npz dataset as the grid file at path."""
+    with np.load(source) as dataset:
+        lats, lons = dataset["lat"], dataset["lon"]
+        if len(lats) < 2 or len(lons) < 2:
+            raise ValueError("a grid needs at least two latitudes and longitudes")
+        spec = GridSpec(
+            rows=len(lats),
+            columns=len(lons),
+            lat0=float(lats[0]),
+            lon0=float(lons[0]),
+            dlat=float(lats[1] - lats[0]),
+            dlon=float(lons[1] - lons[0]),
+        )
+        fields = {name: dataset[name] for name in ALLERGEN_NAMES if name in dataset}
+        write_allergen_grid(path, fields, spec, valid_at)
+    return spec
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", help=".npz file with lat, lon and allergen arrays")
+    parser.add_argument("--output", default=settings.ALLERGEN_GRID_PATH)
+    parser.add_argument(
+        "--valid-at",
+        type=datetime.fromisoformat,
+        default=None,
+        help="ISO time the field is valid at (default: now)",
+    )
+    args = parser.parse_args(argv)
+    if not args.output:
+        parser.error("set ALLERGEN_GRID_PATH or pass --output")
+    valid_at = args.valid_at or datetime.now(timezone.utc)
+    if valid_at.tzinfo is None:
+        valid_at = valid_at.replace(tzinfo=timezone.utc)
+    spec = ingest_npz(args.source, args.output, valid_at)
+    print(f"Wrote {spec.rows}x{spec.columns} allergen grid to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,22 @@
 from datetime import datetime, timedelta, timezone
+from functools import cache
 
-from typing import Annotated, List, Protocol
+from typing import TYPE_CHECKING, Annotated, List, Protocol
 import uuid
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from app.models.user_model import CustomRoles, Scope, Users
-from passlib.context import CryptContext
 import jwt
 
+from app.observability.metrics import ARGON2_DURATION, JWT_DECODE_DURATION
 from app.services.base import BaseService
 from ..config import settings
 
+if TYPE_CHECKING:
+    from argon2 import PasswordHasher
+
 scopes = {
     CustomRoles.ADMIN: [
         Scope.READ_UNPAID.name,
@@ -43,8 +45,18 @@ oauth2_scopes = {
     "admin": "Admin access",
 }
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-ph = PasswordHasher()
+
+@cache
+def get_password_hasher() -> "PasswordHasher":
+    """
+    Build the Argon2 hasher on first use.
+
+    argon2 is imported here rather than at module level so that importing the
+    app (and every worker cold start) does not pay for loading its C bindings.
+    """
+    from argon2 import PasswordHasher
+
+    return PasswordHasher()
 
 
 class Token(BaseModel):
@@ -69,8 +81,11 @@ class AuthMixin:
 
     @staticmethod
     def verify_argon2_password(plain_password, hashed_password) -> AuthVerification:
+        from argon2.exceptions import VerifyMismatchError
+
         try:
-            ph.verify(hashed_password, plain_password)
+            with ARGON2_DURATION.time("verify"):
+                get_password_hasher().verify(hashed_password, plain_password)
             return AuthVerification(success=True, message="Successfully verified")
         except VerifyMismatchError as e:
             return AuthVerification(success=False, message=str(e))
@@ -81,7 +96,8 @@ class AuthMixin:
 
     @staticmethod
     def get_password_hash(password) -> str:
-        return ph.hash(password)
+        with ARGON2_DURATION.time("hash"):
+            return get_password_hasher().hash(password)
 
     @staticmethod
     def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -146,9 +162,10 @@ async def decode_user_jwt(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
+        with JWT_DECODE_DURATION.time():
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
+            )
         if payload.get("sub") is None or payload.get("scopes") is None:
             # TODO add logging here.
             raise invalid_jwt_exception
@@ -1,6 +1,7 @@
 from typing import (
     Any,
     List,
+    Mapping,
     Sequence,
     Type,
 )
@@ -34,8 +35,10 @@ class BaseDataManager(SessionMixin):
     def add_all(self, models: Sequence[Any]) -> None:
         self.session.add_all(models)
 
-    async def get_one(self, select_stmt: Executable) -> Any:
-        return await self.session.scalar(select_stmt)
+    async def get_one(
+        self, select_stmt: Executable, params: Mapping[str, Any] | None = None
+    ) -> Any:
+        return await self.session.scalar(select_stmt, params)
 
     def get_all(self, select_stmt: Executable) -> List[Any]:
         return list(self.session.scalars(select_stmt).all())
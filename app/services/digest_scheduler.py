@@ -0,0 +1,284 @@
+"""
+Daily digests at each user's local morning, scheduled on a timing wheel.
+
+Rather than scanning user_parameters every minute for the users whose local
+time has reached DIGEST_LOCAL_MINUTE, every user sits in one slot of a wheel
+with a slot per minute of the UTC day: the minute their local digest time
+falls on. Each tick fires one slot, so the work per minute is the users due
+rather than all users, and moving a user is O(1). Offsets are whole hours, so
+every user in a zone would share a minute; each user is moved a stable
+user_id-derived number of minutes into a DIGEST_SPREAD_MINUTES window after it.
+
+One process in the deployment runs the wheel: the one holding a Postgres
+advisory lock on a dedicated connection. Other workers keep retrying, so when
+it dies Postgres releases the lock and another one takes over, rebuilding the
+wheel from the table. Parameter changes made in other workers arrive through
+the invalidation bus; those users are re-read on the next tick.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Hashable
+
+import asyncpg
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.observability.metrics import DIGESTS_DUE
+from app.services.forecast_service import forecast_service
+from app.services.timezones import MINUTES_PER_DAY, utc_minute_of_day
+from app.services.user_parameter_service import UserParameterDatamanager
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key of the process running the scheduler ("WXDG").
+SCHEDULER_LOCK_ID = 0x57584447
+# Users whose parameters are loaded at once when their digests fire.
+DIGEST_BATCH_SIZE = 1000
+# Longest stretch of digest evaluation between yields to the event loop, so
+# the worker leading the scheduler keeps serving requests.
+DIGEST_SLICE_SECONDS = 0.005
+
+DigestHandler = Callable[[AsyncSession, list[uuid.UUID]], Awaitable[None]]
+
+
+class TimingWheel:
+    """
+    One slot per minute of the UTC day, each an insertion-ordered set of keys.
+
+    Scheduling, moving and cancelling a key are O(1) and firing a slot is
+    O(keys in it). Digests recur daily, so keys stay put after firing.
+    """
+
+    def __init__(self, slot_count: int = MINUTES_PER_DAY):
+        self._slots: list[dict[Hashable, None]] = [{} for _ in range(slot_count)]
+        self._slot_of: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def slot_of(self, key: Hashable) -> int | None:
+        return self._slot_of.get(key)
+
+    def schedule(self, key: Hashable, slot: int) -> None:
+        """Put key in slot, moving it out of any slot it was in."""
+        current = self._slot_of.get(key)
+        if current == slot:
+            return
+        if current is not None:
+            del self._slots[current][key]
+        self._slots[slot][key] = None
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def due(self, slot: int) -> list:
+        return list(self._slots[slot])
+
+
+async def render_digests(session: AsyncSession, user_ids: list[uuid.UUID]) -> None:
+    """
+    Evaluate the due users' alerts against their cells' current forecasts.
+
+    There is no push channel in this service yet; this is where one goes.
+    """
+    data_manager = UserParameterDatamanager(session)
+    evaluated = with_alerts = alert_count = 0
+    slice_started = time.perf_counter()
+    for start in range(0, len(user_ids), DIGEST_BATCH_SIZE):
+        batch = user_ids[start : start + DIGEST_BATCH_SIZE]
+        for user_params in await data_manager.get_user_params_by_user_ids(batch):
+            alerts = forecast_service.alerts_for(user_params)
+            if alerts is not None:
+                evaluated += 1
+                with_alerts += bool(alerts)
+                alert_count += len(alerts)
+            if time.perf_counter() - slice_started > DIGEST_SLICE_SECONDS:
+                await asyncio.sleep(0)
+                slice_started = time.perf_counter()
+    logger.info(
+        "Digests due for %d users: %d evaluated, %d with alerts, %d alerts",
+        len(user_ids),
+        evaluated,
+        with_alerts,
+        alert_count,
+    )
+
+
+class DigestScheduler:
+    def __init__(
+        self,
+        handler: DigestHandler,
+        local_minute: int,
+        dsn: str,
+        retry_interval: float = 60.0,
+        spread: int = 1,
+    ):
+        self.handler = handler
+        self.local_minute = local_minute
+        # Minutes after local_minute that users are spread over.
+        self.spread = max(spread, 1)
+        self.dsn = dsn
+        self.retry_interval = retry_interval
+        self.wheel = TimingWheel()
+        self._dirty: set[uuid.UUID] = set()
+        # The wheel has to be rebuilt from user_parameters on the next tick.
+        self._stale = True
+        self._last_minute: int | None = None
+        self._lock_connection: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_connection is not None
+
+    def _delay(self, user_id: uuid.UUID) -> int:
+        # user_id is random, so this spreads users evenly and never changes.
+        return user_id.int % self.spread
+
+    def slot_for(self, user_id: uuid.UUID, lon: float) -> int:
+        minute = utc_minute_of_day(self.local_minute, lon) + self._delay(user_id)
+        return minute % MINUTES_PER_DAY
+
+    def move(self, user_id: uuid.UUID, lat: float, lon: float) -> None:
+        """Reschedule a user whose location changed in this process."""
+        if self.is_leader and not self._stale:
+            self.wheel.schedule(user_id, self.slot_for(user_id, lon))
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Re-read the user's location on the next tick (invalidation bus hook)."""
+        if self.is_leader:
+            self._dirty.add(user_id)
+
+    def clear(self) -> None:
+        """Rebuild the whole wheel on the next tick (invalidation bus hook)."""
+        self._stale = True
+
+    def _schedule_rows(self, rows) -> None:
+        if not rows:
+            return
+        user_ids, _, lons = zip(*rows)
+        delays = np.fromiter(map(self._delay, user_ids), np.int64, len(user_ids))
+        slots = utc_minute_of_day(self.local_minute, np.array(lons)) + delays
+        for user_id, slot in zip(user_ids, (slots % MINUTES_PER_DAY).tolist()):
+            self.wheel.schedule(user_id, slot)
+
+    async def sync(self, session: AsyncSession) -> None:
+        """Bring the wheel up to date with user_parameters."""
+        data_manager = UserParameterDatamanager(session)
+        if self._stale:
+            # Changes that land while the table is read are caught next tick.
+            self._stale = False
+            self._dirty.clear()
+            self.wheel = TimingWheel()
+            async for rows in data_manager.stream_user_locations():
+                self._schedule_rows(rows)
+        elif self._dirty:
+            user_ids, self._dirty = list(self._dirty), set()
+            found = set()
+            async for rows in data_manager.stream_user_locations(user_ids):
+                self._schedule_rows(rows)
+                found.update(row[0] for row in rows)
+            for user_id in user_ids:
+                if user_id not in found:
+                    self.wheel.cancel(user_id)
+
+    async def fire(self, session: AsyncSession, minute: int) -> None:
+        """Hand the users due at minute (since the epoch, UTC) to the handler."""
+        due = self.wheel.due(minute % MINUTES_PER_DAY)
+        if not due:
+            return
+        DIGESTS_DUE.inc(amount=len(due))
+        try:
+            await self.handler(session, due)
+        except Exception:
+            logger.exception("Digest handler failed for %d users", len(due))
+
+    async def tick(self, session: AsyncSession, minute: int) -> None:
+        """
+        Sync the wheel and fire every minute since the last tick, up to minute.
+
+        The first tick after taking over fires nothing: the previous leader
+        may already have fired that minute.
+        """
+        await self.sync(session)
+        if self._last_minute is not None:
+            first = max(self._last_minute + 1, minute - MINUTES_PER_DAY + 1)
+            for missed in range(first, minute + 1):
+                await self.fire(session, missed)
+        self._last_minute = minute
+
+    async def start(self, engine: AsyncEngine) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._run(engine), name="digest-scheduler"
+            )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._step_down()
+
+    async def _take_lead(self) -> bool:
+        connection = await asyncpg.connect(self.dsn)
+        if not await connection.fetchval(
+            "SELECT pg_try_advisory_lock($1)", SCHEDULER_LOCK_ID
+        ):
+            await connection.close()
+            return False
+        self._lock_connection = connection
+        self._stale = True
+        self._last_minute = None
+        logger.info("Digest scheduler running in this process")
+        return True
+
+    async def _step_down(self) -> None:
+        connection, self._lock_connection = self._lock_connection, None
+        self.wheel = TimingWheel()
+        self._dirty.clear()
+        if connection is not None:
+            # Closing the session releases the advisory lock.
+            await connection.close()
+
+    async def _run(self, engine: AsyncEngine) -> None:
+        while True:
+            try:
+                if await self._take_lead():
+                    while True:
+                        # Fails once the lock connection is gone, and with it
+                        # the lock: another process may be leading by now.
+                        await self._lock_connection.execute("SELECT 1")
+                        async with AsyncSession(engine) as session:
+                            await self.tick(session, int(time.time() // 60))
+                        await asyncio.sleep(60 - time.time() % 60)
+            except Exception:
+                logger.exception("Digest scheduler stopped, retrying")
+            await self._step_down()
+            await asyncio.sleep(self.retry_interval)
+
+
+digest_scheduler = DigestScheduler(
+    render_digests,
+    settings.DIGEST_LOCAL_MINUTE,
+    str(settings.ASYNCPG_DATABASE_URI),
+    spread=settings.DIGEST_SPREAD_MINUTES,
+)
+
+
+def get_digest_scheduler() -> DigestScheduler:
+    """Dependency provider for the process-wide DigestScheduler."""
+    return digest_scheduler
@@ -0,0 +1,230 @@
+"""
+Fixed-width binary encoding of a cell forecast.
+
+A record is a header followed by packed little-endian arrays covering a
+fixed horizon of FORECAST_HORIZON_HOURS consecutive hours:
+
+    header     magic, format version, horizon, hours used, allergen count,
+               cell id, issued_at (unix µs), first hour (unix s)
+    float32    [len(CONDITION_FIELDS), horizon]  temperature, wind, UV, ...
+    int16      [len(ALLERGEN_NAMES), horizon]    allergen index, -1 if absent
+
+Every record is RECORD_SIZE bytes whatever the forecast holds, so records fit
+the shared cache's fixed slots. ForecastRecord wraps any buffer (bytes, or a
+memoryview into the shared cache) and exposes the arrays as NumPy views
+without copying.
+
+float32 keeps about 7 significant digits, so values read back are rounded to
+VALUE_DECIMALS; 25.1 stays 25.1 rather than becoming 25.100000381469727.
+
+For change detection each value is also floored to a step of its
+ALERT_RESOLUTION. A threshold that is a multiple of the step is crossed only
+if the step changes, so forecasts that are equal at that resolution raise the
+same alerts for such thresholds; others can lag by less than one step, as can
+the values served.
+"""
+
+import hashlib
+import struct
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.models.constants import Allergens
+from app.models.forecast_model import CellForecast, HourlyConditions
+
+MAGIC = b"WXFR"
+FORMAT_VERSION = 1
+FORECAST_HORIZON_HOURS = 48
+VALUE_DECIMALS = 3
+MISSING_ALLERGEN = -1
+
+# Row order of the float32 block; names match HourlyConditions fields.
+CONDITION_FIELDS = (
+    "temperature",
+    "wind_speed",
+    "uv_index",
+    "rain_chance",
+    "aqi",
+    "pm10",
+    "pm2_5",
+)
+ALLERGEN_NAMES = tuple(a.value for a in Allergens if a is not Allergens.NONE)
+# Smallest step of each field that alert thresholds are set in.
+ALERT_RESOLUTION = {
+    "temperature": 0.5,
+    "wind_speed": 0.5,
+    "uv_index": 0.5,
+    "rain_chance": 0.05,
+    "aqi": 5.0,
+    "pm10": 1.0,
+    "pm2_5": 1.0,
+}
+ALLERGEN_ALERT_RESOLUTION = 5
+FIELD_ROWS = {name: row for row, name in enumerate(CONDITION_FIELDS)}
+ALLERGEN_ROWS = {name: row for row, name in enumerate(ALLERGEN_NAMES)}
+
+_HEADER = struct.Struct("<4sHHHHqqq4x")
+_CONDITIONS_OFFSET = _HEADER.size
+_ALLERGENS_OFFSET = (
+    _CONDITIONS_OFFSET + len(CONDITION_FIELDS) * FORECAST_HORIZON_HOURS * 4
+)
+RECORD_SIZE = _ALLERGENS_OFFSET + len(ALLERGEN_NAMES) * FORECAST_HORIZON_HOURS * 2
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_HOUR = timedelta(hours=1)
+
+# Resolutions in units of 10**-VALUE_DECIMALS, so quantizing is integer math
+# and 0.3 // 0.05 is 6 rather than 5.
+_SCALE = 10**VALUE_DECIMALS
+_CONDITION_STEPS = np.array(
+    [round(ALERT_RESOLUTION[name] * _SCALE) for name in CONDITION_FIELDS],
+    dtype=np.int64,
+)[:, None]
+
+
+def _timestamp_us(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def encode_forecast(forecast: CellForecast) -> bytes:
+    """
+    Pack a CellForecast into a RECORD_SIZE record.
+
+    Hours must be consecutive; hours past the horizon are dropped, as are
+    allergens not in ALLERGEN_NAMES. Allergen indices are clipped to int16.
+    """
+    hours = forecast.hours[:FORECAST_HORIZON_HOURS]
+    for previous, hour in zip(hours, hours[1:]):
+        if hour.time - previous.time != _HOUR:
+            raise ValueError("forecast hours must be consecutive")
+    first_hour = _timestamp_us(hours[0].time) // 1_000_000 if hours else 0
+
+    conditions = np.full(
+        (len(CONDITION_FIELDS), FORECAST_HORIZON_HOURS), np.nan, dtype="<f4"
+    )
+    allergens = np.full(
+        (len(ALLERGEN_NAMES), FORECAST_HORIZON_HOURS), MISSING_ALLERGEN, dtype="<i2"
+    )
+    for column, hour in enumerate(hours):
+        for row, name in enumerate(CONDITION_FIELDS):
+            conditions[row, column] = getattr(hour, name)
+        for name, value in hour.allergens.items():
+            row = ALLERGEN_ROWS.get(name)
+            if row is not None:
+                allergens[row, column] = min(max(round(value), 0), 32767)
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        FORECAST_HORIZON_HOURS,
+        len(hours),
+        len(ALLERGEN_NAMES),
+        forecast.cell_id,
+        _timestamp_us(forecast.issued_at),
+        first_hour,
+    )
+    return header + conditions.tobytes() + allergens.tobytes()
+
+
+class ForecastRecord:
+    """Read-only view over an encoded record; arrays share the buffer's memory."""
+
+    __slots__ = ("cell_id", "hours", "_issued_us", "_first_hour", "_buffer")
+
+    def __init__(self, buffer: bytes | memoryview):
+        if len(buffer) < RECORD_SIZE:
+            raise ValueError("buffer is smaller than a forecast record")
+        magic, version, horizon, hours, allergens, cell_id, issued_us, first = (
+            _HEADER.unpack_from(buffer)
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a version {FORMAT_VERSION} forecast record")
+        if horizon != FORECAST_HORIZON_HOURS or allergens != len(ALLERGEN_NAMES):
+            raise ValueError("forecast record layout does not match this build")
+        self.cell_id = cell_id
+        self.hours = hours
+        self._issued_us = issued_us
+        self._first_hour = first
+        self._buffer = buffer
+
+    @property
+    def issued_at(self) -> datetime:
+        return _EPOCH + timedelta(microseconds=self._issued_us)
+
+    def times(self) -> list[datetime]:
+        first = _EPOCH + timedelta(seconds=self._first_hour)
+        return [first + hour * _HOUR for hour in range(self.hours)]
+
+    def timestamps(self) -> np.ndarray:
+        """Start of each hour in unix seconds."""
+        return self._first_hour + 3600 * np.arange(self.hours, dtype=np.int64)
+
+    def conditions(self) -> np.ndarray:
+        """float32 [field, hour] view of the hours in use, without copying."""
+        block = np.frombuffer(
+            self._buffer,
+            dtype="<f4",
+            count=len(CONDITION_FIELDS) * FORECAST_HORIZON_HOURS,
+            offset=_CONDITIONS_OFFSET,
+        ).reshape(len(CONDITION_FIELDS), FORECAST_HORIZON_HOURS)
+        return block[:, : self.hours]
+
+    def allergens(self) -> np.ndarray:
+        """int16 [allergen, hour] view of the hours in use, without copying."""
+        block = np.frombuffer(
+            self._buffer,
+            dtype="<i2",
+            count=len(ALLERGEN_NAMES) * FORECAST_HORIZON_HOURS,
+            offset=_ALLERGENS_OFFSET,
+        ).reshape(len(ALLERGEN_NAMES), FORECAST_HORIZON_HOURS)
+        return block[:, : self.hours]
+
+    def values(self) -> np.ndarray:
+        """float64 [field, hour] copy of the conditions, rounded for output."""
+        return np.round(self.conditions().astype(np.float64), VALUE_DECIMALS)
+
+    def to_cell_forecast(self) -> CellForecast:
+        values = self.values().T.tolist()
+        allergens = self.allergens().T.tolist()
+        return CellForecast(
+            cell_id=self.cell_id,
+            issued_at=self.issued_at,
+            hours=[
+                HourlyConditions(
+                    time=time,
+                    **dict(zip(CONDITION_FIELDS, row)),
+                    allergens={
+                        name: float(level)
+                        for name, level in zip(ALLERGEN_NAMES, levels)
+                        if level != MISSING_ALLERGEN
+                    },
+                )
+                for time, row, levels in zip(self.times(), values, allergens)
+            ],
+        )
+
+
+def _quantized_hours(record: ForecastRecord) -> np.ndarray:
+    """int32 [hour, 1 + metric]: hours since the epoch, then every value in steps."""
+    scaled = np.rint(record.conditions().astype(np.float64) * _SCALE).astype(np.int64)
+    # Floor division keeps MISSING_ALLERGEN (-1) apart from levels 0..step-1.
+    levels = record.allergens() // ALLERGEN_ALERT_RESOLUTION
+    hours = record.timestamps() // 3600
+    return np.vstack((hours, scaled // _CONDITION_STEPS, levels)).T.astype(np.int32)
+
+
+def hour_keys(record: ForecastRecord) -> list[bytes]:
+    """One key per hour, equal for the same hour with equal quantized values."""
+    return [row.tobytes() for row in _quantized_hours(record)]
+
+
+def fingerprint(record: ForecastRecord) -> bytes:
+    """
+    Digest of the quantized hours; equal forecasts raise the same alerts.
+    The header is left out, so a refresh that only re-issues the same weather
+    under a new issued_at matches.
+    """
+    return hashlib.blake2b(_quantized_hours(record).tobytes(), digest_size=16).digest()
@@ -0,0 +1,494 @@
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Sequence, TypeVar
+
+import numpy as np
+
+from app.cache.etag import make_strong_etag
+from app.cache.lru import LRUCache
+from app.cache.shared_forecast import SharedForecastCache
+from app.config import settings
+from app.models.forecast_model import (
+    AnnotatedHour,
+    CellForecast,
+    HourlyConditions,
+    ThresholdAlert,
+    UserForecast,
+)
+from app.models.user_parameter_model import UserIndividualParameter, UserParameter
+from app.observability.metrics import FORECAST_PUBLISHES
+from app.serialization import RawJSON, dump_model, encode_object
+from app.services.forecast_record import (
+    ALLERGEN_NAMES,
+    ALLERGEN_ROWS,
+    CONDITION_FIELDS,
+    FIELD_ROWS,
+    MISSING_ALLERGEN,
+    RECORD_SIZE,
+    ForecastRecord,
+    encode_forecast,
+    fingerprint,
+    hour_keys,
+)
+from app.services.grid import cell_center, cell_id_for
+from app.services.solar import sun_is_up
+
+T = TypeVar("T")
+
+# Allergen concentration (grains/m³) that triggers an alert when the user has
+# not set an explicit parameter_value on their allergens parameter.
+DEFAULT_ALLERGEN_ALERT_LEVEL = 50.0
+
+# Maps each numeric threshold parameter to the forecast field it is checked against.
+THRESHOLD_FIELDS = {
+    "uv_index_threshold": "uv_index",
+    "aqi_threshold": "aqi",
+    "wind_speed_threshold": "wind_speed",
+    "rain_chance_threshold": "rain_chance",
+    "pm10_threshold": "pm10",
+    "pm2_5_threshold": "pm2_5",
+}
+# Forecast fields that only raise alerts while the sun is up in the cell; a UV
+# index reported at night is noise and is not worth comparing.
+DAYLIGHT_FIELDS = frozenset({"uv_index"})
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedForecast:
+    """A serialized personalized forecast, ready to be written to the wire."""
+
+    cell_id: int
+    forecast_version: int
+    body: bytes
+    etag: str
+    # The user's thresholds it was rendered against; see thresholds_of.
+    thresholds: tuple
+    # Serialized hours keyed by hour_keys, reused by the next render of the
+    # cell against the same thresholds.
+    hours: dict[bytes, bytes]
+
+
+class IForecastStore(ABC):
+    """
+    Holds the latest forecast per grid cell.
+
+    Every publish bumps the cell's version, which is what personalized results
+    are validated against.
+    """
+
+    @abstractmethod
+    def publish(self, cell_id: int, record: bytes) -> int:
+        """Store an encoded record and return the cell's new version."""
+
+    @abstractmethod
+    def read(
+        self, cell_id: int, use: Callable[[ForecastRecord], T]
+    ) -> tuple[int, T] | None:
+        """Call use on the cell's record and return (version, result)."""
+
+    @abstractmethod
+    def version(self, cell_id: int) -> int | None:
+        pass
+
+
+class ForecastStore(IForecastStore):
+    """In-process forecast store, private to one worker, holding encoded records."""
+
+    def __init__(self) -> None:
+        self._forecasts: dict[int, tuple[int, bytes]] = {}
+        self._next_version = 1
+
+    def publish(self, cell_id: int, record: bytes) -> int:
+        version = self._next_version
+        self._next_version += 1
+        self._forecasts[cell_id] = (version, record)
+        return version
+
+    def read(
+        self, cell_id: int, use: Callable[[ForecastRecord], T]
+    ) -> tuple[int, T] | None:
+        entry = self._forecasts.get(cell_id)
+        if entry is None:
+            return None
+        version, record = entry
+        return version, use(ForecastRecord(record))
+
+    def version(self, cell_id: int) -> int | None:
+        entry = self._forecasts.get(cell_id)
+        return entry[0] if entry else None
+
+
+class SharedForecastStore(IForecastStore):
+    """
+    Forecast store backed by the node-wide SharedForecastCache, so a forecast
+    published by any worker is visible to all of them without a copy each.
+    Records are read in place; use runs again if a writer raced it.
+    """
+
+    def __init__(self, cache: SharedForecastCache):
+        self.cache = cache
+
+    def publish(self, cell_id: int, record: bytes) -> int:
+        return self.cache.put(cell_id, record)
+
+    def read(
+        self, cell_id: int, use: Callable[[ForecastRecord], T]
+    ) -> tuple[int, T] | None:
+        return self.cache.read(cell_id, lambda view: use(ForecastRecord(view)))
+
+    def version(self, cell_id: int) -> int | None:
+        return self.cache.version(cell_id)
+
+
+def _as_parameter(value: Any) -> UserIndividualParameter | None:
+    # JSONB columns come back from Postgres as plain dicts.
+    if value is None or isinstance(value, UserIndividualParameter):
+        return value
+    return UserIndividualParameter.model_validate(value)
+
+
+def thresholds_of(user_params: UserParameter) -> tuple:
+    """Every parameter alerts depend on, comparable across renders."""
+    return tuple(
+        _as_parameter(getattr(user_params, name))
+        for name in (*THRESHOLD_FIELDS, "allergens")
+    )
+
+
+def evaluate_hour(
+    hour: HourlyConditions, user_params: UserParameter, sun_up: bool = True
+) -> list[ThresholdAlert]:
+    """Return the alerts raised by one forecast hour for a user's thresholds."""
+    alerts = []
+    for parameter_name, field in THRESHOLD_FIELDS.items():
+        parameter = _as_parameter(getattr(user_params, parameter_name))
+        if (
+            parameter is None
+            or parameter.importance == 0
+            or parameter.parameter_value is None
+            or (field in DAYLIGHT_FIELDS and not sun_up)
+        ):
+            continue
+        value = getattr(hour, field)
+        if value >= parameter.parameter_value:
+            alerts.append(
+                ThresholdAlert(
+                    parameter_name=parameter_name,
+                    importance=parameter.importance,
+                    threshold=parameter.parameter_value,
+                    value=value,
+                )
+            )
+
+    allergens = _as_parameter(user_params.allergens)
+    if allergens and allergens.importance and allergens.parameter_array_value:
+        level = (
+            allergens.parameter_value
+            if allergens.parameter_value is not None
+            else DEFAULT_ALLERGEN_ALERT_LEVEL
+        )
+        for allergen in allergens.parameter_array_value:
+            value = hour.allergens.get(allergen)
+            if value is not None and value >= level:
+                alerts.append(
+                    ThresholdAlert(
+                        parameter_name="allergens",
+                        importance=allergens.importance,
+                        threshold=level,
+                        value=value,
+                        allergen=allergen,
+                    )
+                )
+    return alerts
+
+
+def evaluate_forecast(
+    forecast: CellForecast, user_params: UserParameter
+) -> UserForecast:
+    """
+    Annotate every hour of a cell forecast against a user's thresholds.
+
+    Scalar reference for evaluate_record, which is what serving uses.
+    """
+    lat, lon = cell_center(forecast.cell_id)
+    daylight = sun_is_up(lat, lon, [hour.time.timestamp() for hour in forecast.hours])
+    return UserForecast(
+        user_id=user_params.user_id,
+        cell_id=forecast.cell_id,
+        issued_at=forecast.issued_at,
+        hours=[
+            AnnotatedHour(
+                **hour.model_dump(),
+                alerts=evaluate_hour(hour, user_params, bool(sun_up)),
+            )
+            for hour, sun_up in zip(forecast.hours, daylight)
+        ],
+    )
+
+
+def hour_alerts(
+    record: ForecastRecord,
+    user_params: UserParameter,
+    hours: Sequence[int] | None = None,
+) -> list[list[ThresholdAlert]]:
+    """
+    The alerts each of the given hours of an encoded forecast (all by default)
+    raises against a user's thresholds.
+
+    Each threshold is compared against all those hours at once; alerts come out
+    in the same order as evaluate_hour produces them. Thresholds on
+    DAYLIGHT_FIELDS are only compared for hours when the sun is up.
+    """
+    values = record.values()
+    levels = record.allergens()
+    timestamps = record.timestamps()
+    if hours is not None:
+        values = values[:, hours]
+        levels = levels[:, hours]
+        timestamps = timestamps[hours]
+    alerts: list[list[ThresholdAlert]] = [[] for _ in timestamps]
+    daylight = None
+
+    for parameter_name, field in THRESHOLD_FIELDS.items():
+        parameter = _as_parameter(getattr(user_params, parameter_name))
+        if (
+            parameter is None
+            or parameter.importance == 0
+            or parameter.parameter_value is None
+        ):
+            continue
+        row = values[FIELD_ROWS[field]]
+        crossed = row >= parameter.parameter_value
+        if field in DAYLIGHT_FIELDS:
+            if daylight is None:
+                daylight = sun_is_up(*cell_center(record.cell_id), timestamps)
+            crossed &= daylight
+        for hour in np.flatnonzero(crossed).tolist():
+            alerts[hour].append(
+                ThresholdAlert(
+                    parameter_name=parameter_name,
+                    importance=parameter.importance,
+                    threshold=parameter.parameter_value,
+                    value=float(row[hour]),
+                )
+            )
+
+    allergens = _as_parameter(user_params.allergens)
+    if allergens and allergens.importance and allergens.parameter_array_value:
+        level = (
+            allergens.parameter_value
+            if allergens.parameter_value is not None
+            else DEFAULT_ALLERGEN_ALERT_LEVEL
+        )
+        for allergen in allergens.parameter_array_value:
+            row_index = ALLERGEN_ROWS.get(allergen)
+            if row_index is None:
+                continue
+            row = levels[row_index]
+            crossed = (row != MISSING_ALLERGEN) & (row >= level)
+            for hour in np.flatnonzero(crossed).tolist():
+                alerts[hour].append(
+                    ThresholdAlert(
+                        parameter_name="allergens",
+                        importance=allergens.importance,
+                        threshold=level,
+                        value=float(row[hour]),
+                        allergen=allergen,
+                    )
+                )
+    return alerts
+
+
+def annotate_hours(
+    record: ForecastRecord,
+    user_params: UserParameter,
+    hours: Sequence[int] | None = None,
+) -> list[AnnotatedHour]:
+    """
+    Annotate the given hours of an encoded forecast (all by default) with the
+    alerts hour_alerts finds for them.
+    """
+    values = record.values()
+    levels = record.allergens()
+    times = record.times()
+    if hours is not None:
+        values = values[:, hours]
+        levels = levels[:, hours]
+        times = [times[hour] for hour in hours]
+    annotated = []
+    for time, row, hour_levels, alerts in zip(
+        times,
+        values.T.tolist(),
+        levels.T.tolist(),
+        hour_alerts(record, user_params, hours),
+    ):
+        annotated.append(
+            AnnotatedHour(
+                time=time,
+                **dict(zip(CONDITION_FIELDS, row)),
+                allergens={
+                    name: float(value)
+                    for name, value in zip(ALLERGEN_NAMES, hour_levels)
+                    if value != MISSING_ALLERGEN
+                },
+                alerts=alerts,
+            )
+        )
+    return annotated
+
+
+def evaluate_record(record: ForecastRecord, user_params: UserParameter) -> UserForecast:
+    """Annotate every hour of an encoded forecast against a user's thresholds."""
+    return UserForecast(
+        user_id=user_params.user_id,
+        cell_id=record.cell_id,
+        issued_at=record.issued_at,
+        hours=annotate_hours(record, user_params),
+    )
+
+
+def render_record(
+    record: ForecastRecord,
+    user_params: UserParameter,
+    reuse: Mapping[bytes, bytes],
+) -> tuple[bytes, dict[bytes, bytes]]:
+    """
+    Serialize a user's forecast as dump_model(evaluate_record(...)) would.
+
+    Hours whose key is in reuse (serialized from an earlier record against the
+    same thresholds, with every metric equal at alert resolution) are spliced
+    in as they are; only hours with a metric that moved a step are evaluated.
+    Returns the body and the serialized hours by key.
+    """
+    keys = hour_keys(record)
+    changed = [hour for hour, key in enumerate(keys) if key not in reuse]
+    annotated = dict(zip(changed, annotate_hours(record, user_params, changed)))
+    fragments = {
+        key: dump_model(annotated[hour]) if hour in annotated else reuse[key]
+        for hour, key in enumerate(keys)
+    }
+    body = encode_object(
+        [
+            ("user_id", user_params.user_id),
+            ("cell_id", record.cell_id),
+            ("issued_at", record.issued_at),
+            ("hours", RawJSON(b"[" + b",".join(fragments.values()) + b"]")),
+        ]
+    )
+    return body, fragments
+
+
+class IForecastService(ABC):
+    @abstractmethod
+    def get_cached(self, user_id: uuid.UUID) -> RenderedForecast | None:
+        pass
+
+    @abstractmethod
+    def render_for(self, user_params: UserParameter) -> RenderedForecast | None:
+        pass
+
+
+class ForecastService(IForecastService):
+    def __init__(self, store: IForecastStore, results: LRUCache):
+        self.store = store
+        self.results = results
+
+    def publish_forecast(self, forecast: CellForecast) -> int:
+        """
+        Replace a cell's forecast; results rendered from the old one go stale.
+
+        A forecast with the same fingerprint as the current one is dropped and
+        the cell keeps its version, so nobody in the cell is re-evaluated.
+        """
+        record = encode_forecast(forecast)
+        current = self.store.read(forecast.cell_id, fingerprint)
+        if current is not None and current[1] == fingerprint(ForecastRecord(record)):
+            FORECAST_PUBLISHES.inc("unchanged")
+            return current[0]
+        FORECAST_PUBLISHES.inc("changed")
+        return self.store.publish(forecast.cell_id, record)
+
+    def get_cached(self, user_id: uuid.UUID) -> RenderedForecast | None:
+        """Return the user's rendered forecast if it is still current."""
+        rendered = self.results.get(user_id)
+        if rendered is None:
+            return None
+        # A stale result stays cached: render_for reuses its unchanged hours.
+        if self.store.version(rendered.cell_id) != rendered.forecast_version:
+            return None
+        return rendered
+
+    def render_for(self, user_params: UserParameter) -> RenderedForecast | None:
+        """Evaluate and cache the user's forecast, or None if the cell has none yet."""
+        cell_id = cell_id_for(user_params.preferred_lat, user_params.preferred_lon)
+        thresholds = thresholds_of(user_params)
+        previous = self.results.get(user_params.user_id)
+        reuse = (
+            previous.hours
+            if previous
+            and previous.cell_id == cell_id
+            and previous.thresholds == thresholds
+            else {}
+        )
+        entry = self.store.read(
+            cell_id, lambda record: render_record(record, user_params, reuse)
+        )
+        if entry is None:
+            return None
+        version, (body, hours) = entry
+        rendered = RenderedForecast(
+            cell_id=cell_id,
+            forecast_version=version,
+            body=body,
+            etag=make_strong_etag(body),
+            thresholds=thresholds,
+            hours=hours,
+        )
+        self.results.put(user_params.user_id, rendered)
+        return rendered
+
+    def alerts_for(self, user_params: UserParameter) -> list[ThresholdAlert] | None:
+        """
+        Every alert the user's cell forecast raises, or None if the cell has
+        none yet. Nothing is serialized or cached.
+        """
+        cell_id = cell_id_for(user_params.preferred_lat, user_params.preferred_lon)
+        entry = self.store.read(
+            cell_id,
+            lambda record: [
+                alert for hour in hour_alerts(record, user_params) for alert in hour
+            ],
+        )
+        return None if entry is None else entry[1]
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """Drop a user's rendered forecast, e.g. after their thresholds change."""
+        self.results.invalidate(user_id)
+
+
+forecast_service = ForecastService(
+    ForecastStore(), LRUCache(settings.FORECAST_RESULT_CACHE_SIZE)
+)
+
+
+def open_shared_forecasts() -> SharedForecastCache | None:
+    """
+    Move forecast_service onto the node-wide cache at
+    SHARED_FORECAST_CACHE_PATH, if set, and return it for the caller to close.
+    Called from the lifespan: it creates or maps the file.
+    """
+    if not settings.SHARED_FORECAST_CACHE_PATH:
+        return None
+    cache = SharedForecastCache(
+        settings.SHARED_FORECAST_CACHE_PATH,
+        settings.SHARED_FORECAST_SLOTS,
+        RECORD_SIZE,
+    )
+    forecast_service.store = SharedForecastStore(cache)
+    return cache
+
+
+def get_forecast_service() -> ForecastService:
+    """Dependency provider for the process-wide ForecastService."""
+    return forecast_service
@@ -0,0 +1,319 @@
+"""
+Offline place-name search from a memory-mapped gazetteer index.
+
+Place names are normalized (accents stripped, case folded, punctuation
+collapsed to spaces) and every word start of a name becomes a key, so "paulo"
+finds São Paulo as well as "sao". The keys are sorted into one blob, and the
+places whose keys start with a prefix are a contiguous run of it, found by
+binary search.
+
+Completions are ranked by population. For a run of up to HOT_RANGE keys the
+run is ranked at query time. Longer runs, the ones short prefixes like "s"
+produce, have their top TOP_K places stored in the file at build time, keyed
+by the run's bounds.
+
+The index file is laid out as:
+
+    header     magic, format version, top_k, places, keys, hot runs,
+               key blob size, name blob size
+    u4         [keys + 1]     key offsets into the key blob
+    u4         [keys]         place of each key
+    u4         [places + 1]   name offsets into the name blob
+    f4, f4     [places]       latitude, longitude
+    u4         [places]       population
+    S2         [places]       ISO 3166 country code
+    u8         [hot runs]     first key * (keys + 1) + end key, sorted
+    i4         [hot runs, top_k]  ranked places, -1 padded
+    bytes                     key blob, then name blob (UTF-8)
+
+Sections start 8-byte aligned. Build one from a name,country,lat,lon,
+population CSV (e.g. converted from GeoNames) with:
+
+    python -m app.services.gazetteer places.csv places.idx
+"""
+
+import argparse
+import bisect
+import csv
+import hashlib
+import mmap
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.models.location_model import Location
+
+BUNDLED_GAZETTEER = Path(__file__).resolve().parent.parent / "data" / "places.csv"
+
+MAGIC = b"WXGZ"
+FORMAT_VERSION = 1
+# Completions stored per hot run; the most a query can ask for.
+TOP_K = 10
+# Runs longer than this get their completions precomputed.
+HOT_RANGE = 256
+
+_HEADER = struct.Struct("<4sHHIIIII4x")
+_NON_WORD = re.compile(r"[^\w]+")
+# Sorts after every UTF-8 byte, so prefix + _BEYOND bounds the prefix's run.
+_BEYOND = b"\xff"
+
+
+def normalize(text: str) -> str:
+    """Fold text the way keys are folded: no accents, lower case, single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", stripped.casefold()).strip()
+
+
+def read_places(path: str | os.PathLike) -> list[Location]:
+    """Read a name,country,lat,lon,population CSV."""
+    with open(path, newline="", encoding="utf-8") as source:
+        return [Location.model_validate(row) for row in csv.DictReader(source)]
+
+
+def _word_starts(name: str) -> list[str]:
+    """The normalized name from each word on, e.g. "new york" and "york"."""
+    words = normalize(name).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _sections(top_k: int, places: int, keys: int, hot: int, key_bytes: int):
+    """(name, dtype, shape, offset) of each section, then where the blobs start."""
+    layout = [
+        ("key_offsets", "<u4", (keys + 1,)),
+        ("key_places", "<u4", (keys,)),
+        ("name_offsets", "<u4", (places + 1,)),
+        ("lats", "<f4", (places,)),
+        ("lons", "<f4", (places,)),
+        ("populations", "<u4", (places,)),
+        ("countries", "S2", (places,)),
+        ("hot_runs", "<u8", (hot,)),
+        ("hot_top", "<i4", (hot, top_k)),
+    ]
+    sections = []
+    offset = _HEADER.size
+    for name, dtype, shape in layout:
+        offset = _aligned(offset)
+        sections.append((name, dtype, shape, offset))
+        offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+    return sections, offset, offset + key_bytes
+
+
+def _rank(places: np.ndarray, populations: np.ndarray, limit: int) -> np.ndarray:
+    """Distinct places by population, most populous first, ties in file order."""
+    places = np.unique(places)
+    order = np.argsort(-populations[places].astype(np.int64), kind="stable")
+    return places[order[:limit]]
+
+
+def build_gazetteer(
+    places: list[Location], path: str | os.PathLike, top_k: int = TOP_K
+) -> None:
+    """Atomically replace the index file at path with one over places."""
+    keys = sorted(
+        (key.encode(), index)
+        for index, place in enumerate(places)
+        for key in _word_starts(place.name)
+    )
+    key_blob = b"".join(key for key, _ in keys)
+    names = [place.name.encode() for place in places]
+    populations = np.array([place.population for place in places], dtype="<u4")
+    key_places = np.array([index for _, index in keys], dtype="<u4")
+
+    # Every prefix of every key whose run is too long to rank per query.
+    # Prefixes sharing a run share its completions, so runs are stored once.
+    hot: dict[int, np.ndarray] = {}
+    sorted_keys = [key for key, _ in keys]
+    length = 1
+    while True:
+        runs = {}
+        for position, key in enumerate(sorted_keys):
+            if len(key) >= length:
+                runs.setdefault(key[:length], [position, position])[1] = position + 1
+        long_runs = [run for run in runs.values() if run[1] - run[0] > HOT_RANGE]
+        if not long_runs:
+            break
+        for start, end in long_runs:
+            top = np.full(top_k, -1, dtype="<i4")
+            ranked = _rank(key_places[start:end], populations, top_k)
+            top[: len(ranked)] = ranked
+            hot[start * (len(keys) + 1) + end] = top
+        length += 1
+
+    hot_runs = np.array(sorted(hot), dtype="<u8")
+    columns = {
+        "key_offsets": np.cumsum([0] + [len(key) for key in sorted_keys]),
+        "key_places": key_places,
+        "name_offsets": np.cumsum([0] + [len(name) for name in names]),
+        "lats": [place.lat for place in places],
+        "lons": [place.lon for place in places],
+        "populations": populations,
+        "countries": [place.country.encode() for place in places],
+        "hot_runs": hot_runs,
+        "hot_top": np.array([hot[run] for run in hot_runs.tolist()]).reshape(
+            len(hot), top_k
+        ),
+    }
+    sections, blobs_at, _ = _sections(
+        top_k, len(places), len(keys), len(hot), len(key_blob)
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".gazetteer-")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            output.write(
+                _HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    top_k,
+                    len(places),
+                    len(keys),
+                    len(hot),
+                    len(key_blob),
+                    sum(map(len, names)),
+                )
+            )
+            for name, dtype, shape, offset in sections:
+                output.write(b"\0" * (offset - output.tell()))
+                output.write(np.asarray(columns[name], dtype=dtype).tobytes())
+            output.write(b"\0" * (blobs_at - output.tell()))
+            output.write(key_blob)
+            output.write(b"".join(names))
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class Gazetteer:
+    """A read-only mapping of one index file."""
+
+    def __init__(self, path: str | os.PathLike):
+        with open(path, "rb") as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._map[: _HEADER.size]
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a gazetteer index")
+        magic, version, top_k, places, keys, hot, key_bytes, name_bytes = (
+            _HEADER.unpack(header)
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} gazetteer")
+        sections, blobs_at, names_at = _sections(top_k, places, keys, hot, key_bytes)
+        if len(self._map) != names_at + name_bytes:
+            raise ValueError(f"{path} is truncated")
+        for name, dtype, shape, offset in sections:
+            count = int(np.prod(shape))
+            array = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+            setattr(self, f"_{name}", array.reshape(shape))
+        self.top_k = top_k
+        self._keys_at = blobs_at
+        self._names_at = names_at
+        self._key_count = keys
+
+    def __len__(self) -> int:
+        return len(self._populations)
+
+    def _key(self, index: int) -> bytes:
+        start, end = self._key_offsets[index : index + 2].tolist()
+        return self._map[self._keys_at + start : self._keys_at + end]
+
+    def _run(self, prefix: bytes) -> tuple[int, int]:
+        """The keys starting with prefix, as [start, end)."""
+        keys = range(self._key_count)
+        start = bisect.bisect_left(keys, prefix, key=self._key)
+        end = bisect.bisect_left(keys, prefix + _BEYOND, lo=start, key=self._key)
+        return start, end
+
+    def place(self, index: int) -> Location:
+        start, end = self._name_offsets[index : index + 2].tolist()
+        return Location.model_construct(
+            name=self._map[self._names_at + start : self._names_at + end].decode(),
+            country=self._countries[index].decode(),
+            lat=round(float(self._lats[index]), 4),
+            lon=round(float(self._lons[index]), 4),
+            population=int(self._populations[index]),
+        )
+
+    def complete(self, query: str, limit: int = TOP_K) -> list[Location]:
+        """The most populous places with a word starting with query."""
+        prefix = normalize(query).encode()
+        limit = min(limit, self.top_k)
+        if not prefix or limit <= 0:
+            return []
+        start, end = self._run(prefix)
+        if end - start > HOT_RANGE:
+            row = np.searchsorted(self._hot_runs, start * (self._key_count + 1) + end)
+            ranked = self._hot_top[row, :limit]
+            ranked = ranked[ranked >= 0]
+        else:
+            ranked = _rank(self._key_places[start:end], self._populations, limit)
+        return [self.place(index) for index in ranked.tolist()]
+
+
+def _bundled_index_path() -> str:
+    """Where the index over the bundled CSV is built, named by its content."""
+    digest = hashlib.sha1(BUNDLED_GAZETTEER.read_bytes()).hexdigest()[:12]
+    return os.path.join(
+        tempfile.gettempdir(), f"weatheriam-gazetteer-{FORMAT_VERSION}-{digest}.idx"
+    )
+
+
+class GazetteerStore:
+    """
+    The configured index, opened on first use.
+
+    With no GAZETTEER_INDEX_PATH the bundled CSV is indexed into the temp
+    directory once; workers after the first map the same file.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._gazetteer: Gazetteer | None = None
+
+    def current(self) -> Gazetteer:
+        if self._gazetteer is None:
+            path = self.path
+            if not path:
+                path = _bundled_index_path()
+                if not os.path.exists(path):
+                    build_gazetteer(read_places(BUNDLED_GAZETTEER), path)
+            self._gazetteer = Gazetteer(path)
+        return self._gazetteer
+
+
+gazetteer_store = GazetteerStore(settings.GAZETTEER_INDEX_PATH)
+
+
+def get_gazetteer() -> Gazetteer:
+    """Dependency provider for the process-wide Gazetteer."""
+    return gazetteer_store.current()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", help="name,country,lat,lon,population CSV")
+    parser.add_argument("output", nargs="?", default=settings.GAZETTEER_INDEX_PATH)
+    args = parser.parse_args(argv)
+    if not args.output:
+        parser.error("set GAZETTEER_INDEX_PATH or pass an output path")
+    places = read_places(args.source)
+    build_gazetteer(places, args.output)
+    print(f"Indexed {len(places)} places into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import math
+
+import numpy as np
+
+# Forecasts are fetched and cached per grid cell rather than per user, so every
+# user whose preferred location falls inside the same cell shares one forecast.
+GRID_RESOLUTION_DEG = 0.1
+GRID_COLUMNS = round(360 / GRID_RESOLUTION_DEG)
+GRID_ROWS = round(180 / GRID_RESOLUTION_DEG)
+
+
+def cell_id_for(lat: float, lon: float) -> int:
+    """Return the id of the grid cell containing the given coordinates."""
+    row = min(int(math.floor((lat + 90.0) / GRID_RESOLUTION_DEG)), GRID_ROWS - 1)
+    col = int(math.floor((lon + 180.0) / GRID_RESOLUTION_DEG)) % GRID_COLUMNS
+    return row * GRID_COLUMNS + col
+
+
+def cell_center(cell_id: int) -> tuple[float, float]:
+    """Return the (lat, lon) of the center of a grid cell."""
+    row, col = divmod(cell_id, GRID_COLUMNS)
+    lat = -90.0 + (row + 0.5) * GRID_RESOLUTION_DEG
+    lon = -180.0 + (col + 0.5) * GRID_RESOLUTION_DEG
+    return lat, lon
+
+
+def cell_centers(cell_ids) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized cell_center: (lats, lons) arrays for an array of cell ids."""
+    rows, cols = np.divmod(np.asarray(cell_ids, dtype=np.int64), GRID_COLUMNS)
+    return (
+        -90.0 + (rows + 0.5) * GRID_RESOLUTION_DEG,
+        -180.0 + (cols + 0.5) * GRID_RESOLUTION_DEG,
+    )
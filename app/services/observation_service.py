@@ -0,0 +1,574 @@
+import argparse
+import asyncio
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Sequence
+
+import numpy as np
+from fastapi import Depends
+from sqlalchemy import Date, Table, func, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database.session import (
+    asyncpg_connect_args,
+    get_asyncpg_connection,
+    get_db_session,
+)
+from app.models.observation_model import (
+    OBSERVATION_METRICS,
+    MetricSummary,
+    ObservationSummary,
+    WeatherObservation,
+    observation_rollups_daily,
+    observation_rollups_weekly,
+    weather_observations,
+)
+from app.services.base import BaseDataManager
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = weather_observations.name
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_(\d{{8}})$")
+COPY_COLUMNS = ("cell_id", "observed_at", *OBSERVATION_METRICS, "allergens")
+ROLLUP_STATS = (
+    *(f"{metric}_{stat}" for metric in OBSERVATION_METRICS for stat in ("min", "max")),
+    *(f"{metric}_sum" for metric in OBSERVATION_METRICS),
+)
+_EPOCH_DAY = date(1970, 1, 1)
+# Daily partitions kept ready past today, so ingest never waits on DDL.
+PARTITION_DAYS_AHEAD = 2
+# How long partition DDL waits for the parent's lock before giving up, rather
+# than queueing every reader behind it.
+MAINTENANCE_LOCK_TIMEOUT = "5s"
+# Advisory lock held while maintaining, so one process does it at a time.
+MAINTENANCE_LOCK_ID = 0x57584F42
+
+
+def partition_name(day: date) -> str:
+    return f"{PARENT_TABLE}_{day:%Y%m%d}"
+
+
+def _utc_day(moment: datetime) -> date:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    table: Table
+    days: int
+
+    def bucket(self, day_numbers: np.ndarray) -> np.ndarray:
+        """Map days since the epoch to the first day of their bucket."""
+        if self.days == 1:
+            return day_numbers
+        # The epoch was a Thursday; shifting by 3 starts weeks on Monday.
+        return day_numbers - (day_numbers + 3) % 7
+
+    def aligned(self, day: date) -> bool:
+        number = np.array([(day - _EPOCH_DAY).days])
+        return bool(self.bucket(number)[0] == number[0])
+
+
+DAILY = RollupTier(observation_rollups_daily, 1)
+WEEKLY = RollupTier(observation_rollups_weekly, 7)
+# Coarsest first.
+ROLLUP_TIERS = (WEEKLY, DAILY)
+
+
+def choose_tier(start: date, end: date, step_days: int) -> RollupTier:
+    """The coarsest tier whose buckets tile [start, end) in steps of step_days."""
+    for tier in ROLLUP_TIERS:
+        if step_days % tier.days == 0 and tier.aligned(start) and tier.aligned(end):
+            return tier
+    return DAILY
+
+
+@dataclass(frozen=True)
+class BatchRollup:
+    """Per (cell, bucket) aggregates of one batch, as columns for an upsert."""
+
+    cell_ids: list[int]
+    day_numbers: list[int]
+    observations: list[int]
+    stats: dict[str, list[float]]
+
+
+def rollup_batch(
+    batch: Sequence[WeatherObservation], tiers: Sequence[RollupTier] = ROLLUP_TIERS
+) -> dict[RollupTier, BatchRollup]:
+    """
+    Aggregate a non-empty batch sorted by (cell_id, time) into each tier's
+    buckets.
+
+    The sort makes every (cell, bucket) group contiguous, so each statistic
+    is one ufunc.reduceat over the whole batch.
+    """
+    cell_ids = np.fromiter((o.cell_id for o in batch), np.int64, len(batch))
+    day_numbers = np.fromiter(
+        ((_utc_day(o.time) - _EPOCH_DAY).days for o in batch), np.int64, len(batch)
+    )
+    values = np.array(
+        [[getattr(o, metric) for metric in OBSERVATION_METRICS] for o in batch],
+        dtype=np.float64,
+    ).reshape(len(batch), len(OBSERVATION_METRICS))
+
+    rollups = {}
+    for tier in tiers:
+        buckets = tier.bucket(day_numbers)
+        starts = np.flatnonzero(
+            np.concatenate(
+                (
+                    [True],
+                    (cell_ids[1:] != cell_ids[:-1]) | (buckets[1:] != buckets[:-1]),
+                )
+            )
+        )
+        minima = np.minimum.reduceat(values, starts, axis=0)
+        maxima = np.maximum.reduceat(values, starts, axis=0)
+        sums = np.add.reduceat(values, starts, axis=0)
+        stats = {}
+        for column, metric in enumerate(OBSERVATION_METRICS):
+            stats[f"{metric}_min"] = minima[:, column].tolist()
+            stats[f"{metric}_max"] = maxima[:, column].tolist()
+            stats[f"{metric}_sum"] = sums[:, column].tolist()
+        rollups[tier] = BatchRollup(
+            cell_ids=cell_ids[starts].tolist(),
+            day_numbers=buckets[starts].tolist(),
+            observations=np.diff(np.append(starts, len(batch))).tolist(),
+            stats=stats,
+        )
+    return rollups
+
+
+def _rollup_upsert_sql(table: Table) -> str:
+    """INSERT ... SELECT FROM unnest(arrays) that merges into existing buckets."""
+    columns = ("cell_id", "bucket_start", "observations", *ROLLUP_STATS)
+    array_types = (
+        "bigint[]",
+        "int[]",
+        "int[]",
+        *("float8[]" for _ in ROLLUP_STATS),
+    )
+    aliases = [f"c{n}" for n in range(len(columns))]
+    arrays = ", ".join(
+        f"${n}::{array_type}" for n, array_type in enumerate(array_types, start=1)
+    )
+    merges = ["observations = t.observations + excluded.observations"]
+    for stat in ROLLUP_STATS:
+        if stat.endswith("_min"):
+            merges.append(f"{stat} = LEAST(t.{stat}, excluded.{stat})")
+        elif stat.endswith("_max"):
+            merges.append(f"{stat} = GREATEST(t.{stat}, excluded.{stat})")
+        else:
+            merges.append(f"{stat} = t.{stat} + excluded.{stat}")
+    return (
+        f"INSERT INTO {table.name} AS t ({', '.join(columns)}) "
+        f"SELECT c0, DATE '1970-01-01' + c1, {', '.join(aliases[2:])} "
+        f"FROM unnest({arrays}) AS u({', '.join(aliases)}) "
+        f"ON CONFLICT (cell_id, bucket_start) DO UPDATE SET {', '.join(merges)}"
+    )
+
+
+_ROLLUP_UPSERTS = {tier: _rollup_upsert_sql(tier.table) for tier in ROLLUP_TIERS}
+
+
+class IObservationDataManager(ABC):
+    @abstractmethod
+    async def partition_days(self) -> list[date]:
+        pass
+
+    @abstractmethod
+    async def create_partitions(self, days: Iterable[date]) -> None:
+        pass
+
+    @abstractmethod
+    async def drop_partitions(self, days: Iterable[date]) -> None:
+        pass
+
+    @abstractmethod
+    async def copy_observations(self, observations: Sequence[WeatherObservation]):
+        pass
+
+    @abstractmethod
+    async def get_observations(
+        self, cell_id: int, start: datetime, end: datetime
+    ) -> list[WeatherObservation]:
+        pass
+
+    @abstractmethod
+    async def upsert_rollups(self, rollups: dict[RollupTier, BatchRollup]) -> None:
+        pass
+
+    @abstractmethod
+    async def get_summaries(
+        self, tier: RollupTier, cell_id: int, start: date, end: date, step_days: int
+    ) -> list[ObservationSummary]:
+        pass
+
+
+class ObservationDataManager(BaseDataManager, IObservationDataManager):
+    """
+    The partition methods take the parent's lock; run them on an autocommit
+    session (see run_partition_maintenance) so each statement holds it only
+    for itself. DETACH ... CONCURRENTLY cannot run inside a transaction.
+    """
+
+    async def partition_days(self) -> list[date]:
+        children = await self.session.scalars(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        return sorted(
+            datetime.strptime(match[1], "%Y%m%d").date()
+            for match in map(_PARTITION_NAME.match, children)
+            if match
+        )
+
+    async def create_partitions(self, days: Iterable[date]) -> None:
+        for day in sorted(set(days)):
+            # DDL takes no bind parameters; the name and bounds come from a date.
+            await self.session.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(day)} "
+                    f"PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') "
+                    f"TO ('{(day + timedelta(days=1)).isoformat()}')"
+                )
+            )
+
+    async def drop_partitions(self, days: Iterable[date]) -> None:
+        for day in sorted(set(days)):
+            name = partition_name(day)
+            pending = await self.session.scalar(
+                text(
+                    "SELECT inhdetachpending FROM pg_inherits "
+                    "WHERE inhrelid = CAST(:name AS regclass)"
+                ),
+                {"name": name},
+            )
+            # Concurrent detach only takes SHARE UPDATE EXCLUSIVE on the
+            # parent, so reads and COPYs carry on; the DROP then only locks
+            # the detached table. One interrupted midway is left pending and
+            # has to be finalized instead.
+            mode = "FINALIZE" if pending else "CONCURRENTLY"
+            await self.session.execute(
+                text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} {mode}")
+            )
+            await self.session.execute(text(f"DROP TABLE {name}"))
+
+    async def copy_observations(
+        self, observations: Sequence[WeatherObservation]
+    ) -> int:
+        records = [
+            (
+                observation.cell_id,
+                observation.time,
+                *(getattr(observation, metric) for metric in OBSERVATION_METRICS),
+                json.dumps(observation.allergens) if observation.allergens else None,
+            )
+            for observation in observations
+        ]
+        connection = await get_asyncpg_connection(self.session)
+        await connection.copy_records_to_table(
+            PARENT_TABLE, records=records, columns=COPY_COLUMNS
+        )
+        return len(records)
+
+    async def get_observations(
+        self, cell_id: int, start: datetime, end: datetime
+    ) -> list[WeatherObservation]:
+        table = weather_observations
+        rows = await self.session.execute(
+            select(
+                table.c.cell_id,
+                table.c.observed_at,
+                *(table.c[metric] for metric in OBSERVATION_METRICS),
+                table.c.allergens,
+            )
+            .where(
+                table.c.cell_id == cell_id,
+                table.c.observed_at >= start,
+                table.c.observed_at < end,
+            )
+            .order_by(table.c.observed_at)
+        )
+        return [
+            WeatherObservation(
+                cell_id=row.cell_id,
+                time=row.observed_at,
+                **{metric: row._mapping[metric] for metric in OBSERVATION_METRICS},
+                allergens=row.allergens or {},
+            )
+            for row in rows
+        ]
+
+    async def upsert_rollups(self, rollups: dict[RollupTier, BatchRollup]) -> None:
+        connection = await get_asyncpg_connection(self.session)
+        for tier, rollup in rollups.items():
+            if not rollup.cell_ids:
+                continue
+            await connection.execute(
+                _ROLLUP_UPSERTS[tier],
+                rollup.cell_ids,
+                rollup.day_numbers,
+                rollup.observations,
+                *(rollup.stats[stat] for stat in ROLLUP_STATS),
+            )
+
+    async def get_summaries(
+        self, tier: RollupTier, cell_id: int, start: date, end: date, step_days: int
+    ) -> list[ObservationSummary]:
+        table = tier.table
+        # date - date is a day count; // renders as integer division.
+        step = ((table.c.bucket_start - literal(start, Date)) // step_days).label(
+            "step"
+        )
+        rows = await self.session.execute(
+            select(
+                step,
+                func.sum(table.c.observations).label("observations"),
+                *(
+                    aggregate(table.c[f"{metric}_{stat}"]).label(f"{metric}_{stat}")
+                    for metric in OBSERVATION_METRICS
+                    for stat, aggregate in (
+                        ("min", func.min),
+                        ("max", func.max),
+                        ("sum", func.sum),
+                    )
+                ),
+            )
+            .where(
+                table.c.cell_id == cell_id,
+                table.c.bucket_start >= start,
+                table.c.bucket_start < end,
+            )
+            .group_by(step)
+            .order_by(step)
+        )
+        summaries = []
+        for row in rows:
+            values = row._mapping
+            bucket_start = start + timedelta(days=row.step * step_days)
+            summaries.append(
+                ObservationSummary(
+                    cell_id=cell_id,
+                    bucket_start=bucket_start,
+                    bucket_end=min(bucket_start + timedelta(days=step_days), end),
+                    observations=row.observations,
+                    metrics={
+                        metric: MetricSummary(
+                            min=values[f"{metric}_min"],
+                            max=values[f"{metric}_max"],
+                            mean=values[f"{metric}_sum"] / row.observations,
+                        )
+                        for metric in OBSERVATION_METRICS
+                    },
+                )
+            )
+        return summaries
+
+
+class ObservationService:
+    def __init__(self, data_manager: IObservationDataManager, retention_days: int):
+        self.data_manager = data_manager
+        self.retention_days = retention_days
+
+    def window(self, today: date) -> tuple[date, date]:
+        """The first and last day partitions are kept for, given today."""
+        return (
+            today - timedelta(days=self.retention_days),
+            today + timedelta(days=PARTITION_DAYS_AHEAD),
+        )
+
+    async def maintain_partitions(self, today: date | None = None) -> list[date]:
+        """
+        Drop the daily partitions before the retention window (and the
+        observations in them) and create any missing ones up to
+        PARTITION_DAYS_AHEAD days ahead. Returns the days dropped.
+        """
+        first, last = self.window(today or datetime.now(timezone.utc).date())
+        existing = await self.data_manager.partition_days()
+        expired = [day for day in existing if day < first]
+        await self.data_manager.drop_partitions(expired)
+        wanted = {first + timedelta(days=n) for n in range((last - first).days + 1)}
+        await self.data_manager.create_partitions(wanted.difference(existing))
+        return expired
+
+    async def record(
+        self, observations: Iterable[WeatherObservation], today: date | None = None
+    ) -> int:
+        """
+        Append a refresh cycle's observations with one COPY, and merge them
+        into the daily and weekly rollups in the same transaction.
+
+        Takes no DDL locks: the partitions come from maintain_partitions,
+        run separately. Observations older than the retention window are
+        skipped.
+        """
+        first, _ = self.window(today or datetime.now(timezone.utc).date())
+        # Sorted by cell, each batch fills pages with narrow cell ranges,
+        # which is what makes the BRIN index on cell_id selective.
+        batch = sorted(
+            (o for o in observations if _utc_day(o.time) >= first),
+            key=lambda o: (o.cell_id, o.time),
+        )
+        if not batch:
+            return 0
+        recorded = await self.data_manager.copy_observations(batch)
+        await self.data_manager.upsert_rollups(rollup_batch(batch))
+        return recorded
+
+    async def get_observations(
+        self, cell_id: int, start: datetime, end: datetime
+    ) -> list[WeatherObservation]:
+        """Observations for one cell with start <= time < end, oldest first."""
+        return await self.data_manager.get_observations(cell_id, start, end)
+
+    async def summarize(
+        self, cell_id: int, start: date, end: date, step_days: int = 1
+    ) -> list[ObservationSummary]:
+        """
+        Aggregate one cell's history over [start, end) in step_days buckets.
+
+        Reads the weekly rollup when the steps and range fall on ISO week
+        boundaries and the daily rollup otherwise, never the raw rows. Buckets
+        without observations are omitted.
+        """
+        if step_days < 1 or end <= start:
+            raise ValueError("step_days must be positive and end after start")
+        tier = choose_tier(start, end, step_days)
+        return await self.data_manager.get_summaries(
+            tier, cell_id, start, end, step_days
+        )
+
+
+def get_observation_service(
+    session: AsyncSession = Depends(get_db_session),
+) -> ObservationService:
+    """Dependency provider for the ObservationService."""
+    return ObservationService(
+        ObservationDataManager(session), settings.OBSERVATION_RETENTION_DAYS
+    )
+
+
+async def run_partition_maintenance(
+    engine: AsyncEngine, retention_days: int, today: date | None = None
+) -> list[date] | None:
+    """
+    Run ObservationService.maintain_partitions on its own autocommit
+    connection, so every DDL statement commits, and releases the parent's
+    lock, on its own. Returns None without doing anything if another process
+    holds MAINTENANCE_LOCK_ID.
+    """
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        if not await connection.scalar(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+        ):
+            return None
+        await connection.execute(
+            text(f"SET lock_timeout = '{MAINTENANCE_LOCK_TIMEOUT}'")
+        )
+        try:
+            async with AsyncSession(bind=connection) as session:
+                service = ObservationService(
+                    ObservationDataManager(session), retention_days
+                )
+                return await service.maintain_partitions(today)
+        finally:
+            await connection.execute(text("RESET lock_timeout"))
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+            )
+
+
+class PartitionMaintainer:
+    """
+    Runs run_partition_maintenance every interval seconds in the background.
+    Every process may run one; the advisory lock lets one of them at a time
+    do the work.
+    """
+
+    def __init__(self, retention_days: int, interval: float):
+        self.retention_days = retention_days
+        self.interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self, engine: AsyncEngine) -> None:
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(
+                self._run(engine), name="partition-maintainer"
+            )
+
+    async def stop(self) -> None:
+        """
+        Stop after the run in progress, if any: cancelling one midway would
+        leave its connection in an unknown state.
+        """
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def _run(self, engine: AsyncEngine) -> None:
+        while not self._stopping.is_set():
+            try:
+                dropped = await run_partition_maintenance(
+                    engine, self.retention_days
+                )
+                if dropped:
+                    logger.info("Dropped %d observation partitions", len(dropped))
+            except Exception:
+                # Usually the lock timeout; the next run tries again.
+                logger.exception("Observation partition maintenance failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+partition_maintainer = PartitionMaintainer(
+    settings.OBSERVATION_RETENTION_DAYS,
+    settings.OBSERVATION_MAINTENANCE_INTERVAL_SECONDS,
+)
+
+
+async def _maintain() -> list[date] | None:
+    engine = create_async_engine(
+        str(settings.ASYNC_SQL_DATABASE_URI), connect_args=asyncpg_connect_args()
+    )
+    try:
+        return await run_partition_maintenance(
+            engine, settings.OBSERVATION_RETENTION_DAYS
+        )
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Create upcoming and drop expired observation partitions."
+    )
+    parser.parse_args(argv)
+    dropped = asyncio.run(_maintain())
+    if dropped is None:
+        print("Another process is maintaining observation partitions")
+    else:
+        print(f"Dropped {len(dropped)} expired observation partitions")
+
+
+if __name__ == "__main__":
+    main()
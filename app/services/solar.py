@@ -0,0 +1,120 @@
+"""
+Solar position over arrays of coordinates and times, after NOAA's "General
+Solar Position Calculations" (fractional-year series for the equation of time
+and declination). Elevations are good to about half a degree, i.e. sunrise and
+sunset to within a few minutes, which is plenty for deciding whether the sun
+is up in a grid cell.
+
+Inputs broadcast against each other like any NumPy ufunc: pass cell latitudes
+and longitudes as (n, 1) columns and unix timestamps as a row to get an
+(n, hours) answer in one call. Times are unix seconds (UTC).
+"""
+
+import numpy as np
+
+# Elevation of the sun's center at sunrise and sunset, allowing for refraction
+# and the solar disc's radius.
+SUNRISE_ELEVATION = -0.833
+
+# UV irradiance scales with roughly sin(elevation) ** UV_ELEVATION_EXPONENT;
+# the peak window is where it stays above UV_PEAK_FRACTION of the day's max.
+UV_ELEVATION_EXPONENT = 2.5
+UV_PEAK_FRACTION = 0.5
+
+_SECONDS_PER_DAY = 86_400
+
+
+def _fractional_year(timestamps: np.ndarray) -> np.ndarray:
+    """NOAA's gamma: the time of year in radians."""
+    years = np.floor(timestamps).astype(np.int64).astype("datetime64[s]")
+    years = years.astype("datetime64[Y]")
+    year_start = years.astype("datetime64[s]").astype(np.float64)
+    days_in_year = (years + 1).astype("datetime64[D]") - years.astype("datetime64[D]")
+    days_in_year = days_in_year.astype(np.float64)
+    days = (timestamps - year_start) / _SECONDS_PER_DAY
+    # NOAA's (day_of_year - 1) + (hour - 12) / 24.
+    return 2 * np.pi / days_in_year * (days - 0.5)
+
+
+def _equation_of_time(gamma: np.ndarray) -> np.ndarray:
+    """Apparent minus mean solar time, in minutes."""
+    return 229.18 * (
+        0.000075
+        + 0.001868 * np.cos(gamma)
+        - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma)
+        - 0.040849 * np.sin(2 * gamma)
+    )
+
+
+def _declination(gamma: np.ndarray) -> np.ndarray:
+    """Solar declination in radians."""
+    return (
+        0.006918
+        - 0.399912 * np.cos(gamma)
+        + 0.070257 * np.sin(gamma)
+        - 0.006758 * np.cos(2 * gamma)
+        + 0.000907 * np.sin(2 * gamma)
+        - 0.002697 * np.cos(3 * gamma)
+        + 0.00148 * np.sin(3 * gamma)
+    )
+
+
+def solar_elevation(lat, lon, timestamps) -> np.ndarray:
+    """Elevation of the sun above the horizon in degrees."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.asarray(lon, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+
+    gamma = _fractional_year(timestamps)
+    declination = _declination(gamma)
+    minutes = timestamps % _SECONDS_PER_DAY / 60
+    true_solar_time = minutes + _equation_of_time(gamma) + 4 * lon
+    hour_angle = np.radians(true_solar_time / 4 - 180)
+
+    sin_elevation = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(
+        declination
+    ) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_elevation, -1.0, 1.0)))
+
+
+def sun_is_up(lat, lon, hour_starts) -> np.ndarray:
+    """Whether the sun is above the horizon at any point of each hour."""
+    hour_starts = np.asarray(hour_starts, dtype=np.float64)
+    # Sunrise or sunset falling inside the hour shows at one of its ends; the
+    # midpoint covers polar days where the sun just grazes the horizon.
+    elevations = [
+        solar_elevation(lat, lon, hour_starts + offset) for offset in (0, 1800, 3600)
+    ]
+    return np.maximum.reduce(elevations) > SUNRISE_ELEVATION
+
+
+def uv_peak_window(lat, lon, days) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Predict each day's UV peak as (start, end) unix timestamps.
+
+    days are unix timestamps of UTC midnights. The window is centered on
+    solar noon; both ends are NaN when the sun stays below the horizon.
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.asarray(lon, dtype=np.float64)
+    days = np.asarray(days, dtype=np.float64)
+
+    # The sun's motion over one day is small enough to take both the
+    # declination and the equation of time at that day's solar noon.
+    noon = days + (720 - 4 * lon) * 60
+    gamma = _fractional_year(noon)
+    noon = days + (720 - 4 * lon - _equation_of_time(gamma)) * 60
+    declination = _declination(gamma)
+
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_dec, cos_dec = np.sin(declination), np.cos(declination)
+    peak = np.clip(sin_lat * sin_dec + cos_lat * cos_dec, -1.0, 1.0)
+    # sin(elevation) where relative UV drops to UV_PEAK_FRACTION of the peak.
+    edge = np.maximum(peak, 0) * UV_PEAK_FRACTION ** (1 / UV_ELEVATION_EXPONENT)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_hour_angle = (edge - sin_lat * sin_dec) / (cos_lat * cos_dec)
+    half_width = np.degrees(np.arccos(np.clip(cos_hour_angle, -1.0, 1.0))) * 240
+    sun_rises = peak > np.sin(np.radians(SUNRISE_ELEVATION))
+    half_width = np.where(sun_rises, half_width, np.nan)
+    return noon - half_width, noon + half_width
@@ -0,0 +1,315 @@
+"""
+Nearest reporting station for a location, from a local station catalogue.
+
+Observations come from reporting stations rather than model grid cells, so
+each user's location is mapped to its nearest station when the location is
+written (UserParameter.station_id), not looked up per request.
+
+StationIndex is a grid-bucket index over stations as points on the unit
+sphere: space is cut into cubes of side cell_size and each cube holds the
+stations inside it. A query searches shells of cubes outward from its own.
+Every station outside the cubes searched so far, r shells out, is at least
+r * cell_size away as a straight line through the sphere, and that chord
+grows with the great-circle distance, so the search can stop once the k-th
+nearest candidate is closer than that. Queries in the same cube are answered
+together with NumPy.
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import math
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database.session import asyncpg_connect_args
+from app.services.user_parameter_service import UserParameterDatamanager
+
+BUNDLED_CATALOGUE = Path(__file__).resolve().parent.parent / "data" / "stations.csv"
+EARTH_RADIUS_KM = 6371.0088
+
+# Stations per cube on average. Queries are batched per cube, so smaller
+# cubes mean more Python-level groups; larger ones more distances per query.
+STATIONS_PER_CELL = 8
+_MIN_CELL_SIZE = 0.002
+
+
+@dataclass(frozen=True, slots=True)
+class Station:
+    station_id: str
+    name: str
+    lat: float
+    lon: float
+
+
+def read_catalogue(path: str | os.PathLike) -> list[Station]:
+    """Read a station_id,name,lat,lon CSV."""
+    with open(path, newline="", encoding="utf-8") as source:
+        return [
+            Station(
+                row["station_id"], row["name"], float(row["lat"]), float(row["lon"])
+            )
+            for row in csv.DictReader(source)
+        ]
+
+
+def unit_vectors(lats, lons) -> np.ndarray:
+    """[n, 3] points on the unit sphere for arrays of coordinates."""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)), -1)
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+def _cell_size_for(count: int) -> float:
+    # The sphere has area 4π; a cube of side a covers about a² of it.
+    area = 4 * math.pi * STATIONS_PER_CELL / max(count, 1)
+    return max(math.sqrt(area), _MIN_CELL_SIZE)
+
+
+class StationIndex:
+    def __init__(self, stations: Iterable[Station] = ()):
+        self._build(list(stations))
+
+    def _build(self, stations: list[Station]) -> None:
+        self.cell_size = _cell_size_for(len(stations))
+        self.stations: dict[str, Station] = {}
+        self._ids: list[str] = []
+        self._points = np.empty((0, 3))
+        self._row: dict[str, int] = {}
+        self._buckets: dict[tuple[int, int, int], list[int]] = {}
+        self.update(stations)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def _cell(self, point: np.ndarray) -> tuple[int, int, int]:
+        return tuple(np.floor(point / self.cell_size).astype(np.int64).tolist())
+
+    def update(self, stations: Iterable[Station]) -> None:
+        """Add stations, or move ones already indexed."""
+        stations = [s for s in stations if self.stations.get(s.station_id) != s]
+        self.remove(s.station_id for s in stations if s.station_id in self.stations)
+        if not stations:
+            return
+        points = unit_vectors([s.lat for s in stations], [s.lon for s in stations])
+        first = len(self._ids)
+        self._points = np.concatenate((self._points, points))
+        for offset, (station, point) in enumerate(zip(stations, points)):
+            row = first + offset
+            self._ids.append(station.station_id)
+            self._row[station.station_id] = row
+            self.stations[station.station_id] = station
+            self._buckets.setdefault(self._cell(point), []).append(row)
+
+    def remove(self, station_ids: Iterable[str]) -> None:
+        for station_id in list(station_ids):
+            row = self._row.pop(station_id, None)
+            if row is None:
+                continue
+            del self.stations[station_id]
+            cell = self._cell(self._points[row])
+            bucket = self._buckets[cell]
+            bucket.remove(row)
+            if not bucket:
+                del self._buckets[cell]
+
+    def sync(self, stations: Iterable[Station]) -> int:
+        """
+        Make the index hold exactly stations, touching only what changed.
+
+        Returns the number of stations added, moved or removed. Rebuilds from
+        scratch instead when the catalogue has grown or shrunk so much that
+        the cube size no longer fits it.
+        """
+        stations = {s.station_id: s for s in stations}
+        removed = self.stations.keys() - stations.keys()
+        changed = [
+            s for s in stations.values() if self.stations.get(s.station_id) != s
+        ]
+        size = _cell_size_for(len(stations))
+        if not 0.5 < size / self.cell_size < 2:
+            self._build(list(stations.values()))
+        else:
+            self.remove(removed)
+            self.update(changed)
+        return len(removed) + len(changed)
+
+    def _shell(self, center: tuple[int, int, int], radius: int) -> list[int]:
+        """Rows of the stations in cubes exactly radius cubes from center."""
+        rows = []
+        span = range(-radius, radius + 1)
+        for offset in itertools.product(span, span, span):
+            if max(map(abs, offset)) != radius:
+                continue
+            bucket = self._buckets.get(
+                (center[0] + offset[0], center[1] + offset[1], center[2] + offset[2])
+            )
+            if bucket:
+                rows.extend(bucket)
+        return rows
+
+    def nearest(self, lats, lons, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The k nearest stations to each point, nearest first.
+
+        Returns station ids as an object array [n, k] and great-circle
+        distances in km [n, k]; k is capped at the number of stations.
+        """
+        queries = unit_vectors(np.atleast_1d(lats), np.atleast_1d(lons))
+        k = min(k, len(self.stations))
+        ids = np.empty((len(queries), k), dtype=object)
+        distances = np.empty((len(queries), k))
+        if k == 0 or len(queries) == 0:
+            return ids, distances
+
+        cells = np.floor(queries / self.cell_size).astype(np.int64)
+        # Pack each cube into one integer so grouping is a 1-D sort.
+        span = int(2 / self.cell_size) + 3
+        keys = ((cells[:, 0] + span) * 2 * span + cells[:, 1] + span) * 2 * span
+        keys += cells[:, 2] + span
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        groups = cells[first]
+        order = np.argsort(inverse, kind="stable")
+        ends = np.cumsum(np.bincount(inverse, minlength=len(groups)))
+        starts = np.concatenate(([0], ends[:-1]))
+        station_ids = np.array(self._ids, dtype=object)
+        every_station = None
+
+        for group, (start, end) in enumerate(zip(starts, ends)):
+            members = order[start:end]
+            points = queries[members]
+            center = tuple(groups[group].tolist())
+            candidates: list[int] = []
+            radius = 0
+            while True:
+                # Past the point where shells hold more cubes than there are
+                # occupied cubes, comparing against everything is cheaper.
+                if (2 * radius + 1) ** 3 > 8 * len(self._buckets):
+                    if every_station is None:
+                        every_station = np.fromiter(self._row.values(), dtype=np.intp)
+                    rows = every_station
+                    chords = self._chords(points, rows)
+                    break
+                candidates.extend(self._shell(center, radius))
+                if len(candidates) >= k:
+                    rows = np.array(candidates, dtype=np.intp)
+                    chords = self._chords(points, rows)
+                    kth = np.partition(chords, k - 1, axis=1)[:, k - 1]
+                    if (kth <= radius * self.cell_size).all():
+                        break
+                radius += 1
+
+            best = np.argpartition(chords, k - 1, axis=1)[:, :k]
+            best_chords = np.take_along_axis(chords, best, axis=1)
+            ranked = np.argsort(best_chords, axis=1)
+            best = np.take_along_axis(best, ranked, axis=1)
+            ids[members] = station_ids[rows[best]]
+            distances[members] = chord_to_km(np.take_along_axis(best_chords, ranked, 1))
+        return ids, distances
+
+    def _chords(self, points: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """[queries, candidates] straight-line distances on the unit sphere."""
+        # |p - q|² = 2 - 2 p·q for unit vectors, as one matrix product.
+        squared = 2 - 2 * (points @ self._points[rows].T)
+        return np.sqrt(np.maximum(squared, 0, out=squared), out=squared)
+
+    def station_for(self, lat: float, lon: float) -> str | None:
+        ids, _ = self.nearest([lat], [lon])
+        return ids[0, 0] if ids.shape[1] else None
+
+
+class StationCatalogue:
+    """The index over a catalogue file, synced when the file changes."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = path
+        self.index = StationIndex()
+        self._mtime_ns: int | None = None
+
+    def current(self) -> StationIndex:
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns != self._mtime_ns:
+            self.index.sync(read_catalogue(self.path))
+            self._mtime_ns = mtime_ns
+        return self.index
+
+
+station_catalogue = StationCatalogue(
+    settings.STATION_CATALOGUE_PATH or BUNDLED_CATALOGUE
+)
+
+
+def get_station_index() -> StationIndex:
+    """The process-wide station index, current with the catalogue file."""
+    return station_catalogue.current()
+
+
+_REMAP = text(
+    """
+    UPDATE user_parameters AS p SET station_id = v.station_id
+    FROM unnest(CAST(:user_ids AS uuid[]), CAST(:station_ids AS varchar[]))
+        AS v(user_id, station_id)
+    WHERE p.user_id = v.user_id AND p.station_id IS DISTINCT FROM v.station_id
+    """
+)
+
+
+async def remap_stations(
+    session: AsyncSession, index: StationIndex, batch_size: int = 10_000
+) -> int:
+    """
+    Re-map every user to their nearest station, e.g. after the catalogue
+    changed. Users are read and written a batch at a time, in user_id order;
+    only rows whose station changes are written. Returns how many.
+    """
+    data_manager = UserParameterDatamanager(session)
+    updated = 0
+    after = None
+    while rows := await data_manager.get_user_locations_after(after, batch_size):
+        user_ids, lats, lons = zip(*rows)
+        station_ids, _ = index.nearest(lats, lons)
+        result = await session.execute(
+            _REMAP,
+            {"user_ids": list(user_ids), "station_ids": station_ids[:, 0].tolist()},
+        )
+        updated += result.rowcount
+        after = user_ids[-1]
+    return updated
+
+
+async def _remap_all() -> int:
+    engine = create_async_engine(
+        str(settings.ASYNC_SQL_DATABASE_URI), connect_args=asyncpg_connect_args()
+    )
+    try:
+        async with AsyncSession(engine) as session:
+            updated = await remap_stations(session, get_station_index())
+            await session.commit()
+        return updated
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-map every user to their nearest station in the catalogue."
+    )
+    parser.parse_args(argv)
+    print(f"Updated the station of {asyncio.run(_remap_all())} users")
+
+
+if __name__ == "__main__":
+    main()
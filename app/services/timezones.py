@@ -0,0 +1,24 @@
+"""
+Offline UTC offsets for coordinates.
+
+Without a time zone database the offset is the nautical one: whole hours of
+the nearest 15° meridian. That is within an hour of civil time for most of the
+world's population, but it ignores daylight saving and the zones that
+deliberately deviate (China, India, Spain, ...).
+"""
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def utc_offset_minutes(lon):
+    """UTC offset at the given longitude(s), in minutes east of UTC."""
+    hours = np.clip(np.round(np.asarray(lon, dtype=np.float64) / 15), -12, 12)
+    offsets = (hours * 60).astype(np.int64)
+    return int(offsets) if offsets.ndim == 0 else offsets
+
+
+def utc_minute_of_day(local_minute: int, lon):
+    """The minute of the UTC day at which it is local_minute at lon."""
+    return (local_minute - utc_offset_minutes(lon)) % MINUTES_PER_DAY
@@ -0,0 +1,155 @@
+"""
+Coalescing of concurrent user lookups into batched queries.
+
+Logins and token checks look users up one at a time, and under load many of
+them land within the same event-loop tick. UserLoader collects the keys asked
+for until the next tick (or for USER_LOADER_WINDOW_MS) and fetches them all
+with one `WHERE username = ANY(:usernames)` or `WHERE id = ANY(:user_ids)`.
+Binding one array rather than expanding IN (...) keeps it a single prepared
+statement whatever the batch size.
+
+Batches run on their own pooled connection, outside any request's
+transaction, so rows the request itself has written but not committed are not
+seen. Returned users are detached and shared by every caller in the batch;
+treat them as read-only. The loader is opt-in (USER_LOADER_ENABLED) and is
+created in the lifespan; without it lookups go through the request session.
+"""
+
+import asyncio
+import contextvars
+import uuid
+from typing import Awaitable, Callable, Generic, Hashable, Mapping, TypeVar
+
+from fastapi import Depends, Request
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.database.session import get_db_session
+from app.database.statements import statements
+from app.models.user_model import Users
+from app.observability.metrics import USER_LOADER_BATCH_SIZE
+from app.services.user_service import IUserLookup, UserDataManager
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_BY_USERNAME = statements.register(
+    "users_by_usernames",
+    select(Users).where(
+        Users.username == any_(bindparam("usernames", type_=ARRAY(String)))
+    ),
+)
+_BY_ID = statements.register(
+    "users_by_ids",
+    select(Users).where(
+        Users.id == any_(bindparam("user_ids", type_=ARRAY(UUID(as_uuid=True))))
+    ),
+)
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Coalesces concurrent load(key) calls into one fetch(keys) call.
+
+    Keys are collected until the next event-loop iteration, or for window
+    seconds when it is set, or until max_batch_size distinct keys are
+    waiting. fetch returns the values it found by key; missing keys load as
+    None, and a failed fetch raises in every caller of the batch.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        name: str,
+        window: float = 0.0,
+        max_batch_size: int = 1000,
+    ):
+        self.fetch = fetch
+        self.name = name
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: dict[K, asyncio.Future] = {}
+        self._handle: asyncio.Handle | None = None
+        self._batches: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._handle is None:
+                if self.window > 0:
+                    self._handle = loop.call_later(self.window, self._dispatch)
+                else:
+                    self._handle = loop.call_soon(self._dispatch)
+        # A caller that is cancelled must not cancel the batch for the others.
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        # An empty context, so the batch's queries are not counted against
+        # whichever request happened to open it.
+        task = asyncio.get_running_loop().create_task(
+            self._run(batch), context=contextvars.Context()
+        )
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future]) -> None:
+        USER_LOADER_BATCH_SIZE.observe(len(batch), self.name)
+        try:
+            found = await self.fetch(list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+                    # Retrieved here in case every caller has been cancelled.
+                    future.exception()
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class UserLoader(IUserLookup):
+    def __init__(
+        self, engine: AsyncEngine, window: float = 0.0, max_batch_size: int = 1000
+    ):
+        self.engine = engine
+        self._by_username = BatchLoader(
+            self._fetch_by_usernames, "username", window, max_batch_size
+        )
+        self._by_id = BatchLoader(self._fetch_by_ids, "id", window, max_batch_size)
+
+    async def get_user_by_user_name(self, user_name: str) -> Users | None:
+        return await self._by_username.load(user_name)
+
+    async def get_user_by_id(self, user_id: uuid.UUID) -> Users | None:
+        return await self._by_id.load(user_id)
+
+    async def _fetch_by_usernames(self, usernames: list[str]) -> dict[str, Users]:
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            users = await session.scalars(_BY_USERNAME, {"usernames": usernames})
+            return {user.username: user for user in users}
+
+    async def _fetch_by_ids(self, user_ids: list[uuid.UUID]) -> dict[uuid.UUID, Users]:
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            users = await session.scalars(_BY_ID, {"user_ids": user_ids})
+            return {user.id: user for user in users}
+
+
+def get_user_lookup(
+    request: Request, session: AsyncSession = Depends(get_db_session)
+) -> IUserLookup:
+    """
+    Dependency provider for user lookups: the process's UserLoader when the
+    lifespan created one, otherwise the request session.
+    """
+    loader = getattr(request.app.state, "user_loader", None)
+    return loader if loader is not None else UserDataManager(session)
@@ -1,15 +1,79 @@
+import time
 import uuid
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
+from typing import TYPE_CHECKING
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
 
-from sqlalchemy import select
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user_parameter_model import (
+    DEFAULT_PARAMETERS,
     UserParameter,
-    UserParameterBase,
     UserParameterUpdate,
 )
+from app.cache.lru import LRUCache
+from app.config import settings
+from app.database.session import get_asyncpg_connection
+from app.database.statements import statements
+from app.observability.sql import record_query
+from app.serialization import RawJSON, dump_model, encode_object
 from app.services.base import BaseDataManager
 
+if TYPE_CHECKING:
+    from app.services.stations import StationIndex
+
+DEFAULT_LAT = -36.15
+DEFAULT_LON = 95.98
+# The JSONB form of DEFAULT_PARAMETERS, dumped once rather than per signup.
+_DEFAULT_PARAMETER_VALUES = {
+    name: parameter.model_dump(mode="json")
+    for name, parameter in DEFAULT_PARAMETERS.items()
+}
+
+
+def _default_parameter_values() -> dict[str, dict]:
+    """Fresh copies of the default JSONB values, so no two rows share one."""
+    return {
+        name: {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in parameter.items()
+        }
+        for name, parameter in _DEFAULT_PARAMETER_VALUES.items()
+    }
+
+
+_PARAMS_BY_USER_ID = statements.register(
+    "user_params_by_user_id",
+    select(UserParameter).where(UserParameter.user_id == bindparam("user_id")),
+)
+# One array parameter rather than an expanding IN, so every batch size shares
+# one compiled form and one prepared statement.
+_PARAMS_BY_USER_IDS = statements.register(
+    "user_params_by_user_ids",
+    select(UserParameter).where(
+        UserParameter.user_id
+        == any_(bindparam("user_ids", type_=ARRAY(UUID(as_uuid=True))))
+    ),
+)
+
+# The raw read selects the response fields in order, JSONB columns as their
+# JSON text, so the body is assembled without decoding or building a model.
+_RAW_FIELDS = tuple(UserParameter.model_fields)
+_RAW_JSON_FIELDS = frozenset(
+    column.name
+    for column in UserParameter.__table__.columns
+    if isinstance(column.type, JSONB)
+)
+_RAW_PARAMS_BY_USER_ID = "SELECT {} FROM user_parameters WHERE user_id = $1".format(
+    ", ".join(
+        f"{name}::text" if name in _RAW_JSON_FIELDS else name for name in _RAW_FIELDS
+    )
+)
+
 
 class IUserParameterDataManager(ABC):
     @abstractmethod
@@ -24,6 +88,33 @@ class IUserParameterDataManager(ABC):
     ) -> UserParameter | None:
         pass
 
+    @abstractmethod
+    async def get_user_params_json(
+        self, user_id: uuid.UUID
+    ) -> tuple[bytes, datetime] | None:
+        """The row as a response body, with its time_updated."""
+
+    @abstractmethod
+    async def get_user_params_by_user_ids(
+        self, user_ids: Sequence[uuid.UUID]
+    ) -> list[UserParameter]:
+        pass
+
+    @abstractmethod
+    def stream_user_locations(
+        self, user_ids: Sequence[uuid.UUID] | None = None, batch_size: int = 10_000
+    ) -> AsyncIterator[Sequence[tuple[uuid.UUID, float, float]]]:
+        """Yield (user_id, preferred_lat, preferred_lon) rows in batches."""
+
+    @abstractmethod
+    async def get_user_locations_after(
+        self, after: uuid.UUID | None, limit: int
+    ) -> Sequence[tuple[uuid.UUID, float, float]]:
+        """
+        Return up to limit (user_id, preferred_lat, preferred_lon) rows with
+        user_id above after, in user_id order.
+        """
+
 
 class IUserParameterService(ABC):
     @abstractmethod
@@ -40,24 +131,40 @@ class IUserParameterService(ABC):
 
 
 class UserParameterService(IUserParameterService):
-    def __init__(self, data_manager: IUserParameterDataManager):
+    def __init__(
+        self,
+        data_manager: IUserParameterDataManager,
+        station_index: "StationIndex | None" = None,
+    ):
         self.data_manager = data_manager
+        # Maps new rows to their nearest station when given.
+        self.station_index = station_index
 
     async def add_parameter(
         self, user_id: uuid.UUID, parameter: UserParameterUpdate = None
     ) -> UserParameter:
-        # Start with default parameters
-        user_parameters_base = UserParameterBase(
-            preferred_lat=-36.15, preferred_lon=95.98
-        )
+        # The defaults are trusted and already in their JSONB form; only the
+        # caller's UserParameterUpdate has been validated, by its constructor.
+        values = {
+            "preferred_lat": DEFAULT_LAT,
+            "preferred_lon": DEFAULT_LON,
+            **_default_parameter_values(),
+        }
         if parameter:
-            # Update with any provided custom parameters
-            user_parameters_base = user_parameters_base.model_copy(
-                update=parameter.model_dump(exclude_unset=True)
+            values.update(parameter.model_dump(exclude_unset=True))
+        if self.station_index is not None:
+            values["station_id"] = self.station_index.station_for(
+                values["preferred_lat"], values["preferred_lon"]
             )
-
+        # Passing id and the timestamps skips SQLModel's per-instance default
+        # factory calls, which inspect each factory's signature every time.
+        now = datetime.utcnow()
         user_parameters = UserParameter(
-            user_id=user_id, **user_parameters_base.model_dump()
+            id=uuid.uuid4(),
+            user_id=user_id,
+            time_created=now,
+            time_updated=now,
+            **values,
         )
 
         return await self.data_manager.add_user_parameters(user_parameters)
@@ -78,6 +185,184 @@ class UserParameterDatamanager(BaseDataManager, IUserParameterDataManager):
     async def get_user_params_by_user_id(
         self, user_id: uuid.UUID
     ) -> UserParameter | None:
-        return await self.get_one(
-            select(UserParameter).where(UserParameter.user_id == user_id)
+        return await self.get_one(_PARAMS_BY_USER_ID, {"user_id": user_id})
+
+    async def get_user_params_json(
+        self, user_id: uuid.UUID
+    ) -> tuple[bytes, datetime] | None:
+        """
+        Read the row on the session's asyncpg connection, bypassing the ORM.
+
+        No UserParameter is built and nothing enters the identity map, so use
+        it only for reads that go straight into a response. The body holds
+        the same JSON as serialize_user_parameters, though the JSONB
+        objects keep Postgres's spacing and key order.
+        """
+        connection = await get_asyncpg_connection(self.session, begin=False)
+        started = time.perf_counter()
+        row = await connection.fetchrow(_RAW_PARAMS_BY_USER_ID, user_id)
+        record_query(
+            _RAW_PARAMS_BY_USER_ID, (user_id,), time.perf_counter() - started
+        )
+        if row is None:
+            return None
+        body = encode_object(
+            (
+                name,
+                RawJSON(value)
+                if value is not None and name in _RAW_JSON_FIELDS
+                else value,
+            )
+            for name, value in zip(_RAW_FIELDS, row)
+        )
+        return body, row["time_updated"]
+
+    async def get_user_params_by_user_ids(
+        self, user_ids: Sequence[uuid.UUID]
+    ) -> list[UserParameter]:
+        result = await self.session.scalars(
+            _PARAMS_BY_USER_IDS, {"user_ids": list(user_ids)}
         )
+        return list(result.all())
+
+    async def stream_user_locations(
+        self, user_ids: Sequence[uuid.UUID] | None = None, batch_size: int = 10_000
+    ) -> AsyncIterator[Sequence[tuple[uuid.UUID, float, float]]]:
+        stmt = select(
+            UserParameter.user_id,
+            UserParameter.preferred_lat,
+            UserParameter.preferred_lon,
+        ).execution_options(yield_per=batch_size)
+        if user_ids is not None:
+            stmt = stmt.where(UserParameter.user_id.in_(user_ids))
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_user_locations_after(
+        self, after: uuid.UUID | None, limit: int
+    ) -> Sequence[tuple[uuid.UUID, float, float]]:
+        # Keyset pages are separate statements, so the session can write
+        # between them, unlike a stream that holds the connection.
+        stmt = (
+            select(
+                UserParameter.user_id,
+                UserParameter.preferred_lat,
+                UserParameter.preferred_lon,
+            )
+            .order_by(UserParameter.user_id)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(UserParameter.user_id > after)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUserParameters:
+    """A serialized UserParameter response with its validators."""
+
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+
+def serialize_user_parameters(user_params: UserParameter) -> bytes:
+    """Serialize a UserParameter row to the same JSON the response_model produces."""
+    return dump_model(user_params)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class UserParameterCache:
+    """
+    Bounded cache of pre-serialized UserParameter responses keyed by user id.
+
+    Reads go through it before touching Postgres; writers must put the new
+    row (or invalidate) after committing.
+    """
+
+    def __init__(self, max_size: int):
+        self._entries: LRUCache[uuid.UUID, CachedUserParameters] = LRUCache(max_size)
+
+    def get(self, user_id: uuid.UUID) -> CachedUserParameters | None:
+        return self._entries.get(user_id)
+
+    def put(self, user_params: UserParameter) -> CachedUserParameters:
+        newer = self._newer(user_params.user_id, user_params.time_updated)
+        if newer is not None:
+            return newer
+        return self._store(
+            user_params.user_id,
+            serialize_user_parameters(user_params),
+            user_params.time_updated,
+            weak=False,
+        )
+
+    def put_serialized(
+        self, user_id: uuid.UUID, body: bytes, time_updated: datetime
+    ) -> CachedUserParameters:
+        """
+        Cache a body that was serialized elsewhere, e.g. by a raw read.
+
+        The body is equivalent JSON but not byte-for-byte what put() would
+        cache (Postgres orders and spaces JSONB keys its own way), so its
+        ETag is weak.
+        """
+        newer = self._newer(user_id, time_updated)
+        if newer is not None:
+            return newer
+        return self._store(user_id, body, time_updated, weak=True)
+
+    def _store(
+        self, user_id: uuid.UUID, body: bytes, time_updated: datetime, weak: bool
+    ) -> CachedUserParameters:
+        time_updated = _as_utc(time_updated)
+        version = int(time_updated.timestamp() * 1_000_000)
+        cached = CachedUserParameters(
+            body=body,
+            etag=f'{"W/" if weak else ""}"{user_id.hex}-{version:x}"',
+            last_modified=time_updated,
+        )
+        self._entries.put(user_id, cached)
+        return cached
+
+    def _newer(
+        self, user_id: uuid.UUID, time_updated: datetime
+    ) -> CachedUserParameters | None:
+        """
+        The cached entry if it is newer than time_updated. A read that
+        started before a PATCH can finish after it; its older row must not
+        replace the one the PATCH wrote through.
+        """
+        cached = self._entries.get(user_id)
+        if cached is not None and cached.last_modified > _as_utc(time_updated):
+            return cached
+        return None
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.invalidate(user_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_parameter_cache = UserParameterCache(settings.USER_PARAMETER_CACHE_SIZE)
+
+
+def get_user_parameter_cache() -> UserParameterCache:
+    """Dependency provider for the process-wide UserParameterCache."""
+    return user_parameter_cache
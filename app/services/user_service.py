@@ -1,5 +1,6 @@
 import uuid
 from abc import ABC, abstractmethod
+from sqlalchemy import bindparam
 from sqlmodel import select
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,17 +8,30 @@ from app.models.user_model import Users
 from app.services.auth_service import AuthService
 from app.services.base import BaseDataManager
 from app.database.session import get_db_session
+from app.database.statements import statements
+from app.services.stations import get_station_index
 from app.services.user_parameter_service import (
     UserParameterDatamanager,
     UserParameterService,
 )
 
 
-class IUserDataManager(ABC):
+_USER_BY_USERNAME = statements.register(
+    "user_by_username", select(Users).where(Users.username == bindparam("username"))
+)
+
+
+class IUserLookup(ABC):
     @abstractmethod
     async def get_user_by_user_name(self, user_name: str) -> Users | None:
         pass
 
+    @abstractmethod
+    async def get_user_by_id(self, user_id: uuid.UUID) -> Users | None:
+        pass
+
+
+class IUserDataManager(IUserLookup):
     @abstractmethod
     async def add_user(self, user: Users) -> None:
         pass
@@ -67,8 +81,10 @@ class UserDataManager(BaseDataManager, IUserDataManager):
         super().__init__(session)
 
     async def get_user_by_user_name(self, user_name: str) -> Users | None:
-        select_stmt = select(Users).where(Users.username == user_name)
-        return await self.get_one(select_stmt)
+        return await self.get_one(_USER_BY_USERNAME, {"username": user_name})
+
+    async def get_user_by_id(self, user_id: uuid.UUID) -> Users | None:
+        return await self.session.get(Users, user_id)
 
     async def add_user(self, user: Users) -> None:
         """Adds a user object to the session."""
@@ -88,7 +104,9 @@ def get_user_service(
     other services. It keeps this logic out of the route handlers.
     """
     user_param_datamanager = UserParameterDatamanager(session)
-    user_param_service = UserParameterService(user_param_datamanager)
+    user_param_service = UserParameterService(
+        user_param_datamanager, station_index=get_station_index()
+    )
     user_datamanager = UserDataManager(session)
     return UserService(
         data_manager=user_datamanager, user_parameter_service=user_param_service
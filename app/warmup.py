@@ -0,0 +1,111 @@
+"""
+Per-worker warm-up, run from the lifespan before the worker accepts traffic.
+
+Without it the first requests a fresh worker serves pay for opening pool
+connections, asyncpg's per-connection statement preparation, SQLAlchemy's
+statement compilation, loading the Argon2 bindings, building pydantic
+serializers and indexing the gazetteer. uvicorn only starts accepting
+connections once lifespan startup has finished, so all of that is moved out
+of the request path.
+
+Warm-up failures are logged rather than raised: a worker that could not warm
+up still serves requests, just cold.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.models.user_parameter_model import UserParameter
+from app.services.auth_service import get_password_hasher
+from app.services.gazetteer import get_gazetteer
+from app.services.user_parameter_service import (
+    UserParameterCache,
+    UserParameterDatamanager,
+    get_user_parameter_cache,
+)
+from app.services.user_service import UserDataManager
+
+logger = logging.getLogger(__name__)
+
+# A user id no row has, for running the hot queries without touching data.
+NIL_USER_ID = uuid.UUID(int=0)
+
+
+async def _run_hot_queries(connection: AsyncConnection) -> None:
+    """Compile and prepare the per-request lookups on one pooled connection."""
+    async with AsyncSession(bind=connection) as session:
+        await UserDataManager(session).get_user_by_user_name("")
+        await UserParameterDatamanager(session).get_user_params_by_user_id(
+            NIL_USER_ID
+        )
+
+
+async def open_pool_connections(engine: AsyncEngine, count: int) -> int:
+    """
+    Open count connections concurrently and return them to the pool.
+
+    Each one runs the hot queries first, since asyncpg's prepared statement
+    cache is per connection. Returns the number of connections opened.
+    """
+    count = min(count, settings.DB_POOL_SIZE)
+    connections = await asyncio.gather(*(engine.connect() for _ in range(count)))
+    try:
+        await asyncio.gather(*(_run_hot_queries(conn) for conn in connections))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections))
+    return len(connections)
+
+
+async def prime_user_parameter_cache(
+    session: AsyncSession, cache: UserParameterCache, limit: int
+) -> int:
+    """Load the most recently updated parameter rows into the cache."""
+    if limit <= 0:
+        return 0
+    rows = await session.scalars(
+        select(UserParameter).order_by(UserParameter.time_updated.desc()).limit(limit)
+    )
+    primed = 0
+    for user_params in rows:
+        cache.put(user_params)
+        primed += 1
+    return primed
+
+
+def exercise_argon2() -> None:
+    """Load the Argon2 bindings and allocate its memory once, off the loop."""
+    hasher = get_password_hasher()
+    hasher.verify(hasher.hash("warm-up"), "warm-up")
+
+
+async def warm_up(engine: AsyncEngine) -> None:
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        open_pool_connections(engine, settings.DB_POOL_MIN_SIZE),
+        asyncio.to_thread(exercise_argon2),
+        asyncio.to_thread(get_gazetteer),
+        return_exceptions=True,
+    )
+    for step, result in zip(("pool", "argon2", "gazetteer"), results):
+        if isinstance(result, BaseException):
+            logger.warning("Warm-up step %s failed: %r", step, result)
+
+    try:
+        async with AsyncSession(engine) as session:
+            primed = await prime_user_parameter_cache(
+                session, get_user_parameter_cache(), settings.WARMUP_USER_PARAMETERS
+            )
+    except Exception as exc:
+        logger.warning("Warm-up step cache failed: %r", exc)
+        primed = 0
+
+    print(
+        f"Worker warmed up in {time.perf_counter() - started:.2f}s "
+        f"({primed} cached parameter rows)."
+    )
@@ -0,0 +1,100 @@
+"""
+Compare the ORM and raw asyncpg reads behind GET /v1/user_parameters on a
+cache miss.
+
+Run with:
+    TESTING=true python -m benchmarks.bench_raw_reads [--number N]
+
+Needs the database. One user is inserted for the run and deleted after.
+Each read opens its own session, the way a request does, and ends with the
+response body; the time includes the round trip to Postgres.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database.session import asyncpg_connect_args
+from app.models import UserParameter, Users
+from app.services.user_parameter_service import (
+    UserParameterDatamanager,
+    UserParameterService,
+    serialize_user_parameters,
+)
+
+
+async def orm_read(session: AsyncSession, user_id: uuid.UUID) -> bytes:
+    data_manager = UserParameterDatamanager(session)
+    return serialize_user_parameters(
+        await data_manager.get_user_params_by_user_id(user_id)
+    )
+
+
+async def raw_read(session: AsyncSession, user_id: uuid.UUID) -> bytes:
+    body, _ = await UserParameterDatamanager(session).get_user_params_json(user_id)
+    return body
+
+
+async def run(number: int) -> None:
+    engine = create_async_engine(
+        str(settings.ASYNC_SQL_DATABASE_URI), connect_args=asyncpg_connect_args()
+    )
+    user = Users(
+        username=f"bench-raw-{uuid.uuid4().hex[:8]}",
+        email=f"{uuid.uuid4().hex[:8]}@bench.invalid",
+        hashed_password="unused",
+    )
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add(user)
+        await session.flush()
+        await UserParameterService(UserParameterDatamanager(session)).add_parameter(
+            user.id
+        )
+        await session.commit()
+
+    try:
+        cases = [orm_read, raw_read]
+        bodies = []
+        for case in cases:
+            async with AsyncSession(engine) as session:
+                bodies.append(json.loads(await case(session, user.id)))
+        assert bodies[0] == bodies[1]
+
+        baseline = None
+        print(f"{'path':<12}{'µs/op':>10}{'speedup':>10}")
+        for case in cases:
+            best = float("inf")
+            for _ in range(3):
+                started = time.perf_counter()
+                for _ in range(number):
+                    async with AsyncSession(engine) as session:
+                        await case(session, user.id)
+                best = min(best, time.perf_counter() - started)
+            per_op = best / number * 1e6
+            baseline = baseline or per_op
+            print(f"{case.__name__:<12}{per_op:>10.1f}{baseline / per_op:>9.1f}x")
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                delete(UserParameter).where(UserParameter.user_id == user.id)
+            )
+            await session.execute(delete(Users).where(Users.id == user.id))
+            await session.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare response serialization paths for a UserParameter row.
+
+Run with:
+    TESTING=true python -m benchmarks.bench_serialization [--number N]
+
+No database is needed; the row is built the way the ORM hands it back, with
+JSONB columns as plain dicts. raw_fragments starts from JSONB text as selected
+by a raw read, so it also saves the driver's JSON decode, which is not timed.
+"""
+
+import argparse
+import asyncio
+import json
+import timeit
+import uuid
+import warnings
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.models.user_parameter_model import UserParameter
+from app.routers.user_parameters_route import router
+from app.serialization import RawJSON, dump_model, encode_object
+
+JSONB_FIELDS = (
+    "uv_index_threshold",
+    "aqi_threshold",
+    "wind_speed_threshold",
+    "rain_chance_threshold",
+    "pm10_threshold",
+    "pm2_5_threshold",
+    "allergens",
+)
+
+
+def make_row() -> UserParameter:
+    """Build a UserParameter shaped like one loaded from Postgres."""
+    defaults = UserParameter(user_id=uuid.uuid4(), preferred_lat=51.5, preferred_lon=0.1)
+    row = UserParameter(**defaults.model_dump())
+    for name in JSONB_FIELDS:
+        setattr(row, name, getattr(defaults, name).model_dump())
+    row.time_created = row.time_updated = datetime.now(timezone.utc)
+    return row
+
+
+def response_field():
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.name == "get_user_params_by_user_id":
+            return route.response_field
+    raise LookupError("get_user_params_by_user_id route not found")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+    # FastAPI's generic path warns about the dict-valued JSONB columns.
+    warnings.simplefilter("ignore", UserWarning)
+
+    row = make_row()
+    field = response_field()
+    # What the raw read path gets back when JSONB columns are selected as text.
+    jsonb_text = {name: json.dumps(getattr(row, name)) for name in JSONB_FIELDS}
+    loop = asyncio.new_event_loop()
+
+    def fastapi_generic() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=row)
+        )
+        return JSONResponse(content).body
+
+    def validate_then_dump() -> bytes:
+        return (
+            UserParameter.model_validate(row, from_attributes=True)
+            .model_dump_json()
+            .encode()
+        )
+
+    def precompiled() -> bytes:
+        return dump_model(row)
+
+    def raw_fragments() -> bytes:
+        return encode_object(
+            (name, RawJSON(jsonb_text[name]) if name in jsonb_text else value)
+            for name, value in (
+                (name, getattr(row, name)) for name in UserParameter.model_fields
+            )
+        )
+
+    cases = [fastapi_generic, validate_then_dump, precompiled, raw_fragments]
+    for case in cases:
+        assert json.loads(case()) == json.loads(precompiled()), case.__name__
+
+    baseline = None
+    print(f"{'path':<22}{'µs/op':>10}{'speedup':>10}")
+    for case in cases:
+        seconds = min(timeit.repeat(case, number=args.number, repeat=3))
+        per_op = seconds / args.number * 1e6
+        baseline = baseline or per_op
+        print(f"{case.__name__:<22}{per_op:>10.2f}{baseline / per_op:>9.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+In-process load benchmark for the API hot paths.
+
+Drives the app through httpx.ASGITransport (no sockets, no server) at a fixed
+concurrency against the configured database, records throughput and latency
+percentiles per scenario and compares them with a stored baseline.
+
+Run with the test database up:
+    TESTING=true python -m benchmarks.load
+    TESTING=true python -m benchmarks.load --save-baseline
+    TESTING=true python -m benchmarks.load --scenarios auth_me,get_user_params
+
+The process exits non-zero when a scenario regresses past --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import delete, select
+from sqlmodel import SQLModel
+
+from app.main import app
+from app.models import UserParameter, Users
+
+BENCHMARK_DIR = Path(__file__).parent
+DEFAULT_OUTPUT = BENCHMARK_DIR / "results" / "latest.json"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+PASSWORD = "benchmark-password"
+
+
+@dataclass
+class BenchUser:
+    username: str
+    user_id: uuid.UUID
+    token: str
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    concurrency: int
+    duration_s: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LoadRunner:
+    def __init__(self, client: AsyncClient, users: list[BenchUser], run_id: str):
+        self.client = client
+        self.users = users
+        self.run_id = run_id
+        self._counter = 0
+
+    def _next_user(self) -> BenchUser:
+        self._counter += 1
+        return self.users[self._counter % len(self.users)]
+
+    def _next_username(self) -> str:
+        self._counter += 1
+        return f"bench_{self.run_id}_new_{self._counter}"
+
+    async def auth_token(self) -> Response:
+        user = self._next_user()
+        return await self.client.post(
+            "/v1/auth/token", data={"username": user.username, "password": PASSWORD}
+        )
+
+    async def auth_me(self) -> Response:
+        user = self._next_user()
+        return await self.client.get(
+            "/v1/auth/me", headers={"Authorization": f"Bearer {user.token}"}
+        )
+
+    async def create_user(self) -> Response:
+        username = self._next_username()
+        return await self.client.post(
+            "/v1/users",
+            json={
+                "username": username,
+                "email": f"{username}@bench.invalid",
+                "password": PASSWORD,
+            },
+        )
+
+    async def get_user_params(self) -> Response:
+        user = self._next_user()
+        return await self.client.get(f"/v1/user_parameters/{user.user_id}")
+
+    async def patch_user_params(self) -> Response:
+        user = self._next_user()
+        return await self.client.patch(
+            f"/v1/user_parameters/{user.user_id}",
+            json={"preferred_lat": (self._counter % 180) - 90.0},
+        )
+
+    async def run(
+        self,
+        name: str,
+        request: Callable[[], Awaitable[Response]],
+        total: int,
+        concurrency: int,
+    ) -> ScenarioResult:
+        latencies: list[float] = []
+        errors = 0
+        remaining = total
+
+        async def worker() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await request()
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+
+        latencies.sort()
+        return ScenarioResult(
+            name=name,
+            requests=len(latencies),
+            errors=errors,
+            concurrency=concurrency,
+            duration_s=round(duration, 4),
+            throughput_rps=round(len(latencies) / duration, 2),
+            p50_ms=round(percentile(latencies, 50) * 1000, 3),
+            p95_ms=round(percentile(latencies, 95) * 1000, 3),
+            p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        )
+
+
+async def create_bench_users(
+    client: AsyncClient, run_id: str, count: int
+) -> list[BenchUser]:
+    users = []
+    for i in range(count):
+        username = f"bench_{run_id}_{i}"
+        response = await client.post(
+            "/v1/users",
+            json={
+                "username": username,
+                "email": f"{username}@bench.invalid",
+                "password": PASSWORD,
+            },
+        )
+        response.raise_for_status()
+        token = await client.post(
+            "/v1/auth/token", data={"username": username, "password": PASSWORD}
+        )
+        token.raise_for_status()
+        users.append(
+            BenchUser(
+                username=username,
+                user_id=uuid.UUID(int=0),
+                token=token.json()["access_token"],
+            )
+        )
+
+    async with app.state.db_engine.connect() as conn:
+        rows = await conn.execute(
+            select(Users.username, Users.id).where(
+                Users.username.like(f"bench_{run_id}_%")
+            )
+        )
+        ids = dict(rows.all())
+    for user in users:
+        user.user_id = ids[user.username]
+    return users
+
+
+async def drop_bench_users(run_id: str) -> None:
+    async with app.state.db_engine.begin() as conn:
+        bench_ids = select(Users.id).where(Users.username.like(f"bench_{run_id}_%"))
+        await conn.execute(
+            delete(UserParameter).where(UserParameter.user_id.in_(bench_ids))
+        )
+        await conn.execute(delete(Users).where(Users.username.like(f"bench_{run_id}_%")))
+
+
+def compare(
+    results: list[ScenarioResult], baseline: dict, tolerance: float
+) -> list[str]:
+    """Return a message for every scenario that regressed past the tolerance."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.throughput_rps < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: throughput {result.throughput_rps} rps "
+                f"< baseline {base['throughput_rps']} rps"
+            )
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p95 {result.p95_ms} ms > baseline {base['p95_ms']} ms"
+            )
+    return regressions
+
+
+async def run_benchmarks(args: argparse.Namespace) -> list[ScenarioResult]:
+    run_id = uuid.uuid4().hex[:8]
+    # ASGITransport does not send lifespan events, so run them ourselves to
+    # get the same engine and warm state a real worker has.
+    async with app.router.lifespan_context(app):
+        async with app.state.db_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            users = await create_bench_users(client, run_id, args.users)
+            runner = LoadRunner(client, users, run_id)
+            try:
+                results = []
+                for name in args.scenarios:
+                    request = getattr(runner, name)
+                    # Warm up code paths and caches before measuring.
+                    await runner.run(name, request, args.concurrency, args.concurrency)
+                    result = await runner.run(
+                        name, request, args.requests, args.concurrency
+                    )
+                    print(
+                        f"{name:<20}{result.throughput_rps:>10.1f} rps"
+                        f"  p50 {result.p50_ms:>8.2f} ms"
+                        f"  p95 {result.p95_ms:>8.2f} ms"
+                        f"  p99 {result.p99_ms:>8.2f} ms"
+                        f"  errors {result.errors}"
+                    )
+                    results.append(result)
+            finally:
+                await drop_bench_users(run_id)
+    return results
+
+
+SCENARIOS = (
+    "auth_token",
+    "auth_me",
+    "create_user",
+    "get_user_params",
+    "patch_user_params",
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-process API load benchmark.")
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"Comma separated subset of: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="Allowed fractional regression in throughput and p95.",
+    )
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run_benchmarks(args))
+    report = {result.name: asdict(result) for result in results}
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
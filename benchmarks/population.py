@@ -0,0 +1,154 @@
+"""
+Deterministic synthetic population of Users and UserParameter rows.
+
+Users cluster around metro areas weighted roughly by population, with a thin
+uniform background over land-ish latitudes, and thresholds drawn around the
+model defaults. The same seed always yields the same rows, including ids.
+"""
+
+import math
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from app.models.constants import Allergens
+from app.models.user_model import CustomRoles
+
+# (name, lat, lon, relative weight, spread in km)
+METRO_AREAS = (
+    ("tokyo", 35.68, 139.69, 37, 40),
+    ("delhi", 28.61, 77.21, 32, 35),
+    ("shanghai", 31.23, 121.47, 29, 35),
+    ("sao_paulo", -23.55, -46.63, 22, 35),
+    ("mexico_city", 19.43, -99.13, 22, 30),
+    ("cairo", 30.04, 31.24, 21, 25),
+    ("mumbai", 19.08, 72.88, 21, 25),
+    ("new_york", 40.71, -74.01, 19, 40),
+    ("buenos_aires", -34.60, -58.38, 15, 30),
+    ("istanbul", 41.01, 28.98, 15, 30),
+    ("lagos", 6.52, 3.38, 15, 25),
+    ("los_angeles", 34.05, -118.24, 13, 45),
+    ("paris", 48.86, 2.35, 11, 25),
+    ("london", 51.51, -0.13, 10, 30),
+    ("seoul", 37.57, 126.98, 10, 25),
+    ("jakarta", -6.21, 106.85, 10, 30),
+    ("chicago", 41.88, -87.63, 9, 35),
+    ("sydney", -33.87, 151.21, 5, 35),
+    ("berlin", 52.52, 13.40, 4, 20),
+    ("toronto", 43.65, -79.38, 6, 30),
+    ("tulsa", 36.15, -95.99, 1, 20),
+)
+# Share of users placed uniformly rather than around a metro area.
+BACKGROUND_SHARE = 0.05
+KM_PER_DEG_LAT = 111.32
+
+# parameter name: (default importance, default value, sd, min, max)
+THRESHOLD_DISTRIBUTIONS = {
+    "uv_index_threshold": (5, 6.0, 1.5, 1.0, 11.0),
+    "aqi_threshold": (5, 100.0, 30.0, 20.0, 300.0),
+    "wind_speed_threshold": (3, 10.0, 3.0, 2.0, 30.0),
+    "rain_chance_threshold": (7, 0.5, 0.15, 0.05, 1.0),
+    "pm10_threshold": (4, 50.0, 15.0, 10.0, 200.0),
+    "pm2_5_threshold": (4, 35.0, 10.0, 5.0, 150.0),
+}
+ALLERGEN_NAMES = [a.value for a in Allergens if a is not Allergens.NONE]
+# Probability that a user lists any allergens at all.
+ALLERGY_RATE = 0.3
+ROLE_WEIGHTS = (
+    (CustomRoles.BASIC, 70),
+    (CustomRoles.PREMIUM, 10),
+    (CustomRoles.UNCONFIRMED, 10),
+    (CustomRoles.ANONYMOUS, 10),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticUser:
+    id: uuid.UUID
+    username: str
+    email: str
+    auth_role: CustomRoles
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticParameters:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    preferred_lat: float
+    preferred_lon: float
+    thresholds: dict[str, dict]
+    time_created: datetime
+
+
+class PopulationGenerator:
+    def __init__(self, seed: int, epoch: datetime | None = None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.epoch = epoch or datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self._metro_weights = [m[3] for m in METRO_AREAS]
+        self._role_weights = [w for _, w in ROLE_WEIGHTS]
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def location(self) -> tuple[float, float]:
+        rng = self.rng
+        if rng.random() < BACKGROUND_SHARE:
+            return rng.uniform(-55.0, 70.0), rng.uniform(-180.0, 180.0)
+        _, lat, lon, _, spread_km = rng.choices(METRO_AREAS, self._metro_weights)[0]
+        lat += rng.gauss(0.0, spread_km) / KM_PER_DEG_LAT
+        lon += rng.gauss(0.0, spread_km) / (
+            KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01)
+        )
+        lat = min(max(lat, -90.0), 90.0)
+        lon = (lon + 180.0) % 360.0 - 180.0
+        return round(lat, 5), round(lon, 5)
+
+    def thresholds(self) -> dict[str, dict]:
+        rng = self.rng
+        thresholds = {}
+        for name, (importance, mean, sd, low, high) in THRESHOLD_DISTRIBUTIONS.items():
+            thresholds[name] = {
+                "importance": min(max(round(rng.gauss(importance, 2.0)), 0), 10),
+                "parameter_name": name,
+                "parameter_value": round(min(max(rng.gauss(mean, sd), low), high), 2),
+                "parameter_array_value": None,
+            }
+        allergens = []
+        if rng.random() < ALLERGY_RATE:
+            allergens = rng.sample(ALLERGEN_NAMES, k=rng.randint(1, 3))
+        thresholds["allergens"] = {
+            "importance": min(max(round(rng.gauss(5, 2.0)), 0), 10),
+            "parameter_name": "allergens",
+            "parameter_value": None,
+            "parameter_array_value": allergens,
+        }
+        return thresholds
+
+    def generate(
+        self, count: int, start: int = 0
+    ) -> Iterator[tuple[SyntheticUser, SyntheticParameters]]:
+        """Yield count users and their parameters, numbered from start."""
+        rng = self.rng
+        for n in range(start, start + count):
+            user = SyntheticUser(
+                id=self._uuid(),
+                username=f"synthetic_{self.seed}_{n}",
+                email=f"synthetic_{self.seed}_{n}@population.invalid",
+                auth_role=rng.choices(
+                    [role for role, _ in ROLE_WEIGHTS], self._role_weights
+                )[0],
+            )
+            lat, lon = self.location()
+            params = SyntheticParameters(
+                id=self._uuid(),
+                user_id=user.id,
+                preferred_lat=lat,
+                preferred_lon=lon,
+                thresholds=self.thresholds(),
+                time_created=self.epoch
+                + timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            )
+            yield user, params
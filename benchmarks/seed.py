@@ -0,0 +1,139 @@
+"""
+Bulk-seed a synthetic population of users and parameters.
+
+Rows come from benchmarks.population and are loaded with asyncpg's
+copy_records_to_table, which streams binary-format COPY, instead of going
+through the ORM. Every synthetic user shares one precomputed Argon2 hash so
+seeding is not bound by password hashing.
+
+    TESTING=true python -m benchmarks.seed --users 1000000 --seed 42
+    TESTING=true python -m benchmarks.seed --seed 42 --drop
+
+Usernames are namespaced by seed, so several populations can coexist and
+--drop removes exactly one of them.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import asyncpg
+from argon2 import PasswordHasher
+
+from app.config import settings
+from benchmarks.population import PopulationGenerator
+
+PASSWORD = "benchmark-password"
+USER_COLUMNS = (
+    "id",
+    "username",
+    "email",
+    "is_active",
+    "is_superuser",
+    "hashed_password",
+    "auth_role",
+)
+PARAMETER_COLUMNS = (
+    "id",
+    "user_id",
+    "preferred_lat",
+    "preferred_lon",
+    "uv_index_threshold",
+    "aqi_threshold",
+    "wind_speed_threshold",
+    "rain_chance_threshold",
+    "pm10_threshold",
+    "pm2_5_threshold",
+    "allergens",
+    "time_created",
+    "time_updated",
+)
+THRESHOLD_COLUMNS = PARAMETER_COLUMNS[4:11]
+
+
+async def seed(users: int, seed_value: int, batch_size: int) -> None:
+    generator = PopulationGenerator(seed_value)
+    hashed_password = PasswordHasher().hash(PASSWORD)
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+    conn = await asyncpg.connect(str(settings.ASYNCPG_DATABASE_URI))
+    try:
+        started = time.perf_counter()
+        for start in range(0, users, batch_size):
+            count = min(batch_size, users - start)
+            user_rows = []
+            parameter_rows = []
+            for user, params in generator.generate(count, start):
+                user_rows.append(
+                    (
+                        user.id,
+                        user.username,
+                        user.email,
+                        True,
+                        False,
+                        hashed_password,
+                        # The custom_roles enum stores member names.
+                        user.auth_role.name,
+                    )
+                )
+                parameter_rows.append(
+                    (
+                        params.id,
+                        params.user_id,
+                        params.preferred_lat,
+                        params.preferred_lon,
+                        *(dumps(params.thresholds[name]) for name in THRESHOLD_COLUMNS),
+                        params.time_created,
+                        params.time_created,
+                    )
+                )
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    "users", records=user_rows, columns=USER_COLUMNS
+                )
+                await conn.copy_records_to_table(
+                    "user_parameters", records=parameter_rows, columns=PARAMETER_COLUMNS
+                )
+            done = start + count
+            elapsed = time.perf_counter() - started
+            print(f"{done:>10} users  {elapsed:8.1f}s  {done / elapsed:10.0f} users/s")
+    finally:
+        await conn.close()
+
+
+async def drop(seed_value: int) -> None:
+    conn = await asyncpg.connect(str(settings.ASYNCPG_DATABASE_URI))
+    pattern = f"synthetic\\_{seed_value}\\_%"
+    try:
+        async with conn.transaction():
+            await conn.execute(
+                "DELETE FROM user_parameters WHERE user_id IN "
+                "(SELECT id FROM users WHERE username LIKE $1)",
+                pattern,
+            )
+            status = await conn.execute(
+                "DELETE FROM users WHERE username LIKE $1", pattern
+            )
+        print(status)
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic population.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument(
+        "--drop", action="store_true", help="Remove the population for --seed."
+    )
+    args = parser.parse_args()
+    if args.drop:
+        asyncio.run(drop(args.seed))
+    else:
+        asyncio.run(seed(args.users, args.seed, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measure how long a fresh interpreter takes to import the app.
+
+Each run is a new subprocess, so nothing is cached in sys.modules:
+    TESTING=true python -m benchmarks.startup [--runs 5] [--top 15]
+
+--top lists the slowest modules by cumulative import time from
+python -X importtime, which is where to look when the budget is exceeded.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE = "app.main"
+# Wall-clock budget for `import app.main`, enforced by tests/unit_tests/test_startup.py.
+# Override with IMPORT_TIME_BUDGET_SECONDS on slower machines.
+DEFAULT_BUDGET_SECONDS = 2.5
+
+_TIMER = (
+    "import time; started = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def import_budget() -> float:
+    return float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS))
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("TESTING", "true")
+    return env
+
+
+def measure_import(module: str = MODULE, runs: int = 3) -> list[float]:
+    """Return the import wall time of module in runs fresh interpreters."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=_env(),
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def slowest_imports(module: str = MODULE, top: int = 15) -> list[tuple[int, str]]:
+    """Return (cumulative microseconds, module) for the slowest imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_env(),
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure app import time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings = measure_import(runs=args.runs)
+    budget = import_budget()
+    print(
+        f"import {MODULE}: median {statistics.median(timings):.3f}s, "
+        f"best {min(timings):.3f}s over {args.runs} runs (budget {budget:.2f}s)"
+    )
+    print("\nslowest imports (cumulative):")
+    for cumulative, name in slowest_imports(top=args.top):
+        print(f"{cumulative / 1000:>10.1f} ms  {name}")
+    return 0 if min(timings) <= budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.services.digest_scheduler import DigestScheduler
+from app.services.user_parameter_service import (
+    UserParameterDatamanager,
+    UserParameterService,
+)
+from app.services.user_service import UserDataManager, UserService
+
+DSN = str(settings.ASYNCPG_DATABASE_URI)
+
+
+async def nothing(session, user_ids):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_one_scheduler_leads(engine: AsyncEngine):
+    """Tests that the advisory lock lets a single scheduler take the lead."""
+    first = DigestScheduler(nothing, 7 * 60, DSN)
+    second = DigestScheduler(nothing, 7 * 60, DSN)
+    try:
+        assert await first._take_lead()
+        assert not await second._take_lead()
+        await first.stop()
+        assert await second._take_lead()
+    finally:
+        await first.stop()
+        await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_wheel_follows_locations_and_fires(session: AsyncSession):
+    """Tests loading, incremental moves and firing the users due each minute."""
+    param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(UserDataManager(session), param_service)
+    home = await user_service.add_user("home", "home@test.com", "password")
+    away = await user_service.add_user("away", "away@test.com", "password")
+    fired = []
+
+    async def record(session, user_ids):
+        fired.append(sorted(user_ids))
+
+    scheduler = DigestScheduler(record, 7 * 60, DSN)
+    assert await scheduler._take_lead()
+    try:
+        await scheduler.tick(session, 1_000 * 1440)
+        # The default location, 95.98°E, is UTC+6: 07:00 there is 01:00 UTC.
+        assert scheduler.wheel.slot_of(home.id) == 60
+        assert len(scheduler.wheel) == 2
+
+        params = await param_service.get_user_params_by_user_id(away.id)
+        params.preferred_lon = -0.1
+        await session.flush()
+        scheduler.invalidate(away.id)
+        await scheduler.tick(session, 1_000 * 1440 + 59)
+        assert scheduler.wheel.slot_of(away.id) == 420
+        assert fired == []
+
+        scheduler.move(home.id, 40.7, -74.0)
+        await scheduler.tick(session, 1_000 * 1440 + 12 * 60)
+        assert fired == [[away.id], [home.id]]
+    finally:
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_wheel_spreads_users(session: AsyncSession):
+    """Tests that loaded users land in their spread slot."""
+    param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(UserDataManager(session), param_service)
+    user = await user_service.add_user("spread", "spread@test.com", "password")
+
+    scheduler = DigestScheduler(nothing, 7 * 60, DSN, spread=30)
+    assert await scheduler._take_lead()
+    try:
+        await scheduler.tick(session, 1_000 * 1440)
+        slot = scheduler.wheel.slot_of(user.id)
+        assert slot == scheduler.slot_for(user.id, 95.98)
+        assert 60 <= slot < 90
+    finally:
+        await scheduler.stop()
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.forecast_model import CellForecast, HourlyConditions
+from app.services.forecast_service import forecast_service
+from app.services.grid import cell_id_for
+from app.services.user_parameter_service import (
+    UserParameterDatamanager,
+    UserParameterService,
+)
+from app.services.user_service import UserDataManager, UserService
+
+
+@pytest.mark.asyncio
+async def test_get_user_forecast(client: AsyncClient, session: AsyncSession):
+    """
+    Test that the forecast is served with an ETag and revalidates with a 304.
+    """
+    user_param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(UserDataManager(session), user_param_service)
+    user = await user_service.add_user("test_user", "test@test.com", "test_password")
+    params = await user_param_service.get_user_params_by_user_id(user.id)
+
+    not_ready = await client.get(f"/v1/forecast/{user.id}")
+    assert not_ready.status_code == 503
+
+    forecast_service.publish_forecast(
+        CellForecast(
+            cell_id=cell_id_for(params.preferred_lat, params.preferred_lon),
+            issued_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
+            hours=[
+                HourlyConditions(
+                    # Around midday at the default location, so the UV counts.
+                    time=datetime(2025, 6, 1, 6, tzinfo=timezone.utc),
+                    temperature=25.0,
+                    wind_speed=3.0,
+                    uv_index=9.0,
+                    rain_chance=0.0,
+                    aqi=30.0,
+                    pm10=10.0,
+                    pm2_5=5.0,
+                )
+            ],
+        )
+    )
+
+    response = await client.get(f"/v1/forecast/{user.id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    alerts = response.json()["hours"][0]["alerts"]
+    assert [a["parameter_name"] for a in alerts] == ["uv_index_threshold"]
+
+    not_modified = await client.get(
+        f"/v1/forecast/{user.id}", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
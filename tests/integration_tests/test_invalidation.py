@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+
+import asyncpg
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.cache.invalidation import InvalidationBus
+from app.cache.lru import LRUCache
+from app.config import settings
+
+
+async def wait_until(predicate, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_committed_publish_evicts_in_other_process(engine: AsyncEngine):
+    """Tests that another bus receives a committed invalidation and evicts it."""
+    listener = InvalidationBus(str(settings.ASYNCPG_DATABASE_URI), "test_invalidation")
+    writer = InvalidationBus(str(settings.ASYNCPG_DATABASE_URI), "test_invalidation")
+    cache = LRUCache(10)
+    rolled_back, committed = uuid.uuid4(), uuid.uuid4()
+    cache.put(rolled_back, "value")
+    cache.put(committed, "value")
+    listener.register("params", cache)
+    await listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), 5)
+        async with AsyncSession(engine) as session:
+            await writer.publish(session, "params", rolled_back)
+            await session.rollback()
+            await writer.publish(session, "params", committed)
+            await session.commit()
+
+        await wait_until(lambda: committed not in cache)
+        assert rolled_back in cache
+    finally:
+        await listener.stop()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_flushes_caches():
+    """Tests that losing the listener connection ends in a reconnect and full flush."""
+    bus = InvalidationBus(str(settings.ASYNCPG_DATABASE_URI), "test_invalidation")
+    cache = LRUCache(10)
+    cache.put(uuid.uuid4(), "value")
+    bus.register("params", cache)
+    await bus.start()
+    try:
+        await asyncio.wait_for(bus.connected.wait(), 5)
+        pid = bus._connection.get_server_pid()
+        admin = await asyncpg.connect(str(settings.ASYNCPG_DATABASE_URI))
+        try:
+            await admin.execute("SELECT pg_terminate_backend($1)", pid)
+        finally:
+            await admin.close()
+
+        await wait_until(lambda: len(cache) == 0)
+        await asyncio.wait_for(bus.connected.wait(), 5)
+        assert bus._connection.get_server_pid() != pid
+    finally:
+        await bus.stop()
@@ -0,0 +1,23 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_search_locations(client: AsyncClient):
+    response = await client.get("/v1/locations", params={"q": "lond", "limit": 3})
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "name": "London",
+            "country": "GB",
+            "lat": 51.5085,
+            "lon": -0.1257,
+            "population": 8961989,
+        }
+    ]
+
+    ranked = await client.get("/v1/locations", params={"q": "san"})
+    names = [location["name"] for location in ranked.json()]
+    assert names[0] == "Santiago" and len(names) == 5
+
+    assert (await client.get("/v1/locations", params={"q": ""})).status_code == 422
@@ -0,0 +1,32 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_metrics_scrape(client: AsyncClient):
+    """
+    Test that handled requests show up in the Prometheus exposition.
+    """
+    await client.get("/kiss")
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{route="/kiss",method="GET",status="200"}' in (
+        response.text
+    )
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_hidden_from_remote_clients():
+    """
+    Test that /metrics is not served to non-local clients.
+    """
+    transport = ASGITransport(app=app, client=("203.0.113.9", 4000))
+    async with AsyncClient(transport=transport, base_url="http://test") as remote:
+        response = await remote.get("/metrics")
+    assert response.status_code == 404
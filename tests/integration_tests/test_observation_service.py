@@ -0,0 +1,189 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.models.observation_model import MetricSummary, WeatherObservation
+from app.services.observation_service import (
+    DAILY,
+    MAINTENANCE_LOCK_ID,
+    WEEKLY,
+    ObservationDataManager,
+    ObservationService,
+    PartitionMaintainer,
+    choose_tier,
+    partition_name,
+    run_partition_maintenance,
+)
+
+TODAY = date(2025, 6, 10)
+MIDNIGHT = datetime(2025, 6, 10, tzinfo=timezone.utc)
+
+
+def make_observation(cell_id: int, time: datetime, **overrides) -> WeatherObservation:
+    values = dict(
+        cell_id=cell_id,
+        time=time,
+        temperature=20.5,
+        wind_speed=3.0,
+        uv_index=5.0,
+        rain_chance=0.25,
+        aqi=42.0,
+        pm10=11.0,
+        pm2_5=6.5,
+        allergens={"birch_pollen": 30.0},
+    )
+    values.update(overrides)
+    return WeatherObservation(**values)
+
+
+async def partitions(session: AsyncSession) -> list[str]:
+    rows = await session.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'weather_observations'::regclass ORDER BY 1"
+        )
+    )
+    return list(rows)
+
+
+def days(first: date, last: date) -> list[str]:
+    return [
+        partition_name(first + timedelta(days=n))
+        for n in range((last - first).days + 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_record_and_query_cell_range(engine: AsyncEngine, session: AsyncSession):
+    """Tests that a COPY batch lands in daily partitions and reads back by range."""
+    await run_partition_maintenance(engine, 7, today=TODAY)
+    assert await partitions(session) == days(date(2025, 6, 3), date(2025, 6, 12))
+
+    service = ObservationService(ObservationDataManager(session), retention_days=7)
+    hours = [MIDNIGHT - timedelta(hours=1) + timedelta(hours=h) for h in range(3)]
+    batch = [make_observation(cell, hour) for hour in hours for cell in (9, 3)]
+    assert await service.record(reversed(batch), today=TODAY) == 6
+
+    found = await service.get_observations(3, hours[0], hours[2])
+    assert [o.time for o in found] == hours[:2]
+    assert found[0] == make_observation(3, hours[0])
+
+
+@pytest.mark.asyncio
+async def test_maintenance_drops_partitions_past_retention(engine: AsyncEngine):
+    """Tests that old daily partitions, and observations that old, are dropped."""
+    old = MIDNIGHT - timedelta(days=8)
+    await run_partition_maintenance(engine, 7, today=TODAY - timedelta(days=2))
+    async with AsyncSession(engine) as session:
+        service = ObservationService(ObservationDataManager(session), retention_days=7)
+        await service.record(
+            [make_observation(1, old)], today=TODAY - timedelta(days=2)
+        )
+        await session.commit()
+
+    dropped = await run_partition_maintenance(engine, 7, today=TODAY)
+    assert dropped == [date(2025, 6, 1), old.date()]
+    async with AsyncSession(engine) as session:
+        service = ObservationService(ObservationDataManager(session), retention_days=7)
+        assert await partitions(session) == days(date(2025, 6, 3), date(2025, 6, 12))
+        recorded = await service.record(
+            [make_observation(1, old), make_observation(1, MIDNIGHT)], today=TODAY
+        )
+        assert recorded == 1
+        found = await service.get_observations(1, old, MIDNIGHT + timedelta(hours=1))
+        assert found == [make_observation(1, MIDNIGHT)]
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_runs_in_one_process_at_a_time(engine: AsyncEngine):
+    """Tests that maintenance is skipped while another process holds the lock."""
+    async with engine.connect() as other:
+        await other.execute(
+            text("SELECT pg_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+        )
+        assert await run_partition_maintenance(engine, 7, today=TODAY) is None
+        await other.execute(
+            text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+        )
+    assert await run_partition_maintenance(engine, 7, today=TODAY) == []
+
+
+@pytest.mark.asyncio
+async def test_maintainer_creates_partitions_in_the_background(engine: AsyncEngine):
+    """Tests that the scheduled maintainer keeps today's partition ready."""
+    maintainer = PartitionMaintainer(retention_days=7, interval=3600)
+    await maintainer.start(engine)
+    today = partition_name(datetime.now(timezone.utc).date())
+    try:
+        for _ in range(100):
+            async with AsyncSession(engine) as session:
+                if today in await partitions(session):
+                    break
+            await asyncio.sleep(0.05)
+    finally:
+        await maintainer.stop()
+    async with AsyncSession(engine) as session:
+        assert today in await partitions(session)
+
+
+@pytest.mark.asyncio
+async def test_record_does_not_block_readers(engine: AsyncEngine):
+    """Tests that an open ingest transaction holds no exclusive lock on the parent."""
+    await run_partition_maintenance(engine, 7, today=TODAY)
+    async with AsyncSession(engine) as session:
+        service = ObservationService(ObservationDataManager(session), retention_days=7)
+        await service.record([make_observation(1, MIDNIGHT)], today=TODAY)
+        async with engine.connect() as reader:
+            await reader.execute(text("SET lock_timeout = '1s'"))
+            modes = await reader.scalars(
+                text(
+                    "SELECT mode FROM pg_locks "
+                    "WHERE relation = 'weather_observations'::regclass"
+                )
+            )
+            assert "AccessExclusiveLock" not in set(modes)
+            # Uncommitted, so not visible yet, but not waited on either.
+            count = text("SELECT count(*) FROM weather_observations")
+            assert await reader.scalar(count) == 0
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_rollups_merge_batches_and_pick_tier(
+    engine: AsyncEngine, session: AsyncSession
+):
+    """Tests that batches merge into the rollups and summaries use the right tier."""
+    await run_partition_maintenance(engine, 30, today=TODAY)
+    service = ObservationService(ObservationDataManager(session), retention_days=30)
+    monday = datetime(2025, 6, 2, tzinfo=timezone.utc)
+    for day, temperature in ((0, 10.0), (0, 20.0), (1, 30.0), (7, 40.0)):
+        time = monday + timedelta(days=day)
+        await service.record(
+            [
+                make_observation(5, time, temperature=temperature),
+                make_observation(6, time, temperature=-1.0),
+            ],
+            today=TODAY,
+        )
+
+    daily = await service.summarize(5, monday.date(), monday.date() + timedelta(days=2))
+    assert [(s.bucket_start.day, s.observations) for s in daily] == [(2, 2), (3, 1)]
+    assert daily[0].metrics["temperature"] == MetricSummary(min=10, max=20, mean=15)
+
+    weekly = await service.summarize(
+        5, monday.date(), monday.date() + timedelta(days=14), step_days=7
+    )
+    assert [(s.bucket_start.day, s.observations) for s in weekly] == [(2, 3), (9, 1)]
+    assert weekly[0].metrics["temperature"] == MetricSummary(min=10, max=30, mean=20)
+
+
+def test_choose_tier():
+    monday, tuesday = date(2025, 6, 2), date(2025, 6, 3)
+    assert choose_tier(monday, monday + timedelta(days=28), 7) is WEEKLY
+    assert choose_tier(monday, monday + timedelta(days=28), 14) is WEEKLY
+    assert choose_tier(tuesday, tuesday + timedelta(days=28), 7) is DAILY
+    assert choose_tier(monday, monday + timedelta(days=28), 1) is DAILY
@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.database.statements import StatementRegistry, statements
+from app.observability.metrics import SQL_COMPILE_CACHE
+from app.observability.sql import instrument_engine
+from app.services.user_parameter_service import UserParameterDatamanager
+
+
+def test_registry_rejects_duplicate_names():
+    registry = StatementRegistry()
+    registry.register("hot", statements["user_by_username"])
+    with pytest.raises(ValueError):
+        registry.register("hot", statements["user_by_username"])
+
+
+@pytest.mark.asyncio
+async def test_hot_statements_compile_once(engine: AsyncEngine):
+    """Tests that a registered statement misses the compiled cache only once
+    per engine, whatever the parameter values, and is counted by name."""
+    instrument_engine(engine.sync_engine)
+    name = "user_params_by_user_id"
+    misses = SQL_COMPILE_CACHE.value(name, "miss")
+    hits = SQL_COMPILE_CACHE.value(name, "hit")
+
+    async with AsyncSession(engine) as session:
+        data_manager = UserParameterDatamanager(session)
+        for _ in range(3):
+            assert await data_manager.get_user_params_by_user_id(uuid.uuid4()) is None
+        assert await data_manager.get_user_params_by_user_ids([uuid.uuid4()]) == []
+
+    assert SQL_COMPILE_CACHE.value(name, "miss") == misses + 1
+    assert SQL_COMPILE_CACHE.value(name, "hit") == hits + 2
+    assert SQL_COMPILE_CACHE.value("user_params_by_user_ids", "miss") >= 1
+
+
+@pytest.mark.asyncio
+async def test_failed_statement_keeps_its_error(engine: AsyncEngine):
+    """Tests that a failing statement raises its own error through the hooks
+    and leaves no start time behind on the connection."""
+    instrument_engine(engine.sync_engine)
+    async with engine.connect() as connection:
+        with pytest.raises(ProgrammingError, match="no_such_table"):
+            await connection.execute(text("SELECT * FROM no_such_table"))
+        assert connection.sync_connection.info["query_started"] == {}
@@ -0,0 +1,50 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.models import UserParameter, Users
+from app.services.stations import Station, StationIndex, remap_stations
+
+
+@pytest.mark.asyncio
+async def test_stations_are_mapped_on_write(client: AsyncClient, session: AsyncSession):
+    """Tests that creating a user and moving them both set their station."""
+    response = await client.post(
+        "/v1/users",
+        json={"username": "traveller", "email": "t@test.com", "password": "password"},
+    )
+    assert response.status_code == 200
+    user = (
+        await session.execute(select(Users).where(Users.username == "traveller"))
+    ).scalar_one()
+    params = (
+        await session.execute(
+            select(UserParameter).where(UserParameter.user_id == user.id)
+        )
+    ).scalar_one()
+    # The default location is in the Indian Ocean, nearest to Perth.
+    assert params.station_id == "YPPH"
+
+    patched = await client.patch(
+        f"/v1/user_parameters/{user.id}",
+        json={"preferred_lat": 51.5, "preferred_lon": -0.1},
+    )
+    assert patched.json()["station_id"] == "EGLL"
+
+
+@pytest.mark.asyncio
+async def test_remap_updates_only_changed_rows(
+    client: AsyncClient, session: AsyncSession
+):
+    for name in ("first", "second"):
+        await client.post(
+            "/v1/users",
+            json={"username": name, "email": f"{name}@test.com", "password": "pw"},
+        )
+    index = StationIndex([Station("OCEAN", "Ocean buoy", -36.0, 96.0)])
+
+    assert await remap_stations(session, index, batch_size=1) == 2
+    assert await remap_stations(session, index, batch_size=1) == 0
+    station_ids = await session.scalars(select(UserParameter.station_id))
+    assert set(station_ids) == {"OCEAN"}
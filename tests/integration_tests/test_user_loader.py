@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.main import app
+from app.models.user_model import Users
+from app.services.auth_service import AuthService
+from app.services.user_loader import UserLoader
+
+
+async def add_committed_users(engine: AsyncEngine, *names: str) -> list[Users]:
+    """Users the loader's own connections can see; the tables are dropped after."""
+    users = [
+        Users(
+            username=name,
+            email=f"{name}@test.com",
+            hashed_password=AuthService.get_password_hash("password"),
+        )
+        for name in names
+    ]
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add_all(users)
+        await session.commit()
+    return users
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_batched(engine: AsyncEngine):
+    """Tests that concurrent lookups by either key issue one query per key type."""
+    alice, bob = await add_committed_users(engine, "alice", "bob")
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    loader = UserLoader(engine)
+
+    by_name = await asyncio.gather(
+        *(loader.get_user_by_user_name(name) for name in ("alice", "bob", "nobody"))
+    )
+    by_id = await asyncio.gather(
+        loader.get_user_by_id(bob.id), loader.get_user_by_id(alice.id)
+    )
+
+    assert [user and user.id for user in by_name] == [alice.id, bob.id, None]
+    assert [user.username for user in by_id] == ["bob", "alice"]
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+    assert all("= ANY (" in statement for statement in selects)
+
+
+@pytest.mark.asyncio
+async def test_login_goes_through_the_loader(client: AsyncClient, engine: AsyncEngine):
+    await add_committed_users(engine, "carol")
+    app.state.user_loader = UserLoader(engine)
+    try:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/v1/auth/token", data={"username": name, "password": "password"}
+                )
+                for name in ("carol", "carol", "dave")
+            )
+        )
+    finally:
+        del app.state.user_loader
+
+    assert [response.status_code for response in responses] == [200, 200, 404]
@@ -1,6 +1,8 @@
+import json
+import logging
 import pytest
 import uuid
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.user_parameter_service import UserParameterService
 from app.services.user_service import UserDataManager, UserService
@@ -8,21 +10,26 @@ from .conftest import client
 from app.services.user_parameter_service import (
     UserParameterDatamanager,
     UserParameterService,
+    serialize_user_parameters,
+    user_parameter_cache,
 )
 
 
+from app.config import settings
+from app.database.session import get_db_session
 from app.main import app
+from app.observability.sql import instrument_engine
 
 
-# @pytest.mark.asyncio
-# async def test_get_user_params_not_found(client: AsyncClient, session: AsyncSession):
-#     """
-#     Test retrieving parameters for a non-existent user.
-#     """
-#     non_existent_user_id = uuid.uuid4()
-#     response = await client.get(f"/v1/user_parameters/{non_existent_user_id}")
-#     assert response.status_code == 404
-#     assert "not found" in response.json()["detail"].lower()
+@pytest.mark.asyncio
+async def test_get_user_params_not_found(client: AsyncClient, session: AsyncSession):
+    """
+    Test retrieving parameters for a non-existent user.
+    """
+    non_existent_user_id = uuid.uuid4()
+    response = await client.get(f"/v1/user_parameters/{non_existent_user_id}")
+    assert response.status_code == 404
+    assert "not found" in response.json()["detail"].lower()
 
 
 @pytest.mark.asyncio
@@ -48,3 +55,124 @@ async def test_get_user_params(client: AsyncClient, session: AsyncSession):
     assert response.json()["user_id"] == str(user.id)
     assert response.json()["id"]
     assert response.json()["time_created"]
+
+
+@pytest.mark.asyncio
+async def test_get_user_params_conditional(client: AsyncClient, session: AsyncSession):
+    """
+    Test that parameter reads revalidate with a 304 and that a PATCH is
+    written through to the cache.
+    """
+    user_data_manager = UserDataManager(session)
+    user_param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(user_data_manager, user_param_service)
+    user = await user_service.add_user("test_user", "test@test.com", "test_password")
+
+    response = await client.get(f"/v1/user_parameters/{user.id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    not_modified = await client.get(
+        f"/v1/user_parameters/{user.id}", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+
+    patched = await client.patch(
+        f"/v1/user_parameters/{user.id}", json={"preferred_lat": 12.5}
+    )
+    assert patched.status_code == 200
+    assert patched.json()["preferred_lat"] == 12.5
+
+    response = await client.get(f"/v1/user_parameters/{user.id}")
+    assert response.json()["preferred_lat"] == 12.5
+    assert response.json()["uv_index_threshold"]["parameter_value"] == 6.0
+
+
+@pytest.mark.asyncio
+async def test_query_budget_is_enforced(
+    client: AsyncClient, session: AsyncSession, engine, monkeypatch, caplog
+):
+    """
+    Test that a request issuing more statements than the budget is logged.
+    """
+    instrument_engine(engine.sync_engine)
+    monkeypatch.setattr("app.observability.middleware.settings.SQL_QUERY_BUDGET", 1)
+    user_param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(UserDataManager(session), user_param_service)
+    user = await user_service.add_user("test_user", "test@test.com", "test_password")
+
+    with caplog.at_level(logging.WARNING, logger="app.observability.middleware"):
+        response = await client.patch(
+            f"/v1/user_parameters/{user.id}", json={"preferred_lon": 1.5}
+        )
+
+    assert response.status_code == 200
+    assert "PATCH /v1/user_parameters/{user_id} issued" in caplog.text
+    assert "(budget 1)" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_raw_reads_serve_the_same_parameters(
+    client: AsyncClient, session: AsyncSession, monkeypatch
+):
+    """Tests that the raw asyncpg read yields the same JSON as the ORM path."""
+    user_param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(UserDataManager(session), user_param_service)
+    user = await user_service.add_user("raw_user", "raw@test.com", "test_password")
+    await session.flush()
+    data_manager = UserParameterDatamanager(session)
+    orm_body = serialize_user_parameters(
+        await data_manager.get_user_params_by_user_id(user.id)
+    )
+
+    body, time_updated = await data_manager.get_user_params_json(user.id)
+    assert json.loads(body) == json.loads(orm_body)
+    assert await data_manager.get_user_params_json(uuid.uuid4()) is None
+
+    monkeypatch.setattr(settings, "USER_PARAMETER_RAW_READS", True)
+    user_parameter_cache.invalidate(user.id)
+    response = await client.get(f"/v1/user_parameters/{user.id}")
+    assert response.status_code == 200
+    assert response.json() == json.loads(orm_body)
+    etag = response.headers["etag"]
+    assert etag.startswith("W/") and etag == user_parameter_cache.get(user.id).etag
+    not_modified = await client.get(
+        f"/v1/user_parameters/{user.id}", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    missing = await client.get(f"/v1/user_parameters/{uuid.uuid4()}")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_user_with_expiring_session(engine):
+    """
+    Test that creating a user works on a session that expires its instances
+    on commit, as the application's sessions do.
+    """
+    async with engine.connect() as connection:
+        async with connection.begin():
+            async with AsyncSession(
+                bind=connection, join_transaction_mode="create_savepoint"
+            ) as expiring_session:
+
+                async def get_test_session():
+                    yield expiring_session
+
+                app.dependency_overrides[get_db_session] = get_test_session
+                try:
+                    async with AsyncClient(
+                        transport=ASGITransport(app=app), base_url="http://test"
+                    ) as test_client:
+                        response = await test_client.post(
+                            "/v1/users",
+                            json={
+                                "username": "expiring",
+                                "email": "expiring@test.com",
+                                "password": "password",
+                            },
+                        )
+                finally:
+                    app.dependency_overrides.clear()
+    assert response.status_code == 200
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.services.user_parameter_service import (
+    UserParameterCache,
+    UserParameterDatamanager,
+    UserParameterService,
+)
+from app.services.user_service import UserDataManager, UserService
+from app.warmup import open_pool_connections, prime_user_parameter_cache
+
+
+@pytest.mark.asyncio
+async def test_open_pool_connections_leaves_them_pooled(engine: AsyncEngine):
+    """Tests that warm-up connections are returned to the pool, not closed."""
+    opened = await open_pool_connections(engine, 2)
+
+    assert opened == 2
+    assert engine.sync_engine.pool.checkedin() == 2
+
+
+@pytest.mark.asyncio
+async def test_prime_user_parameter_cache(session: AsyncSession):
+    """Tests that the most recently updated rows are loaded into the cache."""
+    user_param_service = UserParameterService(UserParameterDatamanager(session))
+    user_service = UserService(UserDataManager(session), user_param_service)
+    user = await user_service.add_user("test_user", "test@test.com", "test_password")
+    await session.flush()
+    cache = UserParameterCache(max_size=10)
+
+    assert await prime_user_parameter_cache(session, cache, limit=0) == 0
+    assert await prime_user_parameter_cache(session, cache, limit=5) == 1
+    assert cache.get(user.id) is not None
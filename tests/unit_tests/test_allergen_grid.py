@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services.allergen_grid import (
+    AllergenGrid,
+    AllergenGridStore,
+    GridSpec,
+    ingest_npz,
+    write_allergen_grid,
+)
+from app.services.forecast_record import ALLERGEN_NAMES
+from app.services.grid import cell_id_for
+
+VALID_AT = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+# 1° grid over Europe: 35..60°N, -10..30°E.
+EUROPE = GridSpec(rows=26, columns=41, lat0=35.0, lon0=-10.0, dlat=1.0, dlon=1.0)
+
+
+def linear_field(spec: GridSpec, slope_lat: float, slope_lon: float) -> np.ndarray:
+    lats = spec.lat0 + spec.dlat * np.arange(spec.rows)
+    lons = spec.lon0 + spec.dlon * np.arange(spec.columns)
+    return slope_lat * lats[:, None] + slope_lon * lons[None, :]
+
+
+@pytest.fixture
+def grid_path(tmp_path):
+    path = str(tmp_path / "allergens.grid")
+    write_allergen_grid(
+        path,
+        {
+            "birch_pollen": linear_field(EUROPE, 2.0, 1.0),
+            "grass_pollen": linear_field(EUROPE, -1.0, 3.0) + 200,
+        },
+        EUROPE,
+        VALID_AT,
+    )
+    return path
+
+
+def test_bilinear_sampling_is_vectorized_and_exact_on_linear_fields(grid_path):
+    """Tests every allergen at every point comes out of one call."""
+    grid = AllergenGrid(grid_path)
+    lats = np.array([51.5, 48.85, 40.4, 60.0])
+    lons = np.array([-0.1, 2.35, -3.7, 30.0])
+
+    values = grid.sample(lats, lons)
+    birch = ALLERGEN_NAMES.index("birch_pollen")
+    grass = ALLERGEN_NAMES.index("grass_pollen")
+    assert values.shape == (len(ALLERGEN_NAMES), 4)
+    np.testing.assert_allclose(values[birch], 2 * lats + lons, rtol=1e-5)
+    np.testing.assert_allclose(values[grass], 200 - lats + 3 * lons, rtol=1e-5)
+    assert np.isnan(values[ALLERGEN_NAMES.index("mold")]).all()
+    assert grid.valid_at == VALID_AT
+
+
+def test_points_outside_the_grid_are_nan(grid_path):
+    grid = AllergenGrid(grid_path)
+    values = grid.sample([10.0, 51.5, np.nan], [0.0, 31.0, 0.0])
+    assert np.isnan(values).all()
+    assert grid.levels([51.5], [-0.1])[0].keys() == {"birch_pollen", "grass_pollen"}
+
+
+def test_global_grids_wrap_around_the_antimeridian(tmp_path):
+    spec = GridSpec(rows=181, columns=360, lat0=-90, lon0=-180, dlat=1, dlon=1)
+    path = str(tmp_path / "global.grid")
+    field = np.zeros((spec.rows, spec.columns))
+    field[:, -1] = 100.0  # 179°E
+    write_allergen_grid(path, {"mold": field}, spec, VALID_AT)
+
+    grid = AllergenGrid(path)
+    mold = ALLERGEN_NAMES.index("mold")
+    # 179.5°E is halfway between 179°E and -180°E.
+    assert grid.sample([0.0], [179.5])[mold, 0] == pytest.approx(50.0)
+    assert grid.sample_cells([cell_id_for(0.0, 179.95)])[mold, 0] == pytest.approx(5.0)
+
+
+def test_swapping_the_file_keeps_old_readers_valid(grid_path):
+    """Tests an atomic swap: old mappings keep their field, the store reopens."""
+    store = AllergenGridStore(grid_path, check_interval=0)
+    old = store.current()
+    before = old.sample([51.5], [-0.1]).copy()
+
+    write_allergen_grid(grid_path, {}, EUROPE, VALID_AT)
+    np.testing.assert_array_equal(old.sample([51.5], [-0.1]), before)
+    new = store.current()
+    assert new is not old
+    assert np.isnan(new.sample([51.5], [-0.1])).all()
+    assert store.current() is new
+
+
+def test_ingest_npz(tmp_path):
+    source = str(tmp_path / "field.npz")
+    lats = np.arange(35.0, 61.0)
+    lons = np.arange(-10.0, 31.0)
+    np.savez(
+        source, lat=lats, lon=lons, ragweed_pollen=linear_field(EUROPE, 0.0, 1.0)
+    )
+    path = str(tmp_path / "allergens.grid")
+
+    assert ingest_npz(source, path, VALID_AT) == EUROPE
+    assert AllergenGrid(path).levels([50.0], [12.25]) == [{"ragweed_pollen": 12.2}]
@@ -0,0 +1,44 @@
+import uuid
+
+import numpy as np
+
+from app.services.digest_scheduler import DigestScheduler, TimingWheel
+from app.services.timezones import utc_minute_of_day, utc_offset_minutes
+
+
+def test_timing_wheel_moves_and_cancels():
+    wheel = TimingWheel()
+    wheel.schedule("a", 10)
+    wheel.schedule("b", 10)
+    wheel.schedule("a", 20)
+
+    assert wheel.due(10) == ["b"]
+    assert wheel.due(20) == ["a"]
+    wheel.cancel("b")
+    wheel.cancel("missing")
+    assert wheel.due(10) == []
+    assert len(wheel) == 1 and "a" in wheel
+
+
+def test_utc_offsets_follow_nautical_zones():
+    assert utc_offset_minutes(-0.1) == 0
+    assert utc_offset_minutes(151.2) == 600
+    assert utc_offset_minutes(np.array([-74.0, 179.9])).tolist() == [-300, 720]
+    # 07:00 in New York (UTC-5) is 12:00 UTC; in Sydney (UTC+10) 21:00 UTC.
+    assert utc_minute_of_day(420, -74.0) == 720
+    assert utc_minute_of_day(420, 151.2) == 1260
+
+
+def test_slots_spread_users_of_a_zone():
+    """Tests that a zone's users are spread over the window, each one stably."""
+    scheduler = DigestScheduler(None, 420, "unused", spread=30)
+    user_ids = [uuid.uuid4() for _ in range(500)]
+    slots = [scheduler.slot_for(user_id, -74.0) for user_id in user_ids]
+
+    assert all(720 <= slot < 750 for slot in slots)
+    assert len(set(slots)) == 30
+    assert slots == [scheduler.slot_for(user_id, -74.0) for user_id in user_ids]
+    # Windows running past midnight UTC wrap around.
+    late = DigestScheduler(None, 23 * 60 + 50, "unused", spread=30)
+    slots = {late.slot_for(user_id, 0.0) for user_id in user_ids}
+    assert slots == set(range(1430, 1440)) | set(range(20))
@@ -0,0 +1,138 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.models.forecast_model import CellForecast, HourlyConditions
+from app.models.user_parameter_model import UserParameter
+from app.services.forecast_record import (
+    FIELD_ROWS,
+    RECORD_SIZE,
+    ForecastRecord,
+    encode_forecast,
+    fingerprint,
+    hour_keys,
+)
+from app.services.forecast_service import evaluate_forecast, evaluate_record
+
+START = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def make_forecast(hours: int = 24) -> CellForecast:
+    return CellForecast(
+        cell_id=1_234_567,
+        issued_at=START - timedelta(minutes=7),
+        hours=[
+            HourlyConditions(
+                time=START + timedelta(hours=h),
+                temperature=round(15.0 + h * 0.7, 1),
+                wind_speed=2.5 + h % 5,
+                uv_index=float(min(h, 11)),
+                rain_chance=round(h / 24, 3),
+                aqi=40.0 + h * 3,
+                pm10=12.5,
+                pm2_5=8.1,
+                allergens={"birch_pollen": 10.0 * h} if h % 2 else {},
+            )
+            for h in range(hours)
+        ],
+    )
+
+
+def test_records_are_fixed_width_and_round_trip():
+    """Tests that decoding an encoded forecast gives the same forecast back."""
+    forecast = make_forecast()
+    record = encode_forecast(forecast)
+
+    assert len(record) == RECORD_SIZE == len(encode_forecast(make_forecast(3)))
+    assert ForecastRecord(record).to_cell_forecast() == forecast
+
+
+def test_arrays_are_views_of_the_buffer():
+    """Tests that conditions are read straight from the record without a copy."""
+    buffer = bytearray(encode_forecast(make_forecast()))
+    record = ForecastRecord(memoryview(buffer))
+
+    conditions = record.conditions()
+    assert conditions.dtype == np.float32
+    assert conditions.shape == (7, 24)
+    assert not conditions.flags.owndata
+    buffer[:] = encode_forecast(make_forecast().model_copy(update={"hours": []}))
+    assert np.isnan(conditions[FIELD_ROWS["uv_index"], 0])
+
+
+def test_rejects_bad_input():
+    forecast = make_forecast(3)
+    forecast.hours[2].time += timedelta(hours=1)
+    with pytest.raises(ValueError):
+        encode_forecast(forecast)
+    with pytest.raises(ValueError):
+        ForecastRecord(b"JSON" + encode_forecast(make_forecast())[4:])
+
+
+def test_evaluate_record_matches_scalar_evaluation():
+    """Tests that the vectorized evaluator raises the same alerts per hour."""
+    user_params = UserParameter(
+        user_id=uuid.uuid4(),
+        preferred_lat=10.0,
+        preferred_lon=20.0,
+        allergens={
+            "importance": 6,
+            "parameter_name": "allergens",
+            "parameter_value": 50.0,
+            "parameter_array_value": ["birch_pollen", "unknown_pollen"],
+        },
+    )
+    forecast = make_forecast()
+    record = ForecastRecord(encode_forecast(forecast))
+
+    vectorized = evaluate_record(record, user_params)
+    assert vectorized == evaluate_forecast(forecast, user_params)
+    assert any(hour.alerts for hour in vectorized.hours)
+
+
+def test_fingerprint_is_quantized_to_alert_resolution():
+    """Tests that only changes that can cross a threshold change the fingerprint."""
+    forecast = make_forecast()
+    baseline = fingerprint(ForecastRecord(encode_forecast(forecast)))
+
+    def changed(hour: int, **updates) -> bool:
+        edited = forecast.model_copy(deep=True)
+        for name, value in updates.items():
+            setattr(edited.hours[hour], name, value)
+        return fingerprint(ForecastRecord(encode_forecast(edited))) != baseline
+
+    assert not changed(3, uv_index=3.4, temperature=17.2)
+    assert changed(3, uv_index=3.5)
+    # 0.3 sits exactly on a 0.05 step, however it rounds in float32.
+    assert not changed(8, rain_chance=0.3)
+    assert changed(8, rain_chance=0.299)
+    assert changed(1, allergens={})
+    reissued = forecast.model_copy(update={"issued_at": START})
+    assert fingerprint(ForecastRecord(encode_forecast(reissued))) == baseline
+
+
+def test_hour_keys_change_only_for_hours_that_moved_a_step():
+    """Tests that an hour keeps its key unless one of its metrics moved a step."""
+    forecast = make_forecast()
+    baseline = hour_keys(ForecastRecord(encode_forecast(forecast)))
+
+    def changed(hour: int, **updates) -> list[int]:
+        edited = forecast.model_copy(deep=True)
+        for name, value in updates.items():
+            setattr(edited.hours[hour], name, value)
+        keys = hour_keys(ForecastRecord(encode_forecast(edited)))
+        return [h for h, (a, b) in enumerate(zip(baseline, keys)) if a != b]
+
+    assert changed(4, aqi=forecast.hours[4].aqi + 1.0) == []
+    assert changed(4, aqi=forecast.hours[4].aqi + 5.0) == [4]
+    assert changed(1, allergens={}) == [1]
+
+
+def test_hour_keys_follow_the_hour_not_the_position():
+    forecast = make_forecast()
+    shifted = forecast.model_copy(update={"hours": forecast.hours[1:]})
+
+    keys = hour_keys(ForecastRecord(encode_forecast(forecast)))
+    assert hour_keys(ForecastRecord(encode_forecast(shifted))) == keys[1:]
@@ -0,0 +1,239 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.cache.etag import if_none_match_matches, make_strong_etag
+from app.cache.lru import LRUCache
+from app.cache.shared_forecast import SharedForecastCache
+from app.models.forecast_model import CellForecast, HourlyConditions
+from app.models.user_parameter_model import UserParameter
+from app.serialization import dump_model
+from app.services.forecast_record import ForecastRecord, encode_forecast
+from app.services.forecast_service import (
+    ForecastService,
+    ForecastStore,
+    SharedForecastStore,
+    evaluate_hour,
+    evaluate_record,
+)
+from app.services.grid import cell_id_for
+
+
+def make_hour(offset: int = 0, **overrides) -> HourlyConditions:
+    values = dict(
+        time=datetime(2025, 6, 1, tzinfo=timezone.utc) + timedelta(hours=offset),
+        temperature=20.0,
+        wind_speed=2.0,
+        uv_index=1.0,
+        rain_chance=0.1,
+        aqi=20.0,
+        pm10=5.0,
+        pm2_5=3.0,
+        allergens={},
+    )
+    values.update(overrides)
+    return HourlyConditions(**values)
+
+
+@pytest.fixture
+def user_params():
+    return UserParameter(user_id=uuid.uuid4(), preferred_lat=10.0, preferred_lon=20.0)
+
+
+@pytest.fixture(params=["local", "shared"])
+def forecast_service(request, tmp_path):
+    if request.param == "local":
+        yield ForecastService(ForecastStore(), LRUCache(16))
+        return
+    cache = SharedForecastCache(str(tmp_path / "forecasts"), 64, 16_384)
+    yield ForecastService(SharedForecastStore(cache), LRUCache(16))
+    cache.close()
+
+
+def publish(service: ForecastService, user_params: UserParameter, *hours):
+    return service.publish_forecast(
+        CellForecast(
+            cell_id=cell_id_for(user_params.preferred_lat, user_params.preferred_lon),
+            issued_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
+            hours=list(hours) or [make_hour()],
+        )
+    )
+
+
+class TestEvaluateHour:
+    def test_no_alerts_below_thresholds(self, user_params):
+        assert evaluate_hour(make_hour(), user_params) == []
+
+    def test_threshold_crossed(self, user_params):
+        alerts = evaluate_hour(make_hour(uv_index=8.0, rain_chance=0.9), user_params)
+        assert {a.parameter_name for a in alerts} == {
+            "uv_index_threshold",
+            "rain_chance_threshold",
+        }
+
+    def test_zero_importance_is_ignored(self, user_params):
+        user_params.uv_index_threshold = {
+            "importance": 0,
+            "parameter_name": "uv_index_threshold",
+            "parameter_value": 1.0,
+        }
+        assert evaluate_hour(make_hour(uv_index=8.0), user_params) == []
+
+    def test_allergens(self, user_params):
+        user_params.allergens = {
+            "importance": 6,
+            "parameter_name": "allergens",
+            "parameter_array_value": ["birch_pollen"],
+        }
+        hour = make_hour(allergens={"birch_pollen": 80.0, "grass_pollen": 90.0})
+        alerts = evaluate_hour(hour, user_params)
+        assert [a.allergen for a in alerts] == ["birch_pollen"]
+
+
+class TestForecastService:
+    def test_render_without_forecast(self, forecast_service, user_params):
+        assert forecast_service.render_for(user_params) is None
+
+    def test_render_is_cached(self, forecast_service, user_params):
+        publish(forecast_service, user_params)
+        rendered = forecast_service.render_for(user_params)
+        assert rendered.etag == make_strong_etag(rendered.body)
+        assert forecast_service.get_cached(user_params.user_id) is rendered
+
+    def test_publish_invalidates_rendered(self, forecast_service, user_params):
+        publish(forecast_service, user_params)
+        forecast_service.render_for(user_params)
+        publish(forecast_service, user_params, make_hour(uv_index=9.0))
+        assert forecast_service.get_cached(user_params.user_id) is None
+
+    def test_unchanged_publish_keeps_rendered(self, forecast_service, user_params):
+        version = publish(forecast_service, user_params, make_hour())
+        rendered = forecast_service.render_for(user_params)
+
+        # Re-issued, and moved less than a step: nothing to re-evaluate.
+        reissued = CellForecast(
+            cell_id=rendered.cell_id,
+            issued_at=datetime(2025, 6, 1, 1, tzinfo=timezone.utc),
+            hours=[make_hour(uv_index=1.2)],
+        )
+        assert forecast_service.publish_forecast(reissued) == version
+        assert forecast_service.get_cached(user_params.user_id) is rendered
+        assert publish(forecast_service, user_params, make_hour(uv_index=1.5)) > version
+        assert forecast_service.get_cached(user_params.user_id) is None
+
+    def test_only_hours_that_moved_a_step_are_rerendered(
+        self, forecast_service, user_params
+    ):
+        """Tests that a changed cell re-evaluates only the hours that moved."""
+        user_params.uv_index_threshold = {
+            "importance": 5,
+            "parameter_name": "uv_index_threshold",
+            "parameter_value": 3.5,
+        }
+        # Around midday in the cell, so UV thresholds apply.
+        hours = [make_hour(h, uv_index=3.0) for h in range(8, 14)]
+        publish(forecast_service, user_params, *hours)
+        first = forecast_service.render_for(user_params)
+        hours[0] = make_hour(8, uv_index=3.5)
+        hours[3] = make_hour(11, uv_index=3.4)
+        publish(forecast_service, user_params, *hours)
+        second = forecast_service.render_for(user_params)
+
+        changed = [
+            hour
+            for hour, (old, new) in enumerate(
+                zip(first.hours.values(), second.hours.values())
+            )
+            if old != new
+        ]
+        assert changed == [0]
+        assert b'"alerts":[{"parameter_name":"uv_index_threshold"' in second.body
+        assert b'"value":3.4' not in second.body
+
+    def test_threshold_change_is_rerendered(self, forecast_service, user_params):
+        publish(forecast_service, user_params, make_hour(11, uv_index=3.0))
+        forecast_service.render_for(user_params)
+        user_params.uv_index_threshold = {
+            "importance": 5,
+            "parameter_name": "uv_index_threshold",
+            "parameter_value": 2.5,
+        }
+        rendered = forecast_service.render_for(user_params)
+        assert b'"threshold":2.5' in rendered.body
+
+    def test_rerender_reuses_unchanged_hours(self, forecast_service, user_params):
+        user_params.uv_index_threshold = {
+            "importance": 5,
+            "parameter_name": "uv_index_threshold",
+            "parameter_value": 6.0,
+        }
+        publish(forecast_service, user_params, *(make_hour(h) for h in range(6)))
+        first = forecast_service.render_for(user_params)
+        hours = [make_hour(h, uv_index=7.0 if h == 4 else 1.0) for h in range(1, 7)]
+        publish(forecast_service, user_params, *hours)
+        second = forecast_service.render_for(user_params)
+
+        expected = dump_model(
+            evaluate_record(
+                ForecastRecord(
+                    encode_forecast(
+                        CellForecast(
+                            cell_id=second.cell_id,
+                            issued_at=datetime(2025, 6, 1, tzinfo=timezone.utc),
+                            hours=hours,
+                        )
+                    )
+                ),
+                user_params,
+            )
+        )
+        assert second.body == expected
+        assert b'"alerts":[{"parameter_name":"uv_index_threshold"' in second.body
+        reused = set(first.hours.values()) & set(second.hours.values())
+        assert len(reused) == 4
+
+    def test_alerts_for(self, forecast_service, user_params):
+        """Tests that alerts are counted without rendering or caching anything."""
+        assert forecast_service.alerts_for(user_params) is None
+        user_params.aqi_threshold = {
+            "importance": 5,
+            "parameter_name": "aqi_threshold",
+            "parameter_value": 50.0,
+        }
+        hours = [make_hour(h, aqi=40.0 + 5 * h) for h in range(4)]
+        publish(forecast_service, user_params, *hours)
+
+        alerts = forecast_service.alerts_for(user_params)
+        assert [alert.value for alert in alerts] == [50.0, 55.0]
+        assert forecast_service.get_cached(user_params.user_id) is None
+
+    def test_invalidate_user(self, forecast_service, user_params):
+        publish(forecast_service, user_params)
+        forecast_service.render_for(user_params)
+        forecast_service.invalidate_user(user_params.user_id)
+        assert forecast_service.get_cached(user_params.user_id) is None
+
+
+class TestETag:
+    def test_if_none_match(self):
+        etag = make_strong_etag(b"{}")
+        assert if_none_match_matches(etag, etag)
+        assert if_none_match_matches(f'"other", W/{etag}', etag)
+        assert if_none_match_matches("*", etag)
+        assert not if_none_match_matches('"other"', etag)
+        assert not if_none_match_matches(None, etag)
+        assert if_none_match_matches(etag, f"W/{etag}")
+        assert not if_none_match_matches('"other"', f"W/{etag}")
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert len(cache) == 2
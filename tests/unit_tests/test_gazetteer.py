@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from app.models.location_model import Location
+from app.services.gazetteer import (
+    HOT_RANGE,
+    Gazetteer,
+    build_gazetteer,
+    normalize,
+)
+
+
+def place(name: str, population: int) -> Location:
+    return Location(name=name, country="XX", lat=1.5, lon=-2.25, population=population)
+
+
+def brute_force(places: list[Location], query: str, limit: int) -> list[str]:
+    prefix = normalize(query)
+    matches = [
+        index
+        for index, place in enumerate(places)
+        if any(word.startswith(prefix) for word in words_on(place.name))
+    ]
+    matches.sort(key=lambda index: (-places[index].population, index))
+    return [places[index].name for index in matches[:limit]]
+
+
+def words_on(name: str) -> list[str]:
+    words = normalize(name).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def test_normalize():
+    assert normalize("  São-Paulo ") == "sao paulo"
+    assert normalize("ZÜRICH") == "zurich"
+    assert normalize("Xi'an") == "xi an"
+
+
+def test_completions_match_brute_force(tmp_path):
+    """Tests both the precomputed and the per-query rankings."""
+    rng = random.Random(0)
+    places = [
+        place(
+            " ".join(
+                "".join(rng.choices("abcde", k=rng.randint(2, 6)))
+                for _ in range(rng.randint(1, 3))
+            ),
+            rng.randint(0, 5) * 1000,
+        )
+        for _ in range(3000)
+    ]
+    path = tmp_path / "places.idx"
+    build_gazetteer(places, path)
+    gazetteer = Gazetteer(path)
+    assert len(gazetteer._hot_runs) > 0
+
+    queries = ["a", "b", "ab", "abc", "dd", "e a", "zzz"]
+    queries += ["".join(rng.choices("abcde", k=rng.randint(1, 4))) for _ in range(50)]
+    for query in queries:
+        got = [location.name for location in gazetteer.complete(query, 7)]
+        assert got == brute_force(places, query, 7), query
+    assert len(brute_force(places, "a", len(places))) > HOT_RANGE
+
+
+def test_locations_round_trip(tmp_path):
+    places = [place("São Paulo", 12_325_232), place("Santiago", 6_257_516)]
+    build_gazetteer(places, tmp_path / "places.idx")
+    gazetteer = Gazetteer(tmp_path / "places.idx")
+
+    assert gazetteer.complete("SAO") == [places[0]]
+    assert gazetteer.complete("paulo") == [places[0]]
+    assert gazetteer.complete("sa") == places
+    assert gazetteer.complete(" ") == []
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "places.idx"
+    path.write_bytes(b"not an index" * 10)
+    with pytest.raises(ValueError):
+        Gazetteer(path)
@@ -0,0 +1,58 @@
+import uuid
+
+from app.cache.invalidation import InvalidationBus
+from app.cache.lru import LRUCache
+from app.observability.metrics import CACHE_INVALIDATION_FLUSHES
+
+
+def make_bus() -> InvalidationBus:
+    return InvalidationBus("postgresql://unused", "test_channel")
+
+
+def test_dispatch_evicts_key_from_every_registered_cache():
+    """Tests that a notification evicts its key from each cache in the namespace."""
+    bus = make_bus()
+    first, second, other = LRUCache(10), LRUCache(10), LRUCache(10)
+    key, kept = uuid.uuid4(), uuid.uuid4()
+    for cache in (first, second, other):
+        cache.put(key, "value")
+        cache.put(kept, "value")
+    bus.register("params", first)
+    bus.register("params", second)
+    bus.register("other", other)
+
+    bus.dispatch(f"another-process:params:{key.hex}")
+
+    assert key not in first and key not in second
+    assert kept in first and kept in second
+    assert key in other
+
+
+def test_dispatch_skips_own_and_malformed_notifications():
+    """Tests that a process ignores its own writes and garbage payloads."""
+    bus = make_bus()
+    cache = LRUCache(10)
+    key = uuid.uuid4()
+    cache.put(key, "value")
+    bus.register("params", cache)
+
+    bus.dispatch(f"{bus.origin}:params:{key.hex}")
+    bus.dispatch("no separators")
+    bus.dispatch("another-process:params:not-a-uuid")
+
+    assert key in cache
+
+
+def test_flush_all_clears_every_cache():
+    """Tests that the reconnect fallback empties all registered caches."""
+    bus = make_bus()
+    caches = [LRUCache(10), LRUCache(10)]
+    for namespace, cache in zip(("a", "b"), caches):
+        cache.put(uuid.uuid4(), "value")
+        bus.register(namespace, cache)
+    flushes = CACHE_INVALIDATION_FLUSHES.value()
+
+    bus.flush_all()
+
+    assert all(len(cache) == 0 for cache in caches)
+    assert CACHE_INVALIDATION_FLUSHES.value() == flushes + 1
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+from app.observability.metrics import Counter, Histogram, MetricsRegistry
+from app.observability.middleware import UNMATCHED_ROUTE, route_template
+
+
+class TestMetrics:
+    def test_counter_render(self):
+        """Tests that counters render as Prometheus *_total samples."""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests", "Requests.", labels=("route",))
+        counter.inc("/a")
+        counter.inc("/a")
+        counter.inc('/b"')
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/a"} 2' in text
+        assert 'requests_total{route="/b\\""} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Tests that histogram buckets use le semantics and are cumulative."""
+        histogram = Histogram("latency", "Latency.", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(5.0)
+
+        lines = histogram.render()
+        assert 'latency_bucket{le="0.1"} 2' in lines
+        assert 'latency_bucket{le="1.0"} 2' in lines
+        assert 'latency_bucket{le="+Inf"} 3' in lines
+        assert "latency_count 3" in lines
+        assert histogram.count() == 3
+
+    def test_counter_value(self):
+        counter = Counter("hits", "Hits.", labels=("kind",))
+        counter.inc("x", amount=3)
+        assert counter.value("x") == 3
+        assert counter.value("y") == 0
+
+
+class TestRouteTemplate:
+    def test_uses_matched_route_path(self):
+        """Tests that the label is the route's template, whatever the values."""
+        scope = {
+            "route": SimpleNamespace(path="/v1/items/{item_id}/{name}"),
+            "path": "/v1/items/v1/items",
+            "path_params": {"item_id": "v1", "name": "items"},
+        }
+        assert route_template(scope) == "/v1/items/{item_id}/{name}"
+
+    def test_adds_router_prefix(self):
+        """Tests that a route relative to its router gets the request's prefix."""
+        scope = {
+            "route": SimpleNamespace(path="/{user_id}"),
+            "path": "/v1/user_parameters/v1",
+            "path_params": {"user_id": "v1"},
+        }
+        assert route_template(scope) == "/v1/user_parameters/{user_id}"
+        scope = {"route": SimpleNamespace(path="/"), "path": "/v1/forecast/"}
+        assert route_template(scope) == "/v1/forecast/"
+
+    def test_unmatched(self):
+        assert route_template({"path": "/nope"}) == UNMATCHED_ROUTE
@@ -0,0 +1,33 @@
+from benchmarks.population import METRO_AREAS, PopulationGenerator
+from app.models.user_parameter_model import UserIndividualParameter
+
+
+def test_population_is_deterministic():
+    """Tests that the same seed yields the same users, ids and parameters."""
+    first = list(PopulationGenerator(seed=3).generate(50))
+    second = list(PopulationGenerator(seed=3).generate(50))
+    assert first == second
+    assert first != list(PopulationGenerator(seed=4).generate(50))
+
+
+def test_population_rows_are_valid():
+    """Tests that generated thresholds validate and locations are in range."""
+    for user, params in PopulationGenerator(seed=1).generate(200):
+        assert params.user_id == user.id
+        assert -90.0 <= params.preferred_lat <= 90.0
+        assert -180.0 <= params.preferred_lon < 180.0
+        for threshold in params.thresholds.values():
+            UserIndividualParameter.model_validate(threshold)
+
+
+def test_population_clusters_around_metros():
+    """Tests that most users are placed near a metro area."""
+    rows = list(PopulationGenerator(seed=2).generate(500))
+    near = sum(
+        any(
+            abs(params.preferred_lat - lat) < 2 and abs(params.preferred_lon - lon) < 3
+            for _, lat, lon, _, _ in METRO_AREAS
+        )
+        for _, params in rows
+    )
+    assert near / len(rows) > 0.85
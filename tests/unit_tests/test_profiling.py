@@ -0,0 +1,99 @@
+import cProfile
+import os
+import pstats
+
+import pytest
+
+from app.observability.profiling import (
+    ProfilingMiddleware,
+    folded_stacks,
+    matches_route,
+    rotate,
+)
+
+
+async def busy_app(scope, receive, send):
+    sum(i * i for i in range(20_000))
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def http_scope(path="/v1/auth/token", headers=()):
+    return {"type": "http", "method": "POST", "path": path, "headers": list(headers)}
+
+
+async def call(middleware, scope):
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    await middleware(scope, receive, send)
+
+
+def profiles(directory):
+    return sorted(p.suffix for p in directory.iterdir())
+
+
+@pytest.mark.asyncio
+class TestProfilingMiddleware:
+    async def test_debug_header_triggers_profile(self, tmp_path):
+        """Tests that a request with the right token is profiled."""
+        middleware = ProfilingMiddleware(busy_app, str(tmp_path), token="s3cret")
+        await call(middleware, http_scope(headers=[(b"x-debug-profile", b"wrong")]))
+        assert profiles(tmp_path) == []
+
+        await call(middleware, http_scope(headers=[(b"x-debug-profile", b"s3cret")]))
+        assert profiles(tmp_path) == [".folded", ".pstats"]
+        folded = next(tmp_path.glob("*.folded")).read_text()
+        assert "busy_app" in folded
+
+    async def test_sampling_and_route_filter(self, tmp_path):
+        """Tests 1-in-N sampling restricted to the configured routes."""
+        middleware = ProfilingMiddleware(
+            busy_app, str(tmp_path), sample_rate=2, routes=["/v1/auth/token"]
+        )
+        for _ in range(4):
+            await call(middleware, http_scope())
+            await call(middleware, http_scope(path="/v1/users"))
+            await call(middleware, http_scope(path="/v1/auth/tokenX"))
+        assert len(list(tmp_path.glob("*.pstats"))) == 2
+        assert all(p.stem.endswith("_token") for p in tmp_path.iterdir())
+
+
+def test_matches_route_by_segment():
+    """Tests that a route matches itself and its subpaths, not longer names."""
+    assert matches_route("/v1/auth/token", "/v1/auth/token")
+    assert matches_route("/v1/auth/token/refresh", "/v1/auth/token")
+    assert not matches_route("/v1/auth/tokenX", "/v1/auth/token")
+    assert matches_route("/v1/users", "")
+
+
+def test_folded_stacks_nest_callers():
+    """Tests that folded stacks put callees under their callers."""
+
+    def inner():
+        return sum(range(50_000))
+
+    def outer():
+        return inner()
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    outer()
+    profiler.disable()
+
+    lines = folded_stacks(pstats.Stats(profiler))
+    assert any("outer" in line and "inner" in line.split(";")[-1] for line in lines)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+
+def test_rotate_removes_oldest(tmp_path):
+    """Tests that rotation deletes the oldest files first."""
+    for i in range(3):
+        path = tmp_path / f"{i}.folded"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (i, i))
+    rotate(tmp_path, max_bytes=200)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1.folded", "2.folded"]
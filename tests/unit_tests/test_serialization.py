@@ -0,0 +1,39 @@
+import json
+import uuid
+
+from app.models.user_parameter_model import UserParameter
+from app.serialization import (
+    RawJSON,
+    dump_as,
+    dump_model,
+    encode_object,
+    get_type_adapter,
+)
+
+
+def test_dump_model_matches_model_dump_json():
+    """Tests that the precompiled path produces the same JSON as pydantic."""
+    params = UserParameter(user_id=uuid.uuid4(), preferred_lat=1.0, preferred_lon=2.0)
+    assert json.loads(dump_model(params)) == json.loads(params.model_dump_json())
+
+
+def test_dump_model_with_jsonb_dicts():
+    """Tests that dict-valued JSONB columns, as loaded by the ORM, serialize."""
+    params = UserParameter(user_id=uuid.uuid4(), preferred_lat=1.0, preferred_lon=2.0)
+    params.allergens = {"importance": 2, "parameter_name": "allergens"}
+    assert json.loads(dump_model(params))["allergens"]["importance"] == 2
+
+
+def test_dump_as_reuses_adapter():
+    """Tests that TypeAdapters are built once per type."""
+    assert get_type_adapter(list[int]) is get_type_adapter(list[int])
+    assert dump_as(list[int], [1, 2]) == b"[1,2]"
+
+
+def test_encode_object_splices_raw_fragments():
+    """Tests that RawJSON values are embedded without re-encoding."""
+    user_id = uuid.uuid4()
+    body = encode_object(
+        [("user_id", user_id), ("allergens", RawJSON('{"importance": 5}'))]
+    )
+    assert json.loads(body) == {"user_id": str(user_id), "allergens": {"importance": 5}}
@@ -0,0 +1,22 @@
+from app import serve
+
+
+def test_uvicorn_options_prefer_fast_loop_and_parser(monkeypatch):
+    """Tests that uvloop and httptools are used when installed."""
+    monkeypatch.setattr(serve, "_installed", lambda module: True)
+    options = serve.uvicorn_options(workers=3)
+
+    assert options["workers"] == 3
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+    assert options["lifespan"] == "on"
+
+
+def test_uvicorn_options_fall_back_without_extras(monkeypatch):
+    """Tests that the pure-Python loop and parser are used otherwise."""
+    monkeypatch.setattr(serve, "_installed", lambda module: False)
+    options = serve.uvicorn_options()
+
+    assert options["workers"] == serve.default_workers() >= 1
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
@@ -0,0 +1,90 @@
+import multiprocessing
+
+import pytest
+
+from app.cache.shared_forecast import SharedForecastCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "forecasts")
+
+
+@pytest.fixture
+def cache(path):
+    cache = SharedForecastCache(path, slot_count=8, record_size=64)
+    yield cache
+    cache.close()
+
+
+def test_put_and_get(cache):
+    """Tests that records round-trip and each write bumps the version."""
+    assert cache.get(42) is None
+    first = cache.put(42, b"first")
+    second = cache.put(42, b"second record")
+
+    assert second > first
+    assert cache.get(42) == (second, b"second record")
+    assert cache.version(42) == second
+    assert cache.read(42, lambda view: view[:6].tobytes()) == (second, b"second")
+
+
+def test_other_mappings_see_writes(cache, path):
+    """Tests that a second mapping of the file (another worker) reads the record."""
+    other = SharedForecastCache(path, slot_count=8, record_size=64)
+    try:
+        version = cache.put(7, b"shared")
+        assert other.get(7) == (version, b"shared")
+    finally:
+        other.close()
+
+
+def test_slot_left_mid_write_reads_as_missing(cache):
+    """Tests that a writer dying mid-put does not hang readers, and is repaired."""
+    version = cache.put(42, b"first")
+    # What a writer killed between its two seq stores leaves behind.
+    cache._words[cache._word(cache._find(42))] += 1
+
+    assert cache.get(42) is None
+    repaired = cache.put(42, b"second")
+    assert repaired > version and repaired % 2 == 0
+    assert cache.get(42) == (repaired, b"second")
+
+
+def test_colliding_cells_probe_to_separate_slots(cache):
+    """Tests that every slot can be filled and a full cache rejects new cells."""
+    for cell_id in range(8):
+        cache.put(cell_id, str(cell_id).encode())
+    assert [cache.get(c)[1] for c in range(8)] == [str(c).encode() for c in range(8)]
+    with pytest.raises(ValueError):
+        cache.put(100, b"no room")
+
+
+def test_rejects_oversized_record_and_layout_mismatch(cache, path):
+    with pytest.raises(ValueError):
+        cache.put(1, b"x" * 65)
+    with pytest.raises(ValueError):
+        SharedForecastCache(path, slot_count=16, record_size=64)
+
+
+def _write_records(path: str, count: int) -> None:
+    cache = SharedForecastCache(path, slot_count=8, record_size=64)
+    for n in range(count):
+        cache.put(1, bytes([n % 256]) * 64)
+    cache.close()
+
+
+def test_readers_never_see_torn_records(cache, path):
+    """Tests that reads racing a writer in another process are all consistent."""
+    cache.put(1, bytes(64))
+    writer = multiprocessing.get_context("spawn").Process(
+        target=_write_records, args=(path, 20_000)
+    )
+    writer.start()
+    try:
+        while writer.is_alive():
+            _, record = cache.get(1)
+            assert record == record[:1] * 64
+    finally:
+        writer.join()
+    assert writer.exitcode == 0
@@ -0,0 +1,88 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.models.forecast_model import CellForecast, HourlyConditions
+from app.models.user_parameter_model import UserParameter
+from app.services.forecast_record import ForecastRecord, encode_forecast
+from app.services.forecast_service import evaluate_forecast, evaluate_record
+from app.services.grid import cell_id_for
+from app.services.solar import solar_elevation, sun_is_up, uv_peak_window
+
+LONDON = (51.5, -0.1)
+SYDNEY = (-33.9, 151.2)
+SVALBARD = (78.2, 15.6)
+SOLSTICE = datetime(2025, 12, 21, tzinfo=timezone.utc)
+
+
+def test_solar_elevation():
+    """Tests elevations against published solar noon altitudes."""
+    noon = datetime(2025, 6, 21, 12, 2, tzinfo=timezone.utc).timestamp()
+    assert abs(solar_elevation(*LONDON, noon) - 62.0) < 0.5
+    midnight = datetime(2025, 6, 21, tzinfo=timezone.utc).timestamp()
+    assert solar_elevation(*LONDON, midnight) < -10
+
+
+def test_sun_is_up_broadcasts_over_cells_and_hours():
+    """Tests one call over (cells, 1) coordinates and a row of hours."""
+    lats, lons = np.array([[LONDON[0]], [SYDNEY[0]], [SVALBARD[0]]]), np.array(
+        [[LONDON[1]], [SYDNEY[1]], [SVALBARD[1]]]
+    )
+    hours = SOLSTICE.timestamp() + 3600 * np.arange(24)
+
+    up = sun_is_up(lats, lons, hours)
+    assert up.shape == (3, 24)
+    # London sunrise 08:04 and sunset 15:53 UTC; Sydney's summer night is
+    # 09:05 to 18:41 UTC; Svalbard is in polar night.
+    assert np.flatnonzero(up[0]).tolist() == list(range(8, 16))
+    assert np.flatnonzero(~up[1]).tolist() == list(range(10, 18))
+    assert not up[2].any()
+
+
+def test_uv_peak_window():
+    """Tests the window brackets solar noon and is absent in polar night."""
+    start, end = uv_peak_window(
+        [LONDON[0], SVALBARD[0]], [LONDON[1], SVALBARD[1]], SOLSTICE.timestamp()
+    )
+    noon = (SOLSTICE + timedelta(hours=12, minutes=2)).timestamp()
+    assert start[0] < noon < end[0]
+    assert abs((start[0] + end[0]) / 2 - noon) < 300
+    assert 2 * 3600 < end[0] - start[0] < 5 * 3600
+    assert np.isnan(start[1]) and np.isnan(end[1])
+
+
+def test_uv_is_not_evaluated_in_the_dark():
+    """Tests both evaluators skip UV thresholds between sunset and sunrise."""
+    user_params = UserParameter(
+        user_id=uuid.uuid4(),
+        preferred_lat=LONDON[0],
+        preferred_lon=LONDON[1],
+        uv_index_threshold={
+            "importance": 5,
+            "parameter_name": "uv_index_threshold",
+            "parameter_value": 1.0,
+        },
+    )
+    forecast = CellForecast(
+        cell_id=cell_id_for(*LONDON),
+        issued_at=SOLSTICE,
+        hours=[
+            HourlyConditions(
+                time=SOLSTICE + timedelta(hours=hour),
+                temperature=5.0,
+                wind_speed=2.0,
+                uv_index=2.0,
+                rain_chance=0.1,
+                aqi=20.0,
+                pm10=5.0,
+                pm2_5=3.0,
+            )
+            for hour in range(24)
+        ],
+    )
+
+    evaluated = evaluate_record(ForecastRecord(encode_forecast(forecast)), user_params)
+    assert evaluated == evaluate_forecast(forecast, user_params)
+    alerted = [hour.time.hour for hour in evaluated.hours if hour.alerts]
+    assert alerted == list(range(8, 16))
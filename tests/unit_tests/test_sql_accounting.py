@@ -0,0 +1,53 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app.observability.sql import (
+    QueryStats,
+    _after_cursor_execute,
+    _before_cursor_execute,
+    current_query_stats,
+)
+
+
+@pytest.fixture
+def conn():
+    return SimpleNamespace(info={})
+
+
+def run_statement(conn, statement="SELECT 1", parameters=()):
+    _before_cursor_execute(conn, None, statement, parameters, None, False)
+    _after_cursor_execute(conn, None, statement, parameters, None, False)
+
+
+def test_counts_statements_for_current_request(conn):
+    """Tests that statements are attributed to the request's QueryStats."""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        run_statement(conn)
+        run_statement(conn)
+    finally:
+        current_query_stats.reset(token)
+
+    assert stats.count == 2
+    assert stats.seconds >= 0
+    run_statement(conn)
+    assert stats.count == 2
+
+
+def test_slow_query_is_logged_without_parameters(conn, monkeypatch, caplog):
+    """Tests that slow statements are logged with parameter values redacted."""
+    monkeypatch.setattr("app.observability.sql.settings.SQL_SLOW_QUERY_MS", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.observability.sql"):
+        run_statement(
+            conn,
+            "SELECT *\n FROM users WHERE email = $1",
+            ("secret@example.com",),
+        )
+
+    assert "SELECT * FROM users WHERE email = $1" in caplog.text
+    assert "1 parameters redacted" in caplog.text
+    assert "secret@example.com" not in caplog.text
+
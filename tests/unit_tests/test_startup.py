@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+from benchmarks.startup import _env, import_budget, measure_import
+
+# Modules that must stay off the import path; they are loaded on first use.
+# Routers and the numpy services load in create_app; the rest are fastapi[all]
+# extras the app doesn't need to start.
+DEFERRED_MODULES = (
+    "argon2",
+    "passlib",
+    "cProfile",
+    "numpy",
+    "app.routers",
+    "email_validator",
+    "httpx",
+    "itsdangerous",
+    "jinja2",
+    "ujson",
+    "uvicorn",
+    "yaml",
+)
+
+
+def test_import_within_budget():
+    """Tests that importing app.main stays within the startup time budget."""
+    best = min(measure_import(runs=2))
+    assert best <= import_budget(), (
+        f"import app.main took {best:.2f}s, budget is {import_budget():.2f}s; "
+        "run `python -m benchmarks.startup` to see the slowest imports"
+    )
+
+
+def test_heavy_modules_are_deferred():
+    """Tests that optional heavy modules are not imported at startup."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, app.main; "
+            f"print(*[m for m in {DEFERRED_MODULES!r} if m in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_env(),
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services.stations import (
+    BUNDLED_CATALOGUE,
+    Station,
+    StationCatalogue,
+    StationIndex,
+    read_catalogue,
+    unit_vectors,
+)
+
+
+def random_stations(count: int, seed: int = 0) -> list[Station]:
+    rng = np.random.default_rng(seed)
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+    lons = rng.uniform(-180, 180, count)
+    return [
+        Station(f"S{i}", f"Station {i}", float(lat), float(lon))
+        for i, (lat, lon) in enumerate(zip(lats, lons))
+    ]
+
+
+def brute_force(index: StationIndex, lats, lons, k: int) -> np.ndarray:
+    ids = list(index.stations)
+    points = unit_vectors(
+        [index.stations[i].lat for i in ids], [index.stations[i].lon for i in ids]
+    )
+    queries = unit_vectors(lats, lons)
+    chords = np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+    return np.array(ids, dtype=object)[np.argsort(chords, axis=1)[:, :k]]
+
+
+@pytest.mark.parametrize("count", [5, 300, 5000])
+def test_batch_nearest_matches_brute_force(count):
+    """Tests the bucket search against comparing every station, dense or sparse."""
+    index = StationIndex(random_stations(count))
+    rng = np.random.default_rng(1)
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, 2000)))
+    lons = rng.uniform(-180, 180, 2000)
+
+    ids, distances = index.nearest(lats, lons, k=3)
+    assert ids.shape == distances.shape == (2000, min(3, count))
+    assert (ids == brute_force(index, lats, lons, 3)).all()
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+
+def test_bundled_catalogue():
+    index = StationIndex(read_catalogue(BUNDLED_CATALOGUE))
+    ids, distances = index.nearest([51.5, -33.9], [-0.1, 151.2])
+    assert ids[:, 0].tolist() == ["EGLL", "YSSY"]
+    assert distances[0, 0] == pytest.approx(25, abs=1)
+
+
+def test_incremental_sync():
+    """Tests that a sync adds, moves and removes only the stations that changed."""
+    stations = random_stations(200)
+    index = StationIndex(stations)
+    moved = Station("S0", "Station 0", 51.5, -0.1)
+    added = Station("NEW", "New", -33.9, 151.2)
+
+    assert index.sync([moved, added, *stations[2:]]) == 3
+    assert "S1" not in index.stations
+    assert index.station_for(51.5, -0.1) == "S0"
+    assert index.station_for(-33.9, 151.2) == "NEW"
+    lats, lons = np.array([10.0, -45.0, 70.0]), np.array([20.0, -60.0, 100.0])
+    assert (index.nearest(lats, lons, 2)[0] == brute_force(index, lats, lons, 2)).all()
+
+
+def test_catalogue_file_changes_are_picked_up(tmp_path):
+    path = tmp_path / "stations.csv"
+    path.write_text("station_id,name,lat,lon\nA,Alpha,0.0,0.0\n")
+    catalogue = StationCatalogue(path)
+    assert catalogue.current().station_for(1.0, 1.0) == "A"
+
+    path.write_text("station_id,name,lat,lon\nA,Alpha,0.0,0.0\nB,Beta,1.0,1.0\n")
+    os.utime(path, ns=(0, 1))
+    assert catalogue.current().station_for(1.0, 1.0) == "B"
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.services.user_loader import BatchLoader
+
+
+class RecordingFetch:
+    def __init__(self, fail: bool = False):
+        self.batches: list[list[str]] = []
+        self.fail = fail
+
+    async def __call__(self, keys: list[str]) -> dict[str, str]:
+        self.batches.append(keys)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("database down")
+        return {key: key.upper() for key in keys if key != "missing"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_fetch():
+    """Tests that loads in the same tick are fetched once, duplicates included."""
+    fetch = RecordingFetch()
+    loader = BatchLoader(fetch, "test")
+
+    results = await asyncio.gather(
+        loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing")
+    )
+
+    assert results == ["A", "B", "A", None]
+    assert fetch.batches == [["a", "b", "missing"]]
+    assert await loader.load("c") == "C"
+    assert len(fetch.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_full_batches_dispatch_early():
+    fetch = RecordingFetch()
+    loader = BatchLoader(fetch, "test", window=60, max_batch_size=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(loader.load("a"), loader.load("b")), timeout=1
+    )
+
+    assert results == ["A", "B"]
+    assert fetch.batches == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_failures_and_cancellations():
+    """Tests that a failed fetch raises in every caller and that one caller's
+    cancellation leaves the others waiting on the same key unaffected."""
+    failing = BatchLoader(RecordingFetch(fail=True), "test")
+    results = await asyncio.gather(
+        failing.load("a"), failing.load("b"), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    loader = BatchLoader(RecordingFetch(), "test", window=0.01)
+    cancelled = asyncio.ensure_future(loader.load("a"))
+    kept = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await kept == "A"
+    assert cancelled.cancelled()
@@ -1,9 +1,19 @@
 import pytest
 import uuid
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, ANY
 
-from app.models.user_parameter_model import UserParameter, UserParameterUpdate
+from pydantic import ValidationError
+
+from app.models.user_parameter_model import (
+    DEFAULT_PARAMETERS,
+    UserIndividualParameter,
+    UserParameter,
+    UserParameterBase,
+    UserParameterUpdate,
+)
 from app.services.user_parameter_service import (
+    UserParameterCache,
     UserParameterService,
     UserParameterDatamanager,
 )
@@ -58,6 +68,35 @@ class TestUserParameterService:
         assert call_args.preferred_lat == 50.0
         assert result.preferred_lon == -100.0
 
+    async def test_add_parameter_matches_model_defaults(
+        self, user_parameter_service, mock_data_manager
+    ):
+        """Tests that new rows hold the model's defaults, as unshared JSONB dicts."""
+        update = UserParameterUpdate(
+            aqi_threshold={"parameter_name": "aqi_threshold", "parameter_value": 80}
+        )
+        await user_parameter_service.add_parameter(uuid.uuid4(), update)
+        await user_parameter_service.add_parameter(uuid.uuid4())
+        first, second = (
+            call[0][0] for call in mock_data_manager.add_user_parameters.call_args_list
+        )
+
+        for name, parameter in DEFAULT_PARAMETERS.items():
+            assert getattr(second, name) == parameter.model_dump(mode="json")
+        assert first.preferred_lat == -36.15
+        assert first.aqi_threshold == {
+            "parameter_name": "aqi_threshold",
+            "parameter_value": 80.0,
+        }
+        assert second.allergens == first.allergens
+        assert second.allergens is not first.allergens
+        assert (
+            second.allergens["parameter_array_value"]
+            is not first.allergens["parameter_array_value"]
+        )
+        assert isinstance(first.id, uuid.UUID) and first.id != second.id
+        assert first.time_created == first.time_updated
+
     async def test_get_user_params_by_user_id(
         self, user_parameter_service, mock_data_manager
     ):
@@ -96,4 +135,77 @@ class TestUserParameterDatamanager:
         await datamanager.get_user_params_by_user_id(user_id)
         mock_session.scalar.assert_called_once()
         # ANY is used because the select statement object is complex to reconstruct
-        mock_session.scalar.assert_called_with(ANY)
+        mock_session.scalar.assert_called_with(ANY, {"user_id": user_id})
+
+
+class TestUserParameterCache:
+    @pytest.fixture
+    def user_params(self):
+        return UserParameter(
+            user_id=uuid.uuid4(), preferred_lat=1.0, preferred_lon=2.0
+        )
+
+    def test_put_and_get(self, user_params):
+        """Tests that a put entry is served pre-serialized with validators."""
+        cache = UserParameterCache(max_size=4)
+        cached = cache.put(user_params)
+
+        assert cache.get(user_params.user_id) is cached
+        assert b'"preferred_lat":1.0' in cached.body
+        assert cached.etag.startswith(f'"{user_params.user_id.hex}-')
+        assert cached.headers["Last-Modified"].endswith("GMT")
+
+    def test_etag_follows_time_updated(self, user_params):
+        """Tests that a newer time_updated produces a new ETag."""
+        cache = UserParameterCache(max_size=4)
+        first = cache.put(user_params)
+        user_params.time_updated = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        second = cache.put(user_params)
+        assert first.etag != second.etag
+
+    def test_raw_body_gets_a_weak_etag(self, user_params):
+        """Tests that a body serialized outside dump_model is tagged weak."""
+        cache = UserParameterCache(max_size=4)
+        raw = cache.put_serialized(
+            user_params.user_id, b'{"user_id": "..."}', user_params.time_updated
+        )
+        assert raw.etag.startswith(f'W/"{user_params.user_id.hex}-')
+
+        cache.invalidate(user_params.user_id)
+        assert cache.put(user_params).etag == raw.etag[2:]
+
+    def test_older_row_does_not_replace_newer(self, user_params):
+        """Tests that a slow read cannot overwrite a newer written-through row."""
+        cache = UserParameterCache(max_size=4)
+        stale = user_params.model_copy()
+        user_params.time_updated = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        newer = cache.put(user_params)
+
+        assert cache.put(stale) is newer
+        assert cache.put_serialized(
+            stale.user_id, b"{}", stale.time_updated
+        ) is newer
+        assert cache.get(user_params.user_id) is newer
+
+    def test_invalidate(self, user_params):
+        """Tests that an invalidated entry is no longer served."""
+        cache = UserParameterCache(max_size=4)
+        cache.put(user_params)
+        cache.invalidate(user_params.user_id)
+        assert cache.get(user_params.user_id) is None
+
+
+def test_default_parameters_are_shared_and_frozen():
+    """Tests that defaulted thresholds reuse one validated, immutable instance."""
+    first = UserParameterBase(preferred_lat=1.0, preferred_lon=2.0)
+    second = UserParameterBase(preferred_lat=3.0, preferred_lon=4.0)
+    assert first.uv_index_threshold is DEFAULT_PARAMETERS["uv_index_threshold"]
+    assert second.uv_index_threshold is first.uv_index_threshold
+    with pytest.raises(ValidationError):
+        first.uv_index_threshold.importance = 10
+    assert UserIndividualParameter.model_validate(
+        first.uv_index_threshold.model_dump()
+    ) == first.uv_index_threshold
+    assert second.allergens is first.allergens
+    with pytest.raises(AttributeError):
+        first.allergens.parameter_array_value.append("birch_pollen")
@@ -86,4 +86,4 @@ class TestUserDataManager:
         """Tests that getting a user calls the session's scalar method correctly."""
         username = "testuser"
         await datamanager.get_user_by_user_name(username)
-        mock_session.scalar.assert_called_once_with(ANY)
+        mock_session.scalar.assert_called_once_with(ANY, {"username": username})